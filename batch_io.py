@@ -0,0 +1,199 @@
+"""
+Importação e exportação em lote (CSV / JSONL)
+Os arquivos são lidos e gravados linha a linha e processados em blocos de
+tamanho fixo, então a memória usada não depende do tamanho do arquivo.
+O progresso e a vazão (linhas/s) são mostrados no stderr.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+from itertools import islice
+
+from records import RECORD_TYPES, encode_value
+
+# Linhas por bloco gravado no armazenamento
+CHUNK_SIZE = 1000
+
+# Intervalo mínimo entre mensagens de progresso (s)
+PROGRESS_INTERVAL = 1.0
+
+FORMATS = ('csv', 'jsonl')
+
+# Coluna do CSV com os campos que não têm coluna própria (objeto JSON)
+EXTRA_COLUMN = 'extra'
+
+
+def detect_format(path, fmt=None):
+    """Formato pelo parâmetro ou pela extensão (.csv, .jsonl/.ndjson)"""
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato desconhecido: {fmt}")
+        return fmt
+    base, extension = os.path.splitext(path)
+    if extension.lower() == '.gz':
+        extension = os.path.splitext(base)[1]
+    extension = extension.lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    raise ValueError(f"Não foi possível identificar o formato de {path} (use --format)")
+
+
+def csv_fields(collection):
+    """Colunas do CSV de uma coleção: os campos do tipo de registro e a coluna de extras"""
+    cls = RECORD_TYPES.get(collection)
+    return list(cls.ALL_FIELDS) + [EXTRA_COLUMN] if cls else None
+
+
+def parse_csv_value(value):
+    """Texto do CSV -> valor (vazio some, true/false viram booleanos)"""
+    if value is None or value == '':
+        return None
+    lowered = value.lower()
+    if lowered in ('true', 'false'):
+        return lowered == 'true'
+    return value
+
+
+def read_rows(path, fmt=None, on_invalid=None):
+    """Gerar os registros do arquivo um a um ('-' lê da entrada padrão)
+
+    Linhas JSONL inválidas são puladas; `on_invalid(número da linha)` é
+    chamado para cada uma.
+    """
+    fmt = detect_format(path, fmt) if path != '-' else (fmt or 'jsonl')
+    stream = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8', newline='')
+    try:
+        if fmt == 'csv':
+            for row in csv.DictReader(stream):
+                values = {key: parse_csv_value(value) for key, value in row.items() if key}
+                record = {key: value for key, value in values.items() if value is not None}
+                extra = record.pop(EXTRA_COLUMN, None)
+                if extra:
+                    try:
+                        extra = json.loads(extra)
+                    except ValueError:
+                        extra = None
+                    if isinstance(extra, dict):
+                        record = dict(extra, **record)
+                yield record
+        else:
+            for number, line in enumerate(stream, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    print(f"⚠️ Linha {number} ignorada: JSON inválido", file=sys.stderr)
+                    if on_invalid:
+                        on_invalid(number)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def chunked(rows, size=CHUNK_SIZE):
+    """Agrupar um iterador em listas de até `size` itens"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class RowWriter:
+    """Grava registros em CSV ou JSONL à medida que chegam ('-' grava na saída padrão)
+
+    Com `stream` grava nesse objeto (que continua aberto); `header=False`
+    continua um CSV já começado, com as colunas em `fields`. Sem `fields`
+    as colunas vêm do primeiro registro; campos sem coluna própria vão
+    juntos, em JSON, para a coluna de extras.
+    """
+
+    def __init__(self, path, fmt=None, fields=None, stream=None, header=True):
+        self.fmt = detect_format(path, fmt) if path != '-' else (fmt or 'jsonl')
+        self.owns_stream = stream is None
+        if stream is None:
+            stream = sys.stdout if path == '-' else open(path, 'w', encoding='utf-8', newline='')
+        self.stream = stream
+        self.fields = list(fields) if fields else None
+        self.header = header
+        self.columns = None
+        self.csv = None
+        self.rows = 0
+
+    def write(self, record):
+        data = record.to_dict() if hasattr(record, 'to_dict') else dict(record)
+        if self.fmt == 'jsonl':
+            self.stream.write(json.dumps(data, ensure_ascii=False, default=encode_value) + '\n')
+        else:
+            if self.csv is None:
+                # Colunas do primeiro registro quando não informadas
+                self.fields = self.fields or [key for key in data if key != EXTRA_COLUMN] + [EXTRA_COLUMN]
+                self.columns = frozenset(self.fields)
+                self.csv = csv.DictWriter(self.stream, fieldnames=self.fields)
+                if self.header:
+                    self.csv.writeheader()
+            row = {key: encode_csv_value(value) for key, value in data.items() if key in self.columns}
+            extra = {key: value for key, value in data.items() if key not in self.columns}
+            if extra and EXTRA_COLUMN in self.columns:
+                row[EXTRA_COLUMN] = encode_csv_value(extra)
+            self.csv.writerow(row)
+        self.rows += 1
+
+    def close(self):
+        if not self.owns_stream:
+            return
+        if self.stream is sys.stdout:
+            self.stream.flush()
+        else:
+            self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def encode_csv_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=encode_value)
+    return '' if value is None else str(value)
+
+
+class Progress:
+    """Contagem de linhas com mensagens periódicas e vazão final"""
+
+    def __init__(self, label, total=None, stream=None, interval=PROGRESS_INTERVAL):
+        self.label = label
+        self.total = total
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.rows = 0
+        self.started = time.perf_counter()
+        self.last_report = self.started
+
+    def add(self, count):
+        self.rows += count
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            done = f"{self.rows}/{self.total}" if self.total else f"{self.rows}"
+            print(f"⏳ {self.label}: {done} linhas ({self.rate():.0f} linhas/s)", file=self.stream)
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started
+        return {'rows': self.rows, 'seconds': round(elapsed, 3), 'rows_per_sec': round(self.rate(), 1)}
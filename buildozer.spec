@@ -28,7 +28,7 @@ source.exclude_dirs = tests, bin, .buildozer
 version = 1.1
 
 # (list) Dependências do aplicativo - versões compatíveis com Android 15
-requirements = python3,kivy==2.0.0,kivymd==0.104.2,pillow,filelock,requests==2.31.0,python-dateutil==2.8.2,plyer==2.1.0,certifi,charset-normalizer,idna,urllib3
+requirements = python3,sqlite3,kivy==2.0.0,kivymd==0.104.2,pillow,filelock,requests==2.31.0,python-dateutil==2.8.2,plyer==2.1.0,certifi,charset-normalizer,idna,urllib3
 
 # (str) Arquitetura suportada (pode ser all, armeabi-v7a, arm64-v8a, x86, x86_64)
 android.archs = arm64-v8a, armeabi-v7a
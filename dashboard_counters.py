@@ -0,0 +1,67 @@
+"""
+Contadores materializados do painel administrativo
+Mantidos a cada inclusão/alteração e gravados junto com os dados locais
+(coleção 'summary'), para que os cartões do painel não precisem percorrer
+o histórico.
+"""
+
+PENDING_REPORT_STATUSES = ('Pendente', 'pending')
+OPEN_INCIDENT_STATUSES = ('open', 'Aberta', 'Em andamento')
+
+# Contador -> (coleção, regra que decide se o registro entra na contagem)
+COUNTER_RULES = {
+    'total_reports': ('reports', lambda record: True),
+    'pending_reports': ('reports', lambda record: record.get('status') in PENDING_REPORT_STATUSES),
+    'active_visitors': ('visitors', lambda record: record.get('status') == 'active'),
+    'open_incidents': ('incidents', lambda record: record.get('status') in OPEN_INCIDENT_STATUSES),
+    'active_notices': ('notices', lambda record: record.get('active', True))
+}
+
+SUMMARY_COLLECTION = 'summary'
+SUMMARY_KEY = 'dashboard'
+
+
+class DashboardCounters:
+    """Contadores do painel, atualizados incrementalmente"""
+
+    def __init__(self, store):
+        self.store = store
+        self.values = dict.fromkeys(COUNTER_RULES, 0)
+
+    def load(self, data):
+        """Ler contadores salvos; recalcular se ainda não existirem"""
+        saved = (data or {}).get(SUMMARY_COLLECTION, {}).get(SUMMARY_KEY)
+        if saved is None or set(saved) != set(COUNTER_RULES):
+            self.rebuild()
+        else:
+            self.values = dict(saved)
+
+    def rebuild(self):
+        """Recalcular tudo a partir das coleções (uma única vez, na migração)"""
+        self.values = dict.fromkeys(COUNTER_RULES, 0)
+        for name, (collection, rule) in COUNTER_RULES.items():
+            self.values[name] = sum(1 for record in self.store.query(collection) if rule(record))
+        self.persist()
+
+    def _adjust(self, collection, record, delta):
+        for name, (rule_collection, rule) in COUNTER_RULES.items():
+            if rule_collection == collection and rule(record):
+                self.values[name] += delta
+
+    def on_add(self, collection, record):
+        self._adjust(collection, record, 1)
+        self.persist()
+
+    def on_update(self, collection, old_record, new_record):
+        self._adjust(collection, old_record, -1)
+        self._adjust(collection, new_record, 1)
+        self.persist()
+
+    def persist(self):
+        self.store.put(SUMMARY_COLLECTION, SUMMARY_KEY, dict(self.values))
+
+    def get(self, name):
+        return self.values.get(name, 0)
+
+    def snapshot(self):
+        return dict(self.values)
@@ -0,0 +1,192 @@
+"""
+Pipeline de alertas de emergência
+O alerta é gravado primeiro no outbox local (não se perde sem rede) e em
+seguida enviado em paralelo para o Firestore e, via FCM, para os tópicos
+de cada papel que deve ser avisado. Mede a latência entre o acionamento e
+a entrega e compara com a meta (SLO).
+"""
+
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Papéis avisados em uma emergência (um tópico FCM por papel)
+ALERT_ROLES = ('direcao', 'funcionario')
+
+# Limite de mensagens por chamada send_each do FCM
+FCM_BATCH_LIMIT = 500
+
+
+def alert_topic(role):
+    return f'emergencia_{role}'
+
+
+class FCMTransport:
+    """Envio por Firebase Cloud Messaging (firebase_admin.messaging)"""
+
+    # Entrega real: conta como alerta enviado
+    real = True
+
+    def __init__(self, messaging):
+        self.messaging = messaging
+
+    def build_message(self, topic, payload):
+        messaging = self.messaging
+        return messaging.Message(
+            topic=topic,
+            data={key: str(value) for key, value in payload.items()},
+            notification=messaging.Notification(
+                title='Emergência!',
+                body=f"Alerta acionado por {payload.get('user', 'Anônimo')}"
+            ),
+            android=messaging.AndroidConfig(priority='high', ttl=60),
+            apns=messaging.APNSConfig(headers={'apns-priority': '10'})
+        )
+
+    def send(self, topics, payload):
+        """Enviar para todos os tópicos em lotes; retorna quantos foram entregues"""
+        messages = [self.build_message(topic, payload) for topic in topics]
+        send_batch = getattr(self.messaging, 'send_each', None) or self.messaging.send_all
+        delivered = 0
+        for start in range(0, len(messages), FCM_BATCH_LIMIT):
+            response = send_batch(messages[start:start + FCM_BATCH_LIMIT])
+            delivered += response.success_count
+        if messages and not delivered:
+            raise RuntimeError('Nenhuma notificação entregue')
+        return delivered
+
+
+class LoopbackTransport:
+    """Transporte local (sem rede) para testes e modo demonstração
+
+    Nunca conta como entrega: ninguém recebe o alerta.
+    """
+
+    real = False
+
+    def __init__(self, latency=0.0, fail=False):
+        self.latency = latency
+        self.fail = fail
+        self.delivered = []
+
+    def send(self, topics, payload):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError('Falha simulada no envio')
+        now = time.time()
+        self.delivered.extend((topic, dict(payload), now) for topic in topics)
+        return len(topics)
+
+
+class AlertPipeline:
+    """Aciona alertas: grava localmente e distribui em paralelo para os canais"""
+
+    def __init__(self, outbox, write_remote, transport=None, roles=ALERT_ROLES, slo_ms=2000,
+                 schedule=None, max_workers=4, history=200, resolve_transport=None):
+        self.outbox = outbox
+        self.write_remote = write_remote
+        # Sem transporte o push falha; `resolve_transport()` tenta obtê-lo (ex.: reconectar)
+        self.transport = transport
+        self.resolve_transport = resolve_transport
+        self.roles = roles
+        self.slo_ms = slo_ms
+        self.schedule = schedule
+        # Pool próprio: alertas não esperam atrás das demais chamadas de rede
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='alert')
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=history)
+        self.channel_failures = {'firestore': 0, 'push': 0}
+        self.slo_misses = 0
+        self.triggered = 0
+
+    def trigger(self, alert, callback=None, started=None):
+        """Acionar alerta; callback(result, error) ao fim da distribuição"""
+        started = started or time.perf_counter()
+        key = self.outbox.enqueue('emergency_alerts', alert)
+        payload = dict(alert, alert_id=key)
+        topics = [alert_topic(role) for role in self.roles]
+
+        channels = {
+            'firestore': lambda: self._deliver_remote(key, alert),
+            'push': lambda: self._deliver_push(topics, payload)
+        }
+        state = {'pending': len(channels), 'results': {}}
+
+        def finished(name, future):
+            error = future.exception()
+            elapsed = (time.perf_counter() - started) * 1000
+            # Canal real: Firestore, ou push por um transporte que entrega de fato
+            real = error is None and (name != 'push' or future.result())
+            with self.lock:
+                state['results'][name] = {'ms': elapsed, 'error': str(error) if error else None,
+                                          'real': bool(real)}
+                if error:
+                    self.channel_failures[name] += 1
+                state['pending'] -= 1
+                done = state['pending'] == 0
+            if done:
+                self._complete(key, state['results'], started, callback)
+
+        for name, send in channels.items():
+            future = self.executor.submit(send)
+            future.add_done_callback(lambda f, name=name: finished(name, f))
+        return key
+
+    def _deliver_remote(self, key, alert):
+        # Mesmo ID do outbox: se a sincronização reenviar, sobrescreve o mesmo documento
+        self.write_remote(key, alert)
+        self.outbox.ack([key])
+
+    def _deliver_push(self, topics, payload):
+        """Enviar o push; retorna se a entrega é real (loopback não conta)"""
+        transport = self.transport
+        if transport is None and self.resolve_transport:
+            transport = self.resolve_transport()
+        if transport is None:
+            raise RuntimeError('Push indisponível')
+        transport.send(topics, payload)
+        return getattr(transport, 'real', True)
+
+    def _complete(self, key, channels, started, callback):
+        latency = (time.perf_counter() - started) * 1000
+        delivered = any(channel['real'] for channel in channels.values())
+        within_slo = delivered and latency <= self.slo_ms
+        with self.lock:
+            self.triggered += 1
+            self.latencies.append(latency)
+            if not within_slo:
+                self.slo_misses += 1
+        if not delivered:
+            print(f"⚠️ Alerta {key} não entregue - salvo localmente, mantido no outbox para reenvio")
+        elif not within_slo:
+            print(f"⚠️ Alerta {key} fora da meta: {latency:.0f} ms (meta {self.slo_ms} ms)")
+
+        result = {'key': key, 'latency_ms': latency, 'delivered': delivered,
+                  'within_slo': within_slo, 'channels': channels}
+        if callback:
+            if self.schedule:
+                self.schedule(lambda dt: callback(result, None), 0)
+            else:
+                callback(result, None)
+
+    def stats(self):
+        """Latência do acionamento até a entrega (ms) e falhas por canal"""
+        with self.lock:
+            times = sorted(self.latencies)
+            failures = dict(self.channel_failures)
+            triggered, misses = self.triggered, self.slo_misses
+        percentile = lambda p: times[min(len(times) - 1, int(p * len(times)))] if times else None
+        return {
+            'triggered': triggered,
+            'slo_ms': self.slo_ms,
+            'slo_misses': misses,
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'max_ms': times[-1] if times else None,
+            'channel_failures': failures
+        }
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,176 @@
+"""
+Exportação em streaming das coleções (CSV / JSONL, opcionalmente gzip)
+Os registros são lidos em páginas do armazenamento local (LocalDataManager,
+terminal) ou do Firestore e gravados à medida que chegam, então a memória
+não cresce com o tamanho do histórico. Filtros por período e status.
+
+A cada `checkpoint_every` linhas o arquivo é sincronizado e o cursor da
+última linha gravada vai para um arquivo de estado (`<saída>.cursor`). Se
+a exportação for interrompida, a próxima execução com o mesmo estado
+corta o arquivo no último checkpoint e continua do cursor. Com gzip cada
+checkpoint fecha um membro do arquivo (gzip com vários membros é válido),
+então o corte nunca cai no meio de um bloco compactado.
+"""
+
+import os
+import sys
+import gzip
+import json
+
+from batch_io import RowWriter, Progress, CHUNK_SIZE, csv_fields, detect_format
+from local_storage import atomic_write
+from firebase_io import query_page
+from live_views import document_item
+
+# Campo de data (filtro de período e ordem) de cada coleção no Firestore
+EXPORT_DATE_FIELDS = {
+    'reports': 'timestamp', 'incidents': 'timestamp', 'notices': 'timestamp',
+    'emergency_alerts': 'timestamp', 'visitors': 'check_in', 'campaigns': 'created_at',
+    'drills': 'created_at'
+}
+
+
+def store_records(store, collection, after=None, status=None, since=None, until=None, chunk_size=CHUNK_SIZE):
+    """Gerar (cursor, registro) de um armazenamento local, uma página por vez"""
+    while True:
+        page = store.scan(collection, after, chunk_size, status=status, since=since, until=until)
+        yield from page
+        if len(page) < chunk_size:
+            return
+        after = page[-1][0]
+
+
+def firestore_records(db, collection, after=None, status=None, since=None, until=None, page_size=CHUNK_SIZE):
+    """Gerar (ID do documento, registro) de uma coleção do Firestore, em ordem de data
+
+    As datas são gravadas como texto ISO pelo app, então o período é
+    comparado como texto (AAAA-MM-DD...).
+    """
+    order_by = EXPORT_DATE_FIELDS.get(collection, 'timestamp')
+    where = []
+    if status is not None:
+        where.append(('status', '==', str(status)))
+    if since:
+        where.append((order_by, '>=', since))
+    if until:
+        where.append((order_by, '<=', until))
+    start_after = db.collection(collection).document(after).get() if after else None
+    while True:
+        docs, start_after = query_page(db, collection, order_by, page_size, start_after=start_after, where=where)
+        for doc in docs:
+            yield doc.id, document_item(collection, doc)
+        if start_after is None:
+            return
+
+
+class ExportFile:
+    """Arquivo de saída com checkpoints (texto, ou gzip com um membro por checkpoint)"""
+
+    def __init__(self, path, compress=False, offset=None):
+        self.compress = compress
+        self.raw = open(path, 'r+b' if offset is not None else 'wb')
+        if offset is not None:
+            self.raw.seek(offset)
+            self.raw.truncate()
+        self.member = None
+        self._open_member()
+
+    def _open_member(self):
+        self.member = gzip.GzipFile(fileobj=self.raw, mode='wb') if self.compress else self.raw
+
+    def write(self, text):
+        self.member.write(text.encode('utf-8'))
+
+    def checkpoint(self):
+        """Sincronizar o que foi gravado; retorna o tamanho do arquivo (ponto de retomada)"""
+        if self.compress:
+            self.member.close()
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+        offset = self.raw.tell()
+        if self.compress:
+            self._open_member()
+        return offset
+
+    def close(self):
+        if self.compress:
+            self.member.close()
+        self.raw.close()
+
+
+def load_state(state_file):
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def export_records(open_records, path, fmt=None, compress=None, state_file=None, resume=True,
+                   checkpoint_every=CHUNK_SIZE, label='Exportando', fields=None, query=None):
+    """Gravar em `path` os registros de `open_records(cursor)` ((cursor, registro) após o cursor)
+
+    `compress` padrão: pela extensão .gz; `fields`: colunas do CSV. `query`
+    (coleção e filtros) vai para o estado junto com o formato: só se retoma
+    uma exportação idêntica. Retorna as estatísticas da exportação; o
+    arquivo de estado é removido quando ela termina.
+    """
+    compress = path.endswith('.gz') if compress is None else compress
+    text_path = path.removesuffix('.gz') if compress else path
+    query = dict(query or {}, format=detect_format(text_path, fmt), compress=compress)
+    state_file = state_file or path + '.cursor'
+    state = load_state(state_file) if resume else None
+    if state and (state.get('path') != path or not os.path.exists(path)):
+        state = None
+    if state and state.get('query') != query:
+        print("↪️ Exportação interrompida com outros filtros ou formato - recomeçando", file=sys.stderr)
+        state = None
+    resumed = bool(state and state.get('rows'))
+
+    output = ExportFile(path, compress, offset=state['offset'] if resumed else None)
+    writer = RowWriter(text_path, fmt, stream=output,
+                       fields=state.get('fields') if resumed else fields, header=not resumed)
+    progress = Progress(label)
+    cursor = state['cursor'] if resumed else None
+    rows = state['rows'] if resumed else 0
+    if resumed:
+        print(f"↪️ Retomando após {rows} linhas (cursor {cursor})", file=sys.stderr)
+
+    def checkpoint():
+        atomic_write(state_file, json.dumps({
+            'path': path, 'query': query, 'cursor': cursor, 'rows': rows, 'offset': output.checkpoint(),
+            'fields': writer.fields
+        }))
+
+    try:
+        for cursor, record in open_records(cursor):
+            writer.write(record)
+            rows += 1
+            progress.add(1)
+            if writer.rows % checkpoint_every == 0:
+                checkpoint()
+        output.checkpoint()
+    finally:
+        # Interrompida: o estado do último checkpoint permite retomar
+        output.close()
+    if os.path.exists(state_file):
+        os.remove(state_file)
+    return dict(progress.stats(), total_rows=rows, resumed=resumed)
+
+
+def export_store(store, collection, path, status=None, since=None, until=None, **options):
+    """Exportar uma coleção do armazenamento local (journal ou SQLite)"""
+    return export_records(
+        lambda cursor: store_records(store, collection, cursor, status=status, since=since, until=until),
+        path, label=f"Exportando {collection}", fields=csv_fields(collection),
+        query={'collection': collection, 'status': status, 'since': since, 'until': until}, **options
+    )
+
+
+def export_firestore(db, collection, path, status=None, since=None, until=None, **options):
+    """Exportar uma coleção do Firestore"""
+    return export_records(
+        lambda cursor: firestore_records(db, collection, cursor, status=status, since=since, until=until),
+        path, label=f"Exportando {collection}", fields=csv_fields(collection),
+        query={'collection': collection, 'status': status, 'since': since, 'until': until}, **options
+    )
@@ -0,0 +1,189 @@
+"""
+Execução de I/O de rede (Firebase/Firestore) fora da thread da interface
+As chamadas rodam em um pool limitado de threads e devolvem futures; os
+callbacks de conclusão voltam para a thread da UI via `schedule`
+(Clock.schedule_once no Kivy).
+"""
+
+import time
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class IOExecutor:
+    """Pool limitado de threads para chamadas de rede, com métricas de latência"""
+
+    def __init__(self, max_workers=4, schedule=None, history=100):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='firebase-io')
+        self.schedule = schedule
+        self.latencies = defaultdict(lambda: deque(maxlen=history))
+        self.lock = threading.Lock()
+
+    def submit(self, name, func, *args, callback=None, **kwargs):
+        """Executar `func` no pool; `callback(result, error)` roda na thread da UI"""
+        def run():
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                with self.lock:
+                    self.latencies[name].append(elapsed_ms)
+
+        future = self.pool.submit(run)
+        if callback:
+            future.add_done_callback(lambda f: self._dispatch(f, callback))
+        return future
+
+    def _dispatch(self, future, callback):
+        """Entregar o resultado ao callback na thread da UI"""
+        error = future.exception()
+        self.deliver(callback, None if error else future.result(), error)
+
+    def deliver(self, callback, result, error=None):
+        """Chamar `callback(result, error)` na thread da UI"""
+        if self.schedule:
+            self.schedule(lambda dt: callback(result, error), 0)
+        else:
+            callback(result, error)
+
+    def stats(self):
+        """Latência recente por tipo de chamada (ms): amostras, média, máxima e última"""
+        with self.lock:
+            return {
+                name: {
+                    'samples': len(values),
+                    'avg_ms': sum(values) / len(values),
+                    'max_ms': max(values),
+                    'last_ms': values[-1]
+                }
+                for name, values in self.latencies.items() if values
+            }
+
+    def shutdown(self, wait=True):
+        """Encerrar o pool (aguardando as chamadas pendentes)"""
+        self.pool.shutdown(wait=wait)
+
+
+# Limite de operações por commit de WriteBatch no Firestore
+FIRESTORE_BATCH_LIMIT = 500
+
+
+class BatchWriter:
+    """Agrupa gravações em commits de WriteBatch, divididos em lotes de até 500"""
+
+    def __init__(self, db, limit=FIRESTORE_BATCH_LIMIT):
+        self.db = db
+        self.limit = limit
+        self.ops = []
+        self.commits = 0
+
+    def set(self, ref, data, merge=False):
+        self.ops.append(('set', ref, data, merge))
+
+    def update(self, ref, fields):
+        self.ops.append(('update', ref, fields, None))
+
+    def delete(self, ref):
+        self.ops.append(('delete', ref, None, None))
+
+    def commit(self):
+        """Enviar as operações pendentes; retorna quantas foram gravadas"""
+        ops, self.ops = self.ops, []
+        for start in range(0, len(ops), self.limit):
+            batch = self.db.batch()
+            for op, ref, data, merge in ops[start:start + self.limit]:
+                if op == 'set':
+                    batch.set(ref, data, merge=merge)
+                elif op == 'update':
+                    batch.update(ref, data)
+                else:
+                    batch.delete(ref)
+            batch.commit()
+            self.commits += 1
+        return len(ops)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+
+
+# Documentos por página nas listas paginadas
+PAGE_SIZE = 20
+
+
+def query_page(db, collection, order_by, limit=PAGE_SIZE, start_after=None, descending=False,
+               where=(), fields=None):
+    """Ler uma página ordenada: (documentos, cursor da próxima página ou None)
+
+    `start_after` é o último documento da página anterior; `fields` limita
+    os campos baixados (o campo da ordenação é sempre incluído).
+    """
+    query = db.collection(collection)
+    for field, op, value in where:
+        query = query.where(field, op, value)
+    if fields:
+        query = query.select(sorted(set(fields) | {order_by}))
+    query = query.order_by(order_by, direction='DESCENDING' if descending else 'ASCENDING')
+    if start_after is not None:
+        query = query.start_after(start_after)
+    docs = list(query.limit(limit).stream())
+    return docs, (docs[-1] if len(docs) == limit else None)
+
+
+class FirestorePageSource:
+    """Fonte paginada (VirtualList) sobre uma consulta do Firestore
+
+    As páginas são lidas no pool de I/O; ao entregar uma página, a próxima
+    já é pedida em segundo plano (prefetch) para a rolagem não esperar.
+    """
+
+    def __init__(self, io, fetch, name='firestore.page', prefetch=True):
+        self.io = io
+        self.fetch = fetch
+        self.name = name
+        self.prefetch = prefetch
+        self.prefetched = None
+        self.lock = threading.Lock()
+        self.metrics = {'pages': 0, 'documents': 0, 'prefetch_hits': 0}
+
+    def _load(self, cursor, limit):
+        rows, next_cursor = self.fetch(cursor, limit)
+        with self.lock:
+            self.metrics['pages'] += 1
+            self.metrics['documents'] += len(rows)
+        return rows, next_cursor
+
+    def _request(self, cursor, limit):
+        with self.lock:
+            prefetched, self.prefetched = self.prefetched, None
+            if prefetched and prefetched[0] is cursor and prefetched[1] == limit:
+                self.metrics['prefetch_hits'] += 1
+                return prefetched[2]
+        return self.io.submit(self.name, self._load, cursor, limit)
+
+    def fetch_page_async(self, cursor, limit, callback):
+        """Pedir a página após `cursor`; callback((linhas, próximo cursor), error) na thread da UI"""
+        future = self._request(cursor, limit)
+        future.add_done_callback(lambda f: self._page_done(f, limit, callback))
+
+    def _page_done(self, future, limit, callback):
+        error = future.exception()
+        page = None if error else future.result()
+        if page is not None and page[1] is not None and self.prefetch:
+            next_future = self.io.submit(self.name, self._load, page[1], limit)
+            with self.lock:
+                self.prefetched = (page[1], limit, next_future)
+        self.io.deliver(callback, page, error)
+
+    def fetch_page(self, cursor, limit):
+        """Versão síncrona (fora da thread da UI)"""
+        return self._request(cursor, limit).result()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.metrics)
@@ -0,0 +1,154 @@
+"""
+Importações adiadas e medição do tempo de inicialização
+Módulos pesados (firebase_admin, pyrebase, widgets do KivyMD) só são
+importados no primeiro uso: `lazy_module` devolve um módulo substituto e
+`lazy_class` uma classe substituta que importa o módulo na primeira
+instância. O tempo de cada importação adiada fica em `IMPORT_TIMES`.
+
+Executado como script, mede a importação de um módulo com
+`python -X importtime` e falha se passar do orçamento de inicialização:
+
+    python lazy_imports.py main terminal_app --budget-ms 1500 --require kivy kivymd
+
+`--require` falha se algum dos módulos não estiver instalado: sem eles
+o app entra no modo sem interface e a medição não vale.
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib
+import importlib.util
+import subprocess
+import threading
+
+# Orçamento de importação dos pontos de entrada (ms, acumulado)
+STARTUP_BUDGET_MS = 1500
+
+# Tempo gasto em cada importação adiada (ms)
+IMPORT_TIMES = {}
+
+_lock = threading.RLock()
+
+
+def module_available(name):
+    """Módulo instalado? (consulta sem importar)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def load_module(name):
+    """Importar o módulo, registrando o tempo da primeira importação"""
+    with _lock:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        IMPORT_TIMES[name] = (time.perf_counter() - start) * 1000
+        return module
+
+
+class LazyModule:
+    """Substituto de módulo: importa no primeiro acesso a um atributo"""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = load_module(self.__dict__['_name'])
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._load(), attribute, value)
+
+    def __repr__(self):
+        state = 'carregado' if self.__dict__['_module'] is not None else 'adiado'
+        return f"<módulo {self.__dict__['_name']} ({state})>"
+
+
+class LazyClass:
+    """Substituto de classe de widget: importa o módulo na primeira instância"""
+
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+        self.cls = None
+
+    def resolve(self):
+        if self.cls is None:
+            self.cls = getattr(load_module(self.module), self.name)
+        return self.cls
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        return f'<classe {self.module}.{self.name} ({"carregada" if self.cls else "adiada"})>'
+
+
+def lazy_module(name):
+    return LazyModule(name)
+
+
+def lazy_class(module, name):
+    return LazyClass(module, name)
+
+
+def measure_imports(module, cwd=None):
+    """Tempos de `python -X importtime -c 'import módulo'`: [(módulo, próprio ms, acumulado ms)]"""
+    env = dict(os.environ, KIVY_NO_ARGS='1', KIVY_NO_CONSOLELOG='1')
+    env.pop('RUN_KIVY', None)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=cwd, env=env
+    )
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else module)
+    timings = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        timings.append((name.strip(), int(own) / 1000, int(cumulative) / 1000))
+    return timings
+
+
+def check_budget(modules, budget_ms=STARTUP_BUDGET_MS, top=10, cwd=None, require=()):
+    """Medir cada módulo e mostrar os mais lentos; retorna False se algum passar do orçamento"""
+    missing = [name for name in require if not module_available(name)]
+    if missing:
+        print(f"❌ Dependências não instaladas: {', '.join(missing)} (a medição não seria representativa)")
+        return False
+    ok = True
+    for module in modules:
+        timings = measure_imports(module, cwd=cwd)
+        total = next((cumulative for name, own, cumulative in timings if name == module), 0.0)
+        status = '✅' if total <= budget_ms else '❌'
+        print(f"{status} import {module}: {total:.0f} ms (orçamento {budget_ms} ms)")
+        for name, own, cumulative in sorted(timings, key=lambda timing: timing[1], reverse=True)[:top]:
+            print(f"   {own:8.1f} ms  {cumulative:8.1f} ms  {name}")
+        ok = ok and total <= budget_ms
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tempo de importação dos pontos de entrada')
+    parser.add_argument('modules', nargs='*', default=['main', 'terminal_app'])
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--require', nargs='*', default=[], help='módulos que precisam estar instalados')
+    args = parser.parse_args()
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.exit(0 if check_budget(args.modules, args.budget_ms, args.top, cwd=here, require=args.require) else 1)
@@ -0,0 +1,83 @@
+"""
+Construção preguiçosa de telas
+Cada tela é registrada com uma fábrica e só é construída na primeira vez
+que se navega até ela; telas pouco usadas podem ser descartadas para
+liberar memória e são reconstruídas no próximo acesso.
+"""
+
+import time
+from collections import OrderedDict
+
+try:
+    from kivy.uix.screenmanager import ScreenManager
+except ImportError:
+    ScreenManager = object
+
+
+class LazyScreenManager(ScreenManager):
+    """ScreenManager que constrói as telas sob demanda (com limite LRU)"""
+
+    def __init__(self, max_alive=5, **kwargs):
+        super().__init__(**kwargs)
+        self.factories = {}
+        self.pinned = set()
+        self.max_alive = max_alive
+        self.build_times = {}
+        self.last_used = OrderedDict()
+
+    def register(self, name, factory, pinned=False):
+        """Registrar tela; `pinned` impede que ela seja descartada"""
+        self.factories[name] = factory
+        if pinned:
+            self.pinned.add(name)
+
+    def is_built(self, name):
+        return super().has_screen(name)
+
+    def has_screen(self, name):
+        return name in self.factories or super().has_screen(name)
+
+    def get_screen(self, name):
+        """Obter tela, construindo-a no primeiro acesso"""
+        if name in self.factories and not self.is_built(name):
+            self._build(name)
+        self.last_used[name] = time.monotonic()
+        self.last_used.move_to_end(name)
+        self.trim(keep=name)
+        return super().get_screen(name)
+
+    def _build(self, name):
+        start = time.perf_counter()
+        screen = self.factories[name]()
+        self.build_times[name] = (time.perf_counter() - start) * 1000
+        print(f"⏱️ Tela '{name}' construída em {self.build_times[name]:.0f} ms")
+        self.add_widget(screen)
+
+    def release(self, name):
+        """Descartar uma tela já construída (será reconstruída se necessário)"""
+        if name in self.pinned or not self.is_built(name):
+            return
+        screen = super().get_screen(name)
+        if screen is self.current_screen:
+            return
+        self.remove_widget(screen)
+        self.last_used.pop(name, None)
+
+    def trim(self, keep=None):
+        """Descartar as telas menos usadas além de `max_alive`"""
+        candidates = [
+            name for name in self.last_used
+            if name not in self.pinned and name != keep
+            and not (self.current_screen and self.current_screen.name == name)
+        ]
+        alive = len([name for name in self.last_used if name not in self.pinned])
+        for name in candidates:
+            if alive <= self.max_alive:
+                break
+            self.release(name)
+            alive -= 1
+
+    def release_inactive(self):
+        """Descartar todas as telas não fixadas (pressão de memória, logout)"""
+        for name in list(self.last_used):
+            self.release(name)
@@ -0,0 +1,183 @@
+"""
+Visões em tempo real de coleções do Firestore
+Um listener (on_snapshot) por consulta, compartilhado entre as telas que a
+assinam. Cada snapshot aplica à visão em memória só os documentos que
+mudaram e entrega às telas a lista de alterações com as posições, na thread
+da UI (via `schedule`, Clock.schedule_once no Kivy). O listener é encerrado
+quando a última tela sai. `on_change(coleção)` é avisado a cada alteração
+recebida (ex.: para descartar resultados em cache).
+
+Alterações entregues: [(tipo, posição, item)] com tipo 'added', 'modified',
+'removed' ou 'reset' (primeira entrega; item = lista completa).
+"""
+
+import itertools
+import threading
+
+from records import RECORD_TYPES
+
+
+def document_item(collection, doc):
+    """Documento do Firestore -> registro da coleção (ou dicionário com `id`)"""
+    cls = RECORD_TYPES.get(collection)
+    if cls is not None:
+        return cls.from_firestore(doc)
+    return dict(doc.to_dict() or {}, id=doc.id)
+
+
+class LiveView:
+    """Resultado de uma consulta em memória, na mesma ordem da consulta"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.items = []
+        self.ready = False
+        self.snapshots = 0
+        self.changes_applied = 0
+
+    def apply(self, changes):
+        """Aplicar [(tipo, documento, posição antiga, posição nova)] na ordem do Firestore
+
+        As posições seguem o DocumentChange: cada alteração vale sobre o
+        resultado das anteriores. Retorna as alterações para a UI.
+        """
+        deltas = []
+        for kind, doc, old_index, new_index in changes:
+            if kind == 'removed':
+                item = self.items.pop(old_index)
+                deltas.append(('removed', old_index, item))
+                continue
+            item = document_item(self.collection, doc)
+            if kind == 'added':
+                self.items.insert(new_index, item)
+                deltas.append(('added', new_index, item))
+            elif old_index == new_index:
+                self.items[new_index] = item
+                deltas.append(('modified', new_index, item))
+            else:
+                # Mudou de posição (ex.: campo da ordenação alterado)
+                self.items.pop(old_index)
+                self.items.insert(new_index, item)
+                deltas.append(('removed', old_index, None))
+                deltas.append(('added', new_index, item))
+        self.snapshots += 1
+        self.changes_applied += len(changes)
+        first = not self.ready
+        self.ready = True
+        return first, deltas
+
+
+class LiveQueries:
+    """Listeners do Firestore compartilhados por consulta, com contagem de assinantes"""
+
+    def __init__(self, get_db, schedule=None, on_change=None):
+        self.get_db = get_db
+        self.schedule = schedule
+        self.on_change = on_change
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.tokens = itertools.count(1)
+
+    def subscribe(self, collection, callback, where=(), order_by=None, descending=False, limit=None):
+        """Assinar uma consulta; `callback(alterações)` roda na thread da UI
+
+        Retorna uma Subscription; chame `close()` ao sair da tela.
+        """
+        key = (collection, tuple(where), order_by, descending, limit)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = {'view': LiveView(collection), 'subscribers': {}, 'watch': None}
+                self.entries[key] = entry
+                entry['watch'] = self._watch(key, entry)
+            token = next(self.tokens)
+            entry['subscribers'][token] = callback
+            view = entry['view']
+            if view.ready:
+                # Assinante novo de uma consulta já ativa: lista completa
+                self._dispatch(callback, [('reset', 0, list(view.items))])
+        return Subscription(self, key, token)
+
+    def _watch(self, key, entry):
+        """Iniciar o listener do Firestore (None sem conexão: nada é entregue)"""
+        db = self.get_db()
+        if not db:
+            return None
+        collection, where, order_by, descending, limit = key
+        query = db.collection(collection)
+        for field, op, value in where:
+            query = query.where(field, op, value)
+        if order_by:
+            query = query.order_by(order_by, direction='DESCENDING' if descending else 'ASCENDING')
+        if limit:
+            query = query.limit(limit)
+        return query.on_snapshot(lambda docs, changes, read_time: self._on_snapshot(key, changes))
+
+    def _on_snapshot(self, key, changes):
+        """Snapshot recebido (thread do Firestore): aplicar e avisar os assinantes"""
+        converted = [(change.type.name.lower(), change.document, change.old_index, change.new_index)
+                     for change in changes]
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return
+            first, deltas = entry['view'].apply(converted)
+            if first:
+                deltas = [('reset', 0, list(entry['view'].items))]
+            callbacks = list(entry['subscribers'].values())
+        if deltas and not first and self.on_change:
+            self.on_change(key[0])
+        if deltas:
+            for callback in callbacks:
+                self._dispatch(callback, deltas)
+
+    def _dispatch(self, callback, deltas):
+        if self.schedule:
+            self.schedule(lambda dt: callback(deltas), 0)
+        else:
+            callback(deltas)
+
+    def unsubscribe(self, key, token):
+        """Remover assinante; o listener é encerrado quando não sobra nenhum"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry['subscribers'].pop(token, None) is None:
+                return
+            if entry['subscribers']:
+                return
+            del self.entries[key]
+        if entry['watch'] is not None:
+            entry['watch'].unsubscribe()
+
+    def close(self):
+        """Encerrar todos os listeners (fechamento do app)"""
+        with self.lock:
+            entries, self.entries = self.entries, {}
+        for entry in entries.values():
+            if entry['watch'] is not None:
+                entry['watch'].unsubscribe()
+
+    def stats(self):
+        """Listeners ativos: assinantes, documentos em memória e alterações aplicadas"""
+        with self.lock:
+            return {
+                f"{key[0]}{list(key[1]) if key[1] else ''}": {
+                    'subscribers': len(entry['subscribers']),
+                    'documents': len(entry['view'].items),
+                    'snapshots': entry['view'].snapshots,
+                    'changes_applied': entry['view'].changes_applied
+                }
+                for key, entry in self.entries.items()
+            }
+
+
+class Subscription:
+    """Assinatura de uma consulta em tempo real"""
+
+    def __init__(self, queries, key, token):
+        self.queries = queries
+        self.key = key
+        self.token = token
+
+    def close(self):
+        self.queries.unsubscribe(self.key, self.token)
@@ -0,0 +1,296 @@
+"""
+Dados locais das versões Android
+Gerenciador compartilhado por main_android.py e main_android_fixed.py:
+armazenamento com gravação em segundo plano (journal ou SQLite),
+contadores do painel, busca textual, registro de visitantes e exportação.
+"""
+
+import os
+import atexit
+import threading
+from datetime import datetime
+
+from local_storage import create_store
+from dashboard_counters import DashboardCounters
+from visitor_registry import VisitorRegistry, LocalVisitorBackend
+from record_ids import new_id
+from records import RECORD_TYPES, Status
+from search_index import SearchIndex
+from exporter import export_store
+from permissions import user_has_permission
+
+# Coleções com busca textual
+SEARCHABLE_COLLECTIONS = ('reports', 'incidents')
+
+
+class LocalDataManager:
+    """Gerenciador de dados locais (substituto do Firebase nas versões Android)"""
+    
+    # Gravação em segundo plano: no máximo a cada 500 ms ou 50 alterações
+    FLUSH_INTERVAL_MS = 500
+    FLUSH_EVERY = 50
+    
+    def __init__(self):
+        self.current_user = None
+        self.data_file = "local_data.json"
+        self.store = create_store(self.data_file, record_types=RECORD_TYPES,
+                                  flush_interval=self.FLUSH_INTERVAL_MS / 1000, flush_every=self.FLUSH_EVERY)
+        self.counters = DashboardCounters(self.store)
+        self.search_index = SearchIndex(os.path.splitext(self.data_file)[0] + '_search.json',
+                                        flush_interval=self.FLUSH_INTERVAL_MS / 1000)
+        # Índice de busca montado numa thread própria (start_indexing); até lá as
+        # alterações esperam na fila e são indexadas quando ele fica pronto
+        self.index_lock = threading.Lock()
+        self.index_backlog = []
+        self.index_thread = None
+        self.load_data()
+        atexit.register(self.flush)
+        self.visitors = VisitorRegistry(LocalVisitorBackend(self))
+        self.visitors.load()
+    
+    def load_data(self):
+        """Carregar snapshot local e reaplicar o journal de alterações"""
+        try:
+            self.data = self.store.load()
+            if self.data is None:
+                self.data = self.default_data()
+                self.save_data()
+            else:
+                # Snapshot perdido e dados refeitos só pelo journal: completar as coleções
+                missing = {key: value for key, value in self.default_data().items() if key not in self.data}
+                if missing:
+                    self.data.update(missing)
+                    self.save_data()
+        except Exception as e:
+            # Nunca deixar self.data indefinido; os arquivos ficam intactos para recuperação
+            print(f"❌ Erro ao carregar dados: {e} - usando dados iniciais")
+            self.data = self.default_data()
+            self.store.data = self.data
+        self.counters.load(self.data)
+    
+    @staticmethod
+    def default_data():
+        """Dados iniciais (primeira execução)"""
+        return {
+            'users': {
+                'admin@escola.com': {
+                    'password': 'admin123',
+                    'name': 'Administrador',
+                    'user_type': 'direcao',
+                    'active': True
+                },
+                'aluno@escola.com': {
+                    'password': '123456',
+                    'name': 'Aluno Exemplo',
+                    'user_type': 'aluno',
+                    'active': True
+                },
+                'funcionario@escola.com': {
+                    'password': 'func123',
+                    'name': 'Funcionário Exemplo',
+                    'user_type': 'funcionario',
+                    'active': True
+                }
+            },
+            'reports': [],
+            'notices': [
+                {
+                    'title': 'Simulado de Evacuação',
+                    'content': 'Simulado será realizado na próxima quinta-feira às 10h.',
+                    'date': '2025-09-20',
+                    'priority': 'Alta'
+                },
+                {
+                    'title': 'Novos Horários',
+                    'content': 'Portões funcionam de 7h às 18h.',
+                    'date': '2025-09-18',
+                    'priority': 'Média'
+                }
+            ],
+            'visitors': [],
+            'incidents': []
+        }
+    
+    def save_data(self):
+        """Salvar snapshot completo (compacta o journal)"""
+        try:
+            self.store.save(self.data)
+        except Exception as e:
+            print(f"Erro ao salvar dados: {e}")
+    
+    def sign_in(self, email, password):
+        """Fazer login"""
+        try:
+            if email in self.data['users']:
+                user = self.data['users'][email]
+                if user['password'] == password and user.get('active', True):
+                    self.current_user = {
+                        'email': email,
+                        'name': user['name'],
+                        'user_type': user['user_type'],
+                        'active': user['active']
+                    }
+                    return {'success': True, 'user_data': self.current_user}
+                else:
+                    return {'success': False, 'error': 'Credenciais inválidas ou usuário inativo'}
+            else:
+                return {'success': False, 'error': 'Usuário não encontrado'}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def sign_up(self, email, password, user_data):
+        """Cadastrar novo usuário"""
+        try:
+            if email not in self.data['users']:
+                self.store.put('users', email, {
+                    'password': password,
+                    'name': user_data.get('name', ''),
+                    'user_type': user_data.get('user_type', 'aluno'),
+                    'active': True,
+                    'created_at': datetime.now().isoformat()
+                })
+                return {'success': True}
+            else:
+                return {'success': False, 'error': 'Usuário já existe'}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def get_current_user(self):
+        """Obter usuário atual"""
+        return self.current_user
+    
+    def sign_out(self):
+        """Fazer logout"""
+        self.current_user = None
+    
+    def has_permission(self, permission):
+        """Verificar permissões do usuário"""
+        return user_has_permission(self.current_user, permission)
+    
+    def add_report(self, report_data):
+        """Adicionar denúncia"""
+        try:
+            report_data['id'] = new_id('R')
+            report_data['date'] = datetime.now().isoformat()
+            report_data['status'] = Status.PENDING
+            self.add_record('reports', report_data)
+            return True
+        except Exception as e:
+            print(f"Erro ao adicionar denúncia: {e}")
+            return False
+    
+    def add_incident(self, incident_data):
+        """Adicionar ocorrência"""
+        try:
+            incident_data['id'] = new_id('I')
+            incident_data['date'] = datetime.now().isoformat()
+            incident_data.setdefault('status', Status.OPEN)
+            self.add_record('incidents', incident_data)
+            return True
+        except Exception as e:
+            print(f"Erro ao adicionar ocorrência: {e}")
+            return False
+    
+    def add_record(self, collection, record):
+        """Adicionar registro e atualizar os contadores do painel e a busca"""
+        self.store.append(collection, record)
+        self.counters.on_add(collection, record)
+        if collection in SEARCHABLE_COLLECTIONS:
+            self._index_record(collection, record)
+    
+    def update_record(self, collection, record_id, fields, old_record=None):
+        """Atualizar registro pelo ID e ajustar os contadores do painel"""
+        if old_record is not None:
+            old_records = [dict(old_record)]
+        else:
+            old_records = [dict(record) for record in self.store.query(collection) if record.get('id') == record_id]
+        self.store.update(collection, {'id': record_id}, fields)
+        for old_record in old_records:
+            self.counters.on_update(collection, old_record, dict(old_record, **fields))
+            if collection in SEARCHABLE_COLLECTIONS:
+                self._index_record(collection, dict(old_record, **fields))
+        return len(old_records)
+    
+    def _index_record(self, collection, record):
+        with self.index_lock:
+            if self.search_index.loaded:
+                self.search_index.add(collection, record)
+            else:
+                self.index_backlog.append((collection, record))
+    
+    def start_indexing(self):
+        """Carregar (ou reconstruir) o índice de busca em segundo plano, uma única vez"""
+        with self.index_lock:
+            if self.index_thread is None:
+                self.index_thread = threading.Thread(target=self._build_search_index, name='search-index', daemon=True)
+                self.index_thread.start()
+    
+    def _build_search_index(self):
+        index = SearchIndex(self.search_index.index_file, flush_interval=self.FLUSH_INTERVAL_MS / 1000)
+        try:
+            index.load()
+            # Índice ausente ou defasado (ex.: dados restaurados): reconstruir
+            if any(index.count(c) != self.store.count(c) for c in SEARCHABLE_COLLECTIONS):
+                index.rebuild({c: self.store.query(c) for c in SEARCHABLE_COLLECTIONS})
+        except Exception as e:
+            print(f"❌ Erro ao montar o índice de busca: {e}")
+            return
+        with self.index_lock:
+            # Alterações feitas durante a montagem entram antes de liberar a busca
+            for collection, record in self.index_backlog:
+                index.add(collection, record)
+            self.index_backlog = []
+            self.search_index = index
+    
+    @property
+    def search_ready(self):
+        return self.search_index.loaded
+    
+    def search_records(self, query, limit=20, collections=SEARCHABLE_COLLECTIONS):
+        """Busca textual em denúncias e ocorrências, por relevância
+        
+        Enquanto o índice é montado (search_ready falso) retorna uma lista vazia.
+        """
+        self.start_indexing()
+        with self.index_lock:
+            if not self.search_index.loaded:
+                return []
+            return self.search_index.search(query, collections=collections, limit=limit)
+    
+    def flush(self):
+        """Gravar já as alterações pendentes (app em segundo plano, encerramento, emergência)"""
+        try:
+            return self.store.flush() + self.search_index.flush()
+        except Exception as e:
+            print(f"Erro ao gravar dados pendentes: {e}")
+            return 0
+    
+    def get_flush_stats(self):
+        """Métricas da gravação em segundo plano (duração dos flushes, gravações coalescidas)"""
+        return self.store.flush_stats()
+    
+    def get_dashboard_counters(self):
+        """Contadores do painel (denúncias pendentes, visitantes, ocorrências, avisos)"""
+        return self.counters.snapshot()
+    
+    def get_reports(self, status=None, limit=None, offset=0, newest_first=False):
+        """Obter denúncias (com filtro por status e paginação)"""
+        return self.store.query('reports', status=status, limit=limit,
+                                offset=offset, newest_first=newest_first)
+    
+    def count_reports(self, status=None):
+        """Contar denúncias sem carregar a lista"""
+        return self.store.count('reports', status=status)
+    
+    def get_notices(self, limit=None, offset=0, newest_first=False):
+        """Obter avisos (paginados)"""
+        return self.store.query('notices', limit=limit, offset=offset, newest_first=newest_first)
+    
+    def count_notices(self):
+        """Contar avisos sem carregar a lista"""
+        return self.store.count('notices')
+    
+    def export_collection(self, collection, path, status=None, since=None, until=None, **options):
+        """Exportar uma coleção para CSV/JSONL (.gz opcional) em streaming, retomável pelo cursor"""
+        self.flush()
+        return export_store(self.store, collection, path, status=status, since=since, until=until, **options)
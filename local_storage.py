@@ -0,0 +1,784 @@
+"""
+Armazenamento local do Sistema de Segurança Escolar
+Backends:
+  - journal: snapshot JSON + journal append-only; cada alteração vira uma
+    linha no journal e o snapshot completo só é reescrito na compactação
+  - sqlite: uma tabela por coleção, com índices em status, date e email
+
+Snapshots são gravados em arquivo temporário + fsync + rename atômico, com
+checksum SHA-256. As gerações anteriores (e seus journals) são mantidas
+por renomeação para recuperar os dados se o snapshot atual estiver corrompido.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from itertools import islice
+
+from records import Record, Status, encode_value
+
+# Coleções indexadas por chave (email); as demais são listas de registros
+KEYED_COLLECTIONS = ('users',)
+LIST_COLLECTIONS = ('reports', 'notices', 'visitors', 'incidents')
+
+DATE_FIELDS = ('date', 'timestamp', 'check_in', 'created_at')
+
+# Gerações anteriores do snapshot mantidas para recuperação (local_data.json.1, .2)
+BACKUP_GENERATIONS = 2
+
+CHECKSUM_RE = re.compile(r',\n  "_checksum": "([0-9a-f]{64})"\n}\n?$')
+
+
+def write_synced(path, text):
+    """Gravar arquivo e forçar os dados para o disco (fsync)"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def sync_directory(path):
+    """fsync do diretório, para o rename sobreviver a uma queda de energia"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, text):
+    """Substituir um arquivo inteiro sem nunca deixar uma versão truncada"""
+    temp_file = path + '.tmp'
+    write_synced(temp_file, text)
+    os.replace(temp_file, path)
+    sync_directory(path)
+
+
+class JournalWriter:
+    """Anexa linhas JSON a um journal, na hora ou em lote (write-behind)
+
+    Com `flush_interval` (segundos) as linhas ficam num buffer e uma thread
+    em segundo plano grava tudo de uma vez (uma abertura + um fsync) no
+    máximo a cada `flush_interval` ou quando houver `flush_every` linhas.
+    Entradas com a mesma chave de `coalesce` dentro de um lote (ex.: o mesmo
+    contador regravado várias vezes) são gravadas uma única vez.
+    """
+
+    def __init__(self, path, flush_interval=None, flush_every=100, coalesce=None):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self.coalesce = coalesce
+        # Protege o arquivo (flush, compactação e rotação)
+        self.lock = threading.RLock()
+        self.cond = threading.Condition()
+        self.pending = []
+        self.pending_since = None
+        self.thread = None
+        self.closed = False
+        self.metrics = {'writes': 0, 'flushes': 0, 'lines_written': 0, 'coalesced': 0,
+                        'last_flush_ms': 0.0, 'max_flush_ms': 0.0, 'total_flush_ms': 0.0}
+
+    def write(self, entry):
+        """Registrar uma entrada (serializada agora, gravada agora ou no próximo lote)"""
+        line = json.dumps(entry, ensure_ascii=False, default=encode_value) + '\n'
+        key = self.coalesce(entry) if self.coalesce else None
+        self.metrics['writes'] += 1
+        if not self.flush_interval:
+            with self.lock:
+                self._write_lines([line])
+            return
+        with self.cond:
+            if not self.pending:
+                self.pending_since = time.monotonic()
+            self.pending.append((key, line))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='journal-writer', daemon=True)
+                self.thread.start()
+            self.cond.notify()
+
+    def _take(self):
+        with self.cond:
+            batch, self.pending = self.pending, []
+        if not batch:
+            return []
+        # Entradas com chave: só a última de cada chave é gravada
+        last = {key: index for index, (key, _) in enumerate(batch) if key is not None}
+        lines = [line for index, (key, line) in enumerate(batch) if key is None or last[key] == index]
+        self.metrics['coalesced'] += len(batch) - len(lines)
+        return lines
+
+    def _write_lines(self, lines, sync=False):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.writelines(lines)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        self.metrics['lines_written'] += len(lines)
+
+    def flush(self):
+        """Gravar agora tudo o que está no buffer (encerramento, emergências)"""
+        with self.lock:
+            lines = self._take()
+            if not lines:
+                return 0
+            start = time.perf_counter()
+            try:
+                self._write_lines(lines, sync=True)
+            except OSError:
+                # Devolver ao buffer para a próxima tentativa
+                with self.cond:
+                    self.pending[:0] = [(None, line) for line in lines]
+                raise
+            elapsed = (time.perf_counter() - start) * 1000
+        metrics = self.metrics
+        metrics['flushes'] += 1
+        metrics['last_flush_ms'] = elapsed
+        metrics['max_flush_ms'] = max(metrics['max_flush_ms'], elapsed)
+        metrics['total_flush_ms'] += elapsed
+        return len(lines)
+
+    def discard(self):
+        """Descartar o buffer (entradas já incluídas num snapshot novo)"""
+        with self.cond:
+            self.pending = []
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if self.closed and not self.pending:
+                    return
+                deadline = self.pending_since + self.flush_interval
+                while len(self.pending) < self.flush_every and not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"❌ Erro ao gravar journal {self.path}: {e}")
+                time.sleep(self.flush_interval)
+
+    def close(self):
+        """Gravar o buffer e encerrar a thread de gravação"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        self.flush()
+
+    def stats(self):
+        """Métricas: gravações, lotes, linhas coalescidas e duração dos flushes"""
+        stats = dict(self.metrics, pending=len(self.pending))
+        stats['avg_flush_ms'] = stats['total_flush_ms'] / stats['flushes'] if stats['flushes'] else 0.0
+        return stats
+
+
+def read_journal(journal_file, repair=False):
+    """Ler registros do journal, ignorando uma última linha incompleta
+
+    Com `repair`, o trecho incompleto é cortado do arquivo para que os
+    próximos registros não fiquem depois de uma linha inválida.
+    """
+    good_size = 0
+    damaged = False
+    with open(journal_file, 'rb') as f:
+        for line in f:
+            try:
+                record = json.loads(line) if line.strip() else None
+            except ValueError:
+                # Escrita interrompida (app finalizado no meio do append)
+                print("⚠️ Registro incompleto no journal ignorado")
+                damaged = True
+                break
+            if not line.endswith(b'\n'):
+                # Registro completo sem a quebra de linha: descartado como incompleto
+                damaged = True
+                break
+            good_size += len(line)
+            if record is not None:
+                yield record
+    if repair and damaged:
+        with open(journal_file, 'r+b') as f:
+            f.truncate(good_size)
+
+
+def encode_snapshot(data, seq):
+    """Texto do snapshot: JSON com `_journal_seq` e `_checksum` do conteúdo"""
+    body = json.dumps(dict(data, _journal_seq=seq), indent=2, ensure_ascii=False, default=encode_value)
+    checksum = hashlib.sha256(body.encode('utf-8')).hexdigest()
+    return body[:-2] + f',\n  "_checksum": "{checksum}"\n}}\n'
+
+
+def decode_snapshot(text):
+    """(dados, seq) de um snapshot; ValueError se truncado ou corrompido
+
+    Snapshots antigos, sem checksum, são aceitos se forem JSON válido.
+    """
+    match = CHECKSUM_RE.search(text)
+    if match:
+        body = text[:match.start()] + '\n}'
+        if hashlib.sha256(body.encode('utf-8')).hexdigest() != match.group(1):
+            raise ValueError("checksum não confere")
+        data = json.loads(body)
+    else:
+        data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("snapshot não é um objeto JSON")
+    data.pop('_checksum', None)
+    return data, data.pop('_journal_seq', 0)
+
+
+def record_date(record):
+    """Data principal de um registro (varia conforme a coleção)"""
+    for field in DATE_FIELDS:
+        if record.get(field):
+            return str(record[field])
+    return None
+
+
+def record_email(record):
+    """Email associado a um registro (autor, denunciante, visitante)"""
+    if record.get('email'):
+        return record['email']
+    if record.get('reporter_email'):
+        return record['reporter_email']
+    reporter = record.get('reporter')
+    if isinstance(reporter, dict):
+        return reporter.get('email')
+    return None
+
+
+def record_matches(record, status=None, email=None, since=None, until=None):
+    """Verificar se o registro atende aos filtros de consulta"""
+    if status is not None and record.get('status') != status:
+        return False
+    if email is not None and record_email(record) != email:
+        return False
+    if since is not None or until is not None:
+        date = record_date(record)
+        if date is None:
+            return False
+        if since is not None and date < since:
+            return False
+        if until is not None and date > until:
+            return False
+    return True
+
+
+def apply_record(data, record):
+    """Aplicar um registro do journal ao dicionário de dados"""
+    op = record.get('op')
+    collection = record.get('collection')
+
+    if op == 'append':
+        data.setdefault(collection, []).append(record['value'])
+    elif op == 'extend':
+        data.setdefault(collection, []).extend(record['values'])
+    elif op == 'put':
+        data.setdefault(collection, {})[record['key']] = record['value']
+    elif op == 'update':
+        match = record.get('match', {})
+        for item in data.get(collection, []):
+            if all(item.get(k) == v for k, v in match.items()):
+                item.update(record['fields'])
+    else:
+        raise ValueError(f"Operação desconhecida no journal: {op}")
+
+
+def convert_records(data, record_types):
+    """Converter os itens das coleções em lista para as classes de registro"""
+    for collection, cls in record_types.items():
+        items = data.get(collection)
+        if isinstance(items, list):
+            data[collection] = [item if isinstance(item, Record) else cls.from_dict(item) for item in items]
+    return data
+
+
+def query_status(status, record_types):
+    """Status do filtro na forma canônica quando os registros usam enums"""
+    return Status.parse(status) if record_types and status is not None else status
+
+
+class JournalStore:
+    """Snapshot + journal de alterações (uma linha JSON por mutação)"""
+
+    def __init__(self, data_file, journal_file=None, compact_every=500, record_types=None,
+                 flush_interval=None, flush_every=100):
+        self.data_file = data_file
+        self.journal_file = journal_file or os.path.splitext(data_file)[0] + '.journal'
+        self.compact_every = compact_every
+        self.record_types = record_types or {}
+        # flush_interval (s): gravação do journal em lote numa thread (write-behind)
+        self.writer = JournalWriter(self.journal_file, flush_interval, flush_every, coalesce=self._coalesce_key)
+        self.journal_records = 0
+        self.seq = 0
+        self.data = None
+
+    @staticmethod
+    def _generation(path, generation):
+        return f'{path}.{generation}' if generation else path
+
+    def _load_snapshot(self):
+        """(dados, seq, geração) do snapshot válido mais recente"""
+        found = False
+        candidates = [(self._generation(self.data_file, g), g) for g in range(BACKUP_GENERATIONS + 1)]
+        if not os.path.exists(self.data_file):
+            # Interrupção entre a rotação e o rename: o temporário (com fsync) é o mais novo
+            candidates.insert(0, (self.data_file + '.tmp', 0))
+        for snapshot_file, generation in candidates:
+            if not os.path.exists(snapshot_file):
+                continue
+            found = True
+            try:
+                with open(snapshot_file, 'r', encoding='utf-8') as f:
+                    data, seq = decode_snapshot(f.read())
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Snapshot {snapshot_file} inválido ({e}) - tentando a geração anterior")
+                continue
+            if snapshot_file.endswith('.tmp'):
+                # Concluir a compactação interrompida
+                os.replace(snapshot_file, self.data_file)
+            elif generation:
+                print(f"♻️ Dados recuperados da geração anterior ({snapshot_file})")
+            return data, seq, generation
+        if found:
+            print("❌ Nenhum snapshot válido - reconstruindo apenas a partir dos journals")
+        return None, 0, BACKUP_GENERATIONS
+
+    def load(self):
+        """Carregar snapshot e reaplicar o journal (None se não houver dados)
+
+        Se o snapshot atual estiver corrompido, usa a geração anterior e
+        reaplica os journals guardados junto com ela.
+        """
+        self.writer.flush()
+        data, self.seq, generation = self._load_snapshot()
+
+        self.journal_records = 0
+        # Journals do mais antigo (da geração usada) até o atual
+        journals = [self._generation(self.journal_file, g) for g in range(generation, -1, -1)]
+        for journal_file in journals:
+            if not os.path.exists(journal_file):
+                continue
+            if data is None:
+                data = {}
+            for record in read_journal(journal_file, repair=journal_file == self.journal_file):
+                # Registros com seq <= _journal_seq já estão no snapshot
+                if record.get('seq', 0) <= self.seq:
+                    continue
+                apply_record(data, record)
+                self.seq = record['seq']
+                self.journal_records += 1
+
+        if data is not None:
+            convert_records(data, self.record_types)
+        self.data = data
+        # Recuperado de uma geração anterior: gravar logo um snapshot íntegro
+        if data is not None and (generation or self.journal_records >= self.compact_every):
+            self.compact()
+        return data
+
+    def _log(self, record):
+        """Aplicar registro em memória e anexá-lo ao journal"""
+        cls = self.record_types.get(record['collection'])
+        if cls is not None and record['op'] == 'append' and not isinstance(record['value'], Record):
+            record['value'] = cls.from_dict(record['value'])
+        elif cls is not None and record['op'] == 'extend':
+            record['values'] = [value if isinstance(value, Record) else cls.from_dict(value)
+                                for value in record['values']]
+        apply_record(self.data, record)
+        self.seq += 1
+        record['seq'] = self.seq
+        self.writer.write(record)
+        self.journal_records += 1
+        if self.journal_records >= self.compact_every:
+            self.compact()
+
+    @staticmethod
+    def _coalesce_key(record):
+        """Gravações da mesma chave (ex.: contadores do painel) se substituem"""
+        if record['op'] == 'put':
+            return record['collection'], record['key']
+        return None
+
+    def flush(self):
+        """Gravar no disco as alterações ainda no buffer do journal"""
+        return self.writer.flush()
+
+    def flush_stats(self):
+        return self.writer.stats()
+
+    def close(self):
+        self.writer.close()
+
+    def append(self, collection, value):
+        """Adicionar item a uma coleção em lista (reports, notices, ...)"""
+        self._log({'op': 'append', 'collection': collection, 'value': value})
+
+    def append_many(self, collection, values):
+        """Adicionar vários itens numa única linha do journal (importação em lote)"""
+        self._log({'op': 'extend', 'collection': collection, 'values': list(values)})
+
+    def put(self, collection, key, value):
+        """Gravar item em uma coleção indexada por chave (users)"""
+        self._log({'op': 'put', 'collection': collection, 'key': key, 'value': value})
+
+    def update(self, collection, match, fields):
+        """Atualizar campos dos itens que combinam com `match`"""
+        self._log({'op': 'update', 'collection': collection, 'match': match, 'fields': fields})
+
+    def save(self, data):
+        """Gravar snapshot completo dos dados"""
+        self.data = convert_records(data, self.record_types)
+        self.compact()
+
+    def query(self, collection, status=None, email=None, since=None, until=None,
+              limit=None, offset=0, newest_first=False):
+        """Consultar registros de uma coleção com filtros e paginação"""
+        items = (self.data or {}).get(collection, [])
+        status = query_status(status, self.record_types)
+        if newest_first:
+            items = reversed(items)
+        matches = (item for item in items if record_matches(item, status, email, since, until))
+        stop = None if limit is None else offset + limit
+        return list(islice(matches, offset, stop))
+
+    def scan(self, collection, after=None, limit=None, status=None, email=None, since=None, until=None):
+        """Registros após o cursor, em ordem de gravação: [(cursor, registro)]
+
+        O cursor é a posição na coleção (as coleções em lista só crescem),
+        então uma leitura interrompida continua do mesmo ponto.
+        """
+        items = (self.data or {}).get(collection, [])
+        status = query_status(status, self.record_types)
+        start = 0 if after is None else after + 1
+        matches = ((index, items[index]) for index in range(start, len(items))
+                   if record_matches(items[index], status, email, since, until))
+        return list(islice(matches, limit))
+
+    def count(self, collection, status=None, email=None, since=None, until=None):
+        """Contar registros de uma coleção que atendem aos filtros"""
+        items = (self.data or {}).get(collection, [])
+        if status is None and not (email or since or until):
+            return len(items)
+        status = query_status(status, self.record_types)
+        return sum(1 for item in items if record_matches(item, status, email, since, until))
+
+    def compact(self):
+        """Consolidar o journal em um novo snapshot (gravação atômica)
+
+        O novo snapshot é gravado num arquivo temporário com fsync; o atual e
+        seu journal passam a ser a geração 1 (apenas renomeações) e só então
+        o temporário assume o nome definitivo. Uma interrupção em qualquer
+        ponto deixa um snapshot íntegro + journals que o completam.
+        """
+        with self.writer.lock:
+            # O snapshot já contém o que estava no buffer do journal
+            self.writer.discard()
+            temp_file = self.data_file + '.tmp'
+            write_synced(temp_file, encode_snapshot(self.data, self.seq))
+            for generation in range(BACKUP_GENERATIONS, 0, -1):
+                for path in (self.data_file, self.journal_file):
+                    older = self._generation(path, generation - 1)
+                    newer = self._generation(path, generation)
+                    if os.path.exists(older):
+                        os.replace(older, newer)
+                    elif os.path.exists(newer):
+                        # Geração sem journal: não reaproveitar o de uma geração mais antiga
+                        os.remove(newer)
+            os.replace(temp_file, self.data_file)
+            sync_directory(self.data_file)
+        self.journal_records = 0
+
+
+class _LazyCollections(dict):
+    """Dicionário de dados que carrega cada coleção do SQLite no primeiro acesso"""
+
+    def __init__(self, store):
+        super().__init__()
+        self._store = store
+
+    def __missing__(self, collection):
+        value = self._store.load_collection(collection)
+        if value is None:
+            raise KeyError(collection)
+        self[collection] = value
+        return value
+
+    def __contains__(self, collection):
+        return dict.__contains__(self, collection) or self._store.has_collection(collection)
+
+    def get(self, collection, default=None):
+        try:
+            return self[collection]
+        except KeyError:
+            return default
+
+
+class SQLiteStore:
+    """Backend SQLite: uma tabela por coleção, modo WAL"""
+
+    def __init__(self, db_file, legacy_file=None, record_types=None):
+        self.db_file = db_file
+        self.legacy_file = legacy_file
+        self.record_types = record_types or {}
+        self.data = None
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        for collection in KEYED_COLLECTIONS:
+            self._create_table(collection, keyed=True)
+        for collection in LIST_COLLECTIONS:
+            self._create_table(collection, keyed=False)
+        self.conn.commit()
+
+    def _create_table(self, collection, keyed):
+        """Criar tabela e índices de uma coleção"""
+        if not collection.isidentifier():
+            raise ValueError(f"Nome de coleção inválido: {collection}")
+        key_column = 'key TEXT PRIMARY KEY' if keyed else 'seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT'
+        self.conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {collection} '
+            f'({key_column}, status TEXT, date TEXT, email TEXT, doc TEXT NOT NULL)'
+        )
+        columns = ('status', 'date', 'email') if keyed else ('id', 'status', 'date', 'email')
+        for column in columns:
+            self.conn.execute(
+                f'CREATE INDEX IF NOT EXISTS idx_{collection}_{column} ON {collection}({column})'
+            )
+
+    def _tables(self):
+        """Nomes das tabelas de coleções existentes"""
+        rows = self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        return {name for (name,) in rows if name not in ('meta', 'sqlite_sequence')}
+
+    def _is_keyed(self, collection):
+        columns = self.conn.execute(f'PRAGMA table_info({collection})').fetchall()
+        return any(column[1] == 'key' for column in columns)
+
+    def _get_meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    @staticmethod
+    def _columns(record):
+        status = record.get('status')
+        return (
+            None if status is None else str(status),
+            record_date(record),
+            record_email(record),
+            json.dumps(record, ensure_ascii=False, default=encode_value)
+        )
+
+    def load(self):
+        """Preparar dados (migrando o JSON antigo na primeira execução)"""
+        if self._get_meta('initialized') is None:
+            if self.legacy_file and os.path.exists(self.legacy_file):
+                self.migrate_from_json(self.legacy_file)
+            else:
+                return None
+        self.data = _LazyCollections(self)
+        return self.data
+
+    def migrate_from_json(self, legacy_file):
+        """Importar local_data.json (e seu journal) para o SQLite, uma única vez"""
+        legacy_data = JournalStore(legacy_file).load() or {}
+        self.save(legacy_data)
+        self._set_meta('migrated_from', legacy_file)
+        self.conn.commit()
+        print(f"✅ Dados migrados de {legacy_file} para {self.db_file}")
+
+    def has_collection(self, collection):
+        return collection in self._tables()
+
+    def load_collection(self, collection):
+        """Carregar uma coleção inteira (None se não existir)"""
+        if not self.has_collection(collection):
+            return None
+        if self._is_keyed(collection):
+            rows = self.conn.execute(f'SELECT key, doc FROM {collection}')
+            return {key: json.loads(doc) for key, doc in rows}
+        rows = self.conn.execute(f'SELECT doc FROM {collection} ORDER BY seq')
+        return self._decode(collection, rows)
+
+    def _decode(self, collection, rows):
+        """Documentos JSON -> registros (ou dicionários, sem classe para a coleção)"""
+        cls = self.record_types.get(collection)
+        if cls is None:
+            return [json.loads(doc) for (doc,) in rows]
+        return [cls.from_dict(json.loads(doc)) for (doc,) in rows]
+
+    def _apply(self, record):
+        """Refletir a alteração na coleção em memória, se já carregada"""
+        if self.data is None:
+            return
+        if isinstance(self.data, _LazyCollections) and not dict.__contains__(self.data, record['collection']):
+            return
+        apply_record(self.data, record)
+
+    def append(self, collection, value):
+        """Adicionar item a uma coleção em lista (reports, notices, ...)"""
+        if not self.has_collection(collection):
+            self._create_table(collection, keyed=False)
+        self.conn.execute(
+            f'INSERT INTO {collection} (id, status, date, email, doc) VALUES (?, ?, ?, ?, ?)',
+            (value.get('id'),) + self._columns(value)
+        )
+        self.conn.commit()
+        cls = self.record_types.get(collection)
+        if cls is not None and not isinstance(value, Record):
+            value = cls.from_dict(value)
+        self._apply({'op': 'append', 'collection': collection, 'value': value})
+
+    def append_many(self, collection, values):
+        """Adicionar vários itens numa única transação (importação em lote)"""
+        values = list(values)
+        if not self.has_collection(collection):
+            self._create_table(collection, keyed=False)
+        with self.conn:
+            self.conn.executemany(
+                f'INSERT INTO {collection} (id, status, date, email, doc) VALUES (?, ?, ?, ?, ?)',
+                [(value.get('id'),) + self._columns(value) for value in values]
+            )
+        cls = self.record_types.get(collection)
+        if cls is not None:
+            values = [value if isinstance(value, Record) else cls.from_dict(value) for value in values]
+        self._apply({'op': 'extend', 'collection': collection, 'values': values})
+
+    def put(self, collection, key, value):
+        """Gravar item em uma coleção indexada por chave (users)"""
+        if not self.has_collection(collection):
+            self._create_table(collection, keyed=True)
+        self.conn.execute(
+            f'INSERT OR REPLACE INTO {collection} (key, status, date, email, doc) VALUES (?, ?, ?, ?, ?)',
+            (key,) + self._columns(value)
+        )
+        self.conn.commit()
+        self._apply({'op': 'put', 'collection': collection, 'key': key, 'value': value})
+
+    def update(self, collection, match, fields):
+        """Atualizar campos dos itens que combinam com `match`"""
+        if 'id' in match:
+            rows = self.conn.execute(f'SELECT seq, doc FROM {collection} WHERE id = ?', (match['id'],))
+        else:
+            rows = self.conn.execute(f'SELECT seq, doc FROM {collection}')
+        cls = self.record_types.get(collection)
+        for seq, doc in rows.fetchall():
+            item = json.loads(doc) if cls is None else cls.from_dict(json.loads(doc))
+            if all(item.get(k) == v for k, v in match.items()):
+                item.update(fields)
+                self.conn.execute(
+                    f'UPDATE {collection} SET id = ?, status = ?, date = ?, email = ?, doc = ? WHERE seq = ?',
+                    (item.get('id'),) + self._columns(item) + (seq,)
+                )
+        self.conn.commit()
+        self._apply({'op': 'update', 'collection': collection, 'match': match, 'fields': fields})
+
+    def save(self, data):
+        """Regravar as coleções presentes em `data` (em uma transação)"""
+        with self.conn:
+            for collection, items in dict.items(data):
+                keyed = isinstance(items, dict)
+                if not self.has_collection(collection):
+                    self._create_table(collection, keyed)
+                self.conn.execute(f'DELETE FROM {collection}')
+                if keyed:
+                    self.conn.executemany(
+                        f'INSERT INTO {collection} (key, status, date, email, doc) VALUES (?, ?, ?, ?, ?)',
+                        [(key,) + self._columns(value) for key, value in items.items()]
+                    )
+                else:
+                    self.conn.executemany(
+                        f'INSERT INTO {collection} (id, status, date, email, doc) VALUES (?, ?, ?, ?, ?)',
+                        [(value.get('id'),) + self._columns(value) for value in items]
+                    )
+            self._set_meta('initialized', '1')
+        self.data = convert_records(data, self.record_types)
+
+    def _where(self, status, email, since, until):
+        clauses, params = [], []
+        if status is not None:
+            clauses.append('status = ?')
+            params.append(str(status))
+        if email is not None:
+            clauses.append('email = ?')
+            params.append(email)
+        if since is not None:
+            clauses.append('date >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('date <= ?')
+            params.append(until)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def query(self, collection, status=None, email=None, since=None, until=None,
+              limit=None, offset=0, newest_first=False):
+        """Consultar registros de uma coleção em lista com filtros e paginação"""
+        if not self.has_collection(collection):
+            return []
+        where, params = self._where(query_status(status, self.record_types), email, since, until)
+        order = 'DESC' if newest_first else 'ASC'
+        rows = self.conn.execute(
+            f'SELECT doc FROM {collection}{where} ORDER BY seq {order} LIMIT ? OFFSET ?',
+            params + [-1 if limit is None else limit, offset]
+        )
+        return self._decode(collection, rows)
+
+    def scan(self, collection, after=None, limit=None, status=None, email=None, since=None, until=None):
+        """Registros após o cursor (seq da linha), em ordem de gravação: [(cursor, registro)]"""
+        if not self.has_collection(collection):
+            return []
+        where, params = self._where(query_status(status, self.record_types), email, since, until)
+        where += ' AND seq > ?' if where else ' WHERE seq > ?'
+        rows = self.conn.execute(
+            f'SELECT seq, doc FROM {collection}{where} ORDER BY seq LIMIT ?',
+            params + [-1 if after is None else after, -1 if limit is None else limit]
+        ).fetchall()
+        return list(zip((seq for seq, _ in rows), self._decode(collection, [(doc,) for _, doc in rows])))
+
+    def count(self, collection, status=None, email=None, since=None, until=None):
+        """Contar registros de uma coleção que atendem aos filtros"""
+        if not self.has_collection(collection):
+            return 0
+        where, params = self._where(query_status(status, self.record_types), email, since, until)
+        return self.conn.execute(f'SELECT COUNT(*) FROM {collection}{where}', params).fetchone()[0]
+
+    def flush(self):
+        """Cada alteração já é confirmada na hora (WAL); nada no buffer"""
+        return 0
+
+    def flush_stats(self):
+        return {}
+
+    def close(self):
+        self.conn.close()
+
+
+def create_store(data_file, backend=None, record_types=None, flush_interval=None, flush_every=100):
+    """Criar o backend de armazenamento (LOCAL_STORAGE_BACKEND=journal|sqlite)
+
+    Com `record_types` ({coleção: classe}) os registros das coleções em lista
+    ficam em memória como objetos de `records` em vez de dicionários. Com
+    `flush_interval` o journal é gravado em lote numa thread (write-behind).
+    """
+    backend = backend or os.environ.get('LOCAL_STORAGE_BACKEND', 'journal')
+    if backend == 'sqlite':
+        return SQLiteStore(os.path.splitext(data_file)[0] + '.db', legacy_file=data_file,
+                           record_types=record_types)
+    if backend == 'journal':
+        return JournalStore(data_file, record_types=record_types,
+                            flush_interval=flush_interval, flush_every=flush_every)
+    raise ValueError(f"Backend de armazenamento desconhecido: {backend}")
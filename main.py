@@ -5,6 +5,8 @@ Funcionalidades: Autenticação, Denúncias, Avisos, Vigilância, etc.
 """
 
 import os
+import time
+import threading
 # Configurações para ambiente Replit com VNC
 if not os.environ.get('DISPLAY'):
     os.environ['DISPLAY'] = ':0'
@@ -15,7 +17,10 @@ os.environ['KIVY_WINDOW'] = 'sdl2'
 os.environ['MESA_GL_VERSION_OVERRIDE'] = '3.3'
 os.environ['MESA_GLSL_VERSION_OVERRIDE'] = '330'
 
+from lazy_imports import lazy_module, lazy_class, module_available
+
 # Adicionar configurações para evitar problemas de OpenGL - imports opcionais
+# Só o necessário para definir as classes; widgets são importados na primeira tela que os usa
 try:
     import kivy
     kivy.require('2.1.0')
@@ -27,63 +32,55 @@ try:
     Config.set('graphics', 'double', '0')
     Config.set('input', 'mouse', 'mouse,multitouch_on_demand')
 
-    from kivy.app import App
-    from kivy.uix.screenmanager import ScreenManager, Screen
-    from kivy.uix.boxlayout import BoxLayout
-    from kivy.uix.label import Label
-    from kivy.uix.button import Button
-    from kivy.uix.textinput import TextInput
-    from kivy.uix.spinner import Spinner
-    from kivy.uix.popup import Popup
-    from kivy.uix.image import Image
     from kivy.clock import Clock
     from kivymd.app import MDApp
     from kivymd.uix.screen import MDScreen
     from kivymd.uix.boxlayout import MDBoxLayout
-    from kivymd.uix.button import MDRaisedButton, MDIconButton
-    from kivymd.uix.textfield import MDTextField
-    from kivymd.uix.card import MDCard
-    from kivymd.uix.list import MDList, OneLineListItem
-    from kivymd.uix.selectioncontrol import MDSwitch
-    from kivymd.uix.label import MDLabel
-    from kivymd.uix.navigationdrawer import MDNavigationDrawer
-    from kivymd.uix.toolbar import MDTopAppBar
-    from kivymd.uix.dialog import MDDialog
-    from kivymd.uix.button import MDFlatButton
-    from kivymd.uix.tab import MDTabsBase, MDTabs
-    from kivymd.uix.floatlayout import MDFloatLayout
     
     KIVY_AVAILABLE = True
 except ImportError:
     # Fallbacks para quando Kivy não está disponível
     kivy = None
     Config = None
-    App = object
-    ScreenManager = Screen = BoxLayout = Label = Button = object
-    TextInput = Spinner = Popup = Image = Clock = object
+    Clock = object
     MDApp = MDScreen = MDBoxLayout = object
-    MDRaisedButton = MDIconButton = MDTextField = object
-    MDCard = MDList = OneLineListItem = MDSwitch = object
-    MDLabel = MDNavigationDrawer = MDTopAppBar = object
-    MDDialog = MDFlatButton = MDTabsBase = MDTabs = object
-    MDFloatLayout = object
     
     KIVY_AVAILABLE = False
 
-try:
-    import firebase_admin
-    from firebase_admin import credentials, auth as firebase_auth, firestore, messaging
-    import pyrebase
-    FIREBASE_AVAILABLE = True
-except ImportError:
-    firebase_admin = None
-    credentials = firebase_auth = firestore = messaging = object
-    pyrebase = None
-    FIREBASE_AVAILABLE = False
+MDRaisedButton = lazy_class('kivymd.uix.button', 'MDRaisedButton')
+MDIconButton = lazy_class('kivymd.uix.button', 'MDIconButton')
+MDFlatButton = lazy_class('kivymd.uix.button', 'MDFlatButton')
+MDTextField = lazy_class('kivymd.uix.textfield', 'MDTextField')
+MDCard = lazy_class('kivymd.uix.card', 'MDCard')
+MDSwitch = lazy_class('kivymd.uix.selectioncontrol', 'MDSwitch')
+MDLabel = lazy_class('kivymd.uix.label', 'MDLabel')
+MDTopAppBar = lazy_class('kivymd.uix.toolbar', 'MDTopAppBar')
+MDDialog = lazy_class('kivymd.uix.dialog', 'MDDialog')
+
+# Firebase: importado só na inicialização em segundo plano (FirebaseManager.start)
+FIREBASE_AVAILABLE = module_available('firebase_admin') and module_available('pyrebase')
+firebase_admin = lazy_module('firebase_admin')
+credentials = lazy_module('firebase_admin.credentials')
+firestore = lazy_module('firebase_admin.firestore')
+messaging = lazy_module('firebase_admin.messaging')
+pyrebase = lazy_module('pyrebase')
 
 from datetime import datetime
 import json
 
+from firebase_io import IOExecutor, BatchWriter, FirestorePageSource, FIRESTORE_BATCH_LIMIT, PAGE_SIZE, query_page
+from offline_queue import Outbox, OutboxSyncer, OfflineError
+from profile_cache import ProfileCache, LastLoginWriter
+from emergency_alerts import AlertPipeline, FCMTransport
+from visitor_registry import VisitorRegistry, FirestoreVisitorBackend
+from live_views import LiveQueries, document_item
+from query_cache import QueryCache, query_key, estimate_size
+from exporter import export_firestore
+from record_ids import new_id
+from permissions import user_has_permission
+from lazy_screens import LazyScreenManager
+from virtual_list import VirtualList, ListSource, IconTextRow, ActionTextRow
+
 
 class FirebaseManager:
     """Gerenciador do Firebase para autenticação e banco de dados"""
@@ -104,10 +101,72 @@ class FirebaseManager:
         self.db = None
         self.current_user = None
         
-        self.initialize_firebase()
+        # Chamadas de rede rodam fora da thread da UI
+        self.io = IOExecutor(max_workers=4, schedule=Clock.schedule_once if KIVY_AVAILABLE else None)
+        
+        # Gravações ficam no outbox local até o Firestore confirmar (arquivo aberto em start)
+        self.outbox = Outbox('outbox.db')
+        self.sync = OutboxSyncer(self.outbox, self._commit_outbox_batch, batch_size=FIRESTORE_BATCH_LIMIT)
+        
+        # Perfis em cache para logins repetidos; last_login gravado em segundo plano
+        self.profiles = ProfileCache(ttl=600)
+        self.last_login = LastLoginWriter(
+            self._commit_last_login,
+            submit=lambda flush: self.io.submit('users.last_login', flush)
+        )
+        
+        # Inicialização do Firebase adiada: roda em segundo plano após o primeiro quadro (start)
+        self.init_lock = threading.Lock()
+        self.ready = threading.Event()
+        self.init_thread = None
+        
+        # Visitantes presentes (carregados ao abrir a tela de visitantes)
+        self.visitors = VisitorRegistry(FirestoreVisitorBackend(self))
+        
+        # Resultados de consultas em cache; gravações e alterações recebidas descartam a coleção
+        self.cache = QueryCache()
+        
+        # Listeners em tempo real, compartilhados entre as telas abertas
+        self.live = LiveQueries(lambda: self.db, schedule=Clock.schedule_once if KIVY_AVAILABLE else None,
+                                on_change=self.cache.invalidate)
+        
+        # Alertas de emergência: pool próprio, Firestore + push por papel (FCM quando conectado)
+        self.alerts = AlertPipeline(
+            self.outbox, self._write_alert, resolve_transport=self._alert_transport,
+            schedule=Clock.schedule_once if KIVY_AVAILABLE else None
+        )
+    
+    def start(self, data_dir=None):
+        """Inicializar o Firebase e o envio do outbox numa thread própria (uma única vez)
+        
+        `data_dir`: pasta de dados do app (App.user_data_dir), onde fica o outbox.
+        """
+        with self.init_lock:
+            if self.init_thread is None:
+                self.outbox.open(os.path.join(data_dir, 'outbox.db') if data_dir else None)
+                self.init_thread = threading.Thread(target=self._start, name='firebase-init', daemon=True)
+                self.init_thread.start()
+    
+    def _start(self):
+        started = time.perf_counter()
+        try:
+            self.initialize_firebase()
+            self.sync.start()
+        finally:
+            self.ready.set()
+        print(f"⏱️ Inicialização do Firebase concluída em {(time.perf_counter() - started) * 1000:.0f} ms (segundo plano)")
+    
+    def wait_ready(self, timeout=30):
+        """Aguardar a inicialização (fora da thread da UI); inicia agora se ainda não começou"""
+        self.start()
+        return self.ready.wait(timeout)
     
     def initialize_firebase(self):
         """Inicializa o Firebase"""
+        with self.init_lock:
+            self._initialize_firebase()
+    
+    def _initialize_firebase(self):
         try:
             # Verificar se Firebase está disponível
             if not FIREBASE_AVAILABLE:
@@ -151,6 +210,10 @@ class FirebaseManager:
                         return
             
             self.db = firestore.client()
+            # Conectado de novo: o que ficou em cache pode ter mudado no servidor
+            self.cache.clear()
+            # Push real sempre que o Firestore estiver disponível (início ou reconexão)
+            self.alerts.transport = FCMTransport(messaging)
             print("Firebase inicializado com sucesso!")
             
         except Exception as e:
@@ -161,6 +224,7 @@ class FirebaseManager:
     
     def sign_up(self, email, password, user_data):
         """Cadastrar novo usuário"""
+        self.wait_ready()
         try:
             if self.auth:
                 user = self.auth.create_user_with_email_and_password(email, password)
@@ -190,30 +254,31 @@ class FirebaseManager:
     
     def sign_in(self, email, password):
         """Fazer login"""
+        self.wait_ready()
         try:
             if self.auth:
                 user = self.auth.sign_in_with_email_and_password(email, password)
                 user_id = user['localId']
                 
-                # Buscar dados do usuário no Firestore
+                # Buscar dados do usuário (cache local ou Firestore)
                 if self.db:
-                    user_doc = self.db.collection('users').document(user_id).get()
-                    if user_doc.exists:
-                        user_data = user_doc.to_dict()
-                        
-                        # Verificar se usuário está ativo
-                        if user_data and not user_data.get('active', True):
-                            return {'success': False, 'error': 'Usuário banido do sistema'}
-                        
-                        # Atualizar último login
-                        self.db.collection('users').document(user_id).update({
-                            'last_login': datetime.now()
-                        })
-                        
-                        self.current_user = user_data
-                        return {'success': True, 'user': user, 'user_data': user_data}
-                    else:
-                        return {'success': False, 'error': 'Dados do usuário não encontrados'}
+                    user_data = self.profiles.get(user_id)
+                    if user_data is None:
+                        user_doc = self.db.collection('users').document(user_id).get()
+                        if not user_doc.exists:
+                            return {'success': False, 'error': 'Dados do usuário não encontrados'}
+                        user_data = user_doc.to_dict() or {}
+                        self.profiles.put(user_id, user_data)
+                    
+                    # Verificar se usuário está ativo
+                    if not user_data.get('active', True):
+                        return {'success': False, 'error': 'Usuário banido do sistema'}
+                    
+                    # Atualizar último login (em segundo plano, agrupado)
+                    self.last_login.touch(user_id)
+                    
+                    self.current_user = user_data
+                    return {'success': True, 'user': user, 'user_data': user_data}
                 else:
                     self.current_user = {'email': email, 'user_type': 'aluno'}
                     return {'success': True, 'user': user, 'user_data': self.current_user}
@@ -233,6 +298,15 @@ class FirebaseManager:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    def _commit_last_login(self, pending):
+        """Gravar os horários de último login pendentes num único lote"""
+        if not self.db:
+            raise OfflineError('Firestore indisponível')
+        with BatchWriter(self.db) as writer:
+            for user_id, when in pending.items():
+                writer.update(self.db.collection('users').document(user_id),
+                              {'last_login': datetime.fromtimestamp(when)})
+    
     def sign_out(self):
         """Fazer logout"""
         self.current_user = None
@@ -244,21 +318,204 @@ class FirebaseManager:
     
     def has_permission(self, permission):
         """Verificar permissões do usuário"""
-        if not self.current_user:
-            return False
-            
-        user_type = self.current_user.get('user_type', 'aluno')
-        
-        permissions = {
-            'aluno': ['denunciar', 'ver_avisos', 'emergencia', 'ver_campanhas'],
-            'funcionario': ['denunciar', 'ver_avisos', 'emergencia', 'ver_campanhas', 
-                          'registrar_visitantes', 'adicionar_ocorrencias'],
-            'direcao': ['denunciar', 'ver_avisos', 'emergencia', 'ver_campanhas',
-                       'registrar_visitantes', 'adicionar_ocorrencias', 'criar_avisos',
-                       'ver_denuncias', 'cadastrar_campanhas', 'banir_usuarios', 'gerar_relatorios']
-        }
+        return user_has_permission(self.current_user, permission)
+    
+    def sign_in_async(self, email, password, callback=None):
+        """Fazer login em segundo plano; callback(result, error)"""
+        return self.io.submit('auth.sign_in', self.sign_in, email, password, callback=callback)
+    
+    def sign_up_async(self, email, password, user_data, callback=None):
+        """Cadastrar usuário em segundo plano; callback(result, error)"""
+        return self.io.submit('auth.sign_up', self.sign_up, email, password, user_data, callback=callback)
+    
+    def add_document(self, collection, data, callback=None):
+        """Gravar documento via outbox (salvo localmente antes da rede); callback(result, error)"""
+        return self.io.submit(f'{collection}.add', self.enqueue_document, collection, data, callback=callback)
+    
+    def enqueue_document(self, collection, data, key=None):
+        """Gravar no outbox (sem rede); `key` é o ID do documento no Firestore"""
+        key = self.outbox.enqueue(collection, data, key=key)
+        self.cache.invalidate(collection)
+        self.sync.notify()
+        return key
+    
+    def can_reconnect(self):
+        """Firebase configurado, mas indisponível no momento"""
+        return FIREBASE_AVAILABLE and bool(self.config.get("apiKey"))
+    
+    def _commit_outbox_batch(self, entries):
+        """Enviar um lote do outbox; a chave de idempotência é o ID do documento"""
+        if not self.db and self.can_reconnect():
+            self.initialize_firebase()
+        if not self.db:
+            raise OfflineError('Firestore indisponível')
+        with BatchWriter(self.db) as writer:
+            for entry in entries:
+                writer.set(self.db.collection(entry['collection']).document(entry['key']), entry['data'])
+        # Gravado no Firestore: leituras em cache feitas antes do envio ficaram velhas
+        for collection in {entry['collection'] for entry in entries}:
+            self.cache.invalidate(collection)
+    
+    def send_emergency_alert(self, alert_data, callback=None, started=None):
+        """Acionar alerta de emergência (gravado localmente antes de distribuir)"""
+        return self.alerts.trigger(alert_data, callback=callback, started=started)
+    
+    def _alert_transport(self):
+        """Transporte de push; tenta reconectar se ainda não houver"""
+        if not self.db and self.can_reconnect():
+            self.initialize_firebase()
+        return self.alerts.transport if self.db else None
+    
+    def _write_alert(self, key, alert_data):
+        if not self.db and self.can_reconnect():
+            self.initialize_firebase()
+        if not self.db:
+            raise OfflineError('Firestore indisponível')
+        self.db.collection('emergency_alerts').document(key).set(alert_data)
+    
+    def get_alert_stats(self):
+        """Latência dos alertas de emergência em relação à meta"""
+        return self.alerts.stats()
+    
+    def get_sync_stats(self):
+        """Profundidade do outbox e latência de envio"""
+        return self.sync.stats()
+    
+    def update_where(self, collection, field, value, fields, callback=None):
+        """Atualizar em segundo plano os documentos com field == value"""
+        return self.io.submit(f'{collection}.update', self._update_where, collection, field, value, fields,
+                              callback=callback)
+    
+    def _update_where(self, collection, field, value, fields):
+        return self._bulk_update_where(collection, field, [value], fields)
+    
+    def bulk_update_where(self, collection, field, values, fields, callback=None):
+        """Atualizar em lote os documentos cujo `field` está em `values`"""
+        return self.io.submit(f'{collection}.bulk_update', self._bulk_update_where, collection, field,
+                              list(values), fields, callback=callback)
+    
+    def _bulk_update_where(self, collection, field, values, fields):
+        if not self.db:
+            raise OfflineError('Firestore indisponível')
+        if collection == 'users' and 'active' in fields:
+            self.profiles.invalidate_emails(values)
+        writer = BatchWriter(self.db)
+        # Consultas 'in' aceitam no máximo 10 valores por vez
+        for start in range(0, len(values), 10):
+            chunk = values[start:start + 10]
+            query = self.db.collection(collection).where(field, 'in', chunk)
+            for doc in query.get():
+                writer.update(doc.reference, fields)
+        result = writer.commit()
+        self.cache.invalidate(collection)
+        return result
+    
+    def bulk_update_documents(self, collection, doc_ids, fields, callback=None):
+        """Atualizar em lote documentos conhecidos pelo ID"""
+        return self.io.submit(f'{collection}.bulk_update', self._bulk_update_documents, collection,
+                              list(doc_ids), fields, callback=callback)
+    
+    def _bulk_update_documents(self, collection, doc_ids, fields):
+        if not self.db:
+            raise OfflineError('Firestore indisponível')
+        if collection == 'users' and 'active' in fields:
+            for doc_id in doc_ids:
+                self.profiles.invalidate(doc_id)
+        writer = BatchWriter(self.db)
+        for doc_id in doc_ids:
+            writer.update(self.db.collection(collection).document(doc_id), fields)
+        result = writer.commit()
+        self.cache.invalidate(collection)
+        return result
+    
+    def set_users_active(self, emails, active, callback=None):
+        """Banir (active=False) ou reativar vários usuários de uma vez"""
+        return self.bulk_update_where('users', 'email', emails, {'active': active}, callback=callback)
+    
+    def checkout_visitors(self, visitor_ids, callback=None):
+        """Registrar a saída de vários visitantes de uma vez"""
+        fields = {'status': 'checked_out', 'check_out': datetime.now().isoformat()}
+        return self.bulk_update_documents('visitors', visitor_ids, fields, callback=callback)
+    
+    def archive_notices(self, notice_ids, callback=None):
+        """Arquivar vários avisos de uma vez"""
+        return self.bulk_update_documents('notices', notice_ids, {'active': False}, callback=callback)
+    
+    def query_page(self, collection, order_by, limit=PAGE_SIZE, start_after=None, descending=False,
+                   where=(), fields=None):
+        """Uma página ordenada de registros: (itens, cursor da próxima página ou None)
+        
+        Roda na thread chamadora; `fields` baixa só as colunas necessárias.
+        Páginas já lidas vêm do cache até a coleção ser alterada.
+        """
+        if not self.db:
+            raise OfflineError('Firestore indisponível')
+        
+        def load():
+            docs, cursor = query_page(self.db, collection, order_by, limit, start_after=start_after,
+                                      descending=descending, where=where, fields=fields)
+            return [document_item(collection, doc) for doc in docs], cursor
+        
+        key = query_key(collection, where, order_by, descending, limit, fields, cursor=start_after)
+        items, cursor = self.cache.get_or_load(key, load, size=lambda page: estimate_size(page[0]))
+        return list(items), cursor
+    
+    def page_source(self, collection, order_by, descending=False, where=(), fields=None, prefetch=True):
+        """Fonte paginada para VirtualList: uma leitura pequena por página, próxima página antecipada"""
+        return FirestorePageSource(
+            self.io,
+            lambda cursor, limit: self.query_page(collection, order_by, limit, start_after=cursor,
+                                                  descending=descending, where=where, fields=fields),
+            name=f'{collection}.page',
+            prefetch=prefetch
+        )
+    
+    def export_collection(self, collection, path, status=None, since=None, until=None, callback=None, **options):
+        """Exportar uma coleção do Firestore para CSV/JSONL (.gz opcional) em segundo plano
         
-        return permission in permissions.get(user_type, [])
+        Lê uma página por vez e grava à medida que lê; uma exportação interrompida
+        continua do último cursor salvo. callback(estatísticas, error)
+        """
+        return self.io.submit(f'{collection}.export', self._export_collection, collection, path,
+                              status=status, since=since, until=until, callback=callback, **options)
+    
+    def _export_collection(self, collection, path, **options):
+        if not self.db:
+            raise OfflineError('Firestore indisponível')
+        return export_firestore(self.db, collection, path, **options)
+    
+    def subscribe(self, collection, callback, where=(), order_by=None, descending=False, limit=None):
+        """Acompanhar uma consulta em tempo real; callback(alterações) na thread da UI
+        
+        Retorna a assinatura; chame `close()` ao sair da tela.
+        """
+        return self.live.subscribe(collection, callback, where=where, order_by=order_by,
+                                   descending=descending, limit=limit)
+    
+    def get_live_stats(self):
+        """Listeners ativos e documentos mantidos em memória"""
+        return self.live.stats()
+    
+    def get_cache_stats(self):
+        """Acertos e faltas do cache de consultas (leituras evitadas no Firestore)"""
+        return self.cache.stats()
+    
+    def get_io_stats(self):
+        """Latência das chamadas de rede por tipo (ms)"""
+        return self.io.stats()
+
+
+# Registros recentes mantidos nas listas em tempo real
+RECENT_LIMIT = 50
+
+
+def short_date(value, with_year=True):
+    """Data ISO -> dd/mm/aaaa (ou dd/mm)"""
+    value = str(value or '')
+    if len(value) < 10:
+        return value
+    day, month, year = value[8:10], value[5:7], value[:4]
+    return f"{day}/{month}/{year}" if with_year else f"{day}/{month}"
 
 
 # Instância global do Firebase
@@ -351,8 +608,14 @@ class LoginScreen(MDScreen):
             self.show_message('Por favor, preencha todos os campos')
             return
         
-        # Tentar login
-        result = firebase_manager.sign_in(email, password)
+        # Tentar login (em segundo plano)
+        self.show_message('Entrando...', is_error=False)
+        firebase_manager.sign_in_async(email, password, callback=self.on_login_result)
+    
+    def on_login_result(self, result, error):
+        """Tratar resultado do login (thread da UI)"""
+        if error:
+            result = {'success': False, 'error': str(error)}
         
         if result['success']:
             self.show_message('Login realizado com sucesso!', is_error=False)
@@ -361,6 +624,10 @@ class LoginScreen(MDScreen):
         else:
             self.show_message(f'Erro no login: {result["error"]}')
     
+    def on_enter(self, *args):
+        """Ao voltar para o login, descartar telas construídas para o usuário anterior"""
+        Clock.schedule_once(lambda dt: self.manager.release_inactive(), 0)
+    
     def show_register_form(self, *args):
         """Mostrar tela de cadastro"""
         self.manager.current = 'register'
@@ -526,7 +793,12 @@ class RegisterScreen(MDScreen):
             'user_type': self.selected_user_type
         }
         
-        result = firebase_manager.sign_up(email, password, user_data)
+        firebase_manager.sign_up_async(email, password, user_data, callback=self.on_register_result)
+    
+    def on_register_result(self, result, error):
+        """Tratar resultado do cadastro (thread da UI)"""
+        if error:
+            result = {'success': False, 'error': str(error)}
         
         if result['success']:
             self.show_message('Cadastro realizado com sucesso!', is_error=False)
@@ -790,37 +1062,42 @@ class DashboardScreen(MDScreen):
     
     def send_emergency_alert(self, dialog):
         """Enviar alerta de emergência"""
-        try:
-            # Aqui seria enviado o push notification
-            user = firebase_manager.get_current_user()
-            alert_data = {
-                'type': 'emergency',
-                'timestamp': datetime.now().isoformat(),
-                'user': user.get('name', 'Anônimo') if user else 'Anônimo',
-                'status': 'active'
-            }
-            
-            # Salvar no Firestore (se disponível)
-            if firebase_manager.db:
-                firebase_manager.db.collection('emergency_alerts').add(alert_data)
-            
-            dialog.dismiss()
-            
-            success_dialog = MDDialog(
-                title="Emergência Acionada!",
-                text="O alerta foi enviado para a equipe de segurança.",
-                buttons=[MDFlatButton(text="OK", on_release=lambda x: success_dialog.dismiss())]
-            )
-            success_dialog.open()
-            
-        except Exception as e:
-            dialog.dismiss()
+        started = time.perf_counter()
+        user = firebase_manager.get_current_user()
+        alert_data = {
+            'type': 'emergency',
+            'timestamp': datetime.now().isoformat(),
+            'user': user.get('name', 'Anônimo') if user else 'Anônimo',
+            'status': 'active'
+        }
+        
+        dialog.dismiss()
+        
+        # Gravado localmente e distribuído em paralelo (Firestore + push)
+        firebase_manager.send_emergency_alert(alert_data, callback=self.on_emergency_alert_sent, started=started)
+    
+    def on_emergency_alert_sent(self, result, error):
+        """Confirmar envio do alerta (thread da UI)"""
+        if error:
             error_dialog = MDDialog(
                 title="Erro",
-                text=f"Não foi possível enviar o alerta: {str(e)}",
+                text=f"Não foi possível enviar o alerta: {str(error)}",
                 buttons=[MDFlatButton(text="OK", on_release=lambda x: error_dialog.dismiss())]
             )
             error_dialog.open()
+            return
+        
+        if result['delivered']:
+            text = "O alerta foi enviado para a equipe de segurança."
+        else:
+            text = "Alerta salvo localmente, não enviado: será enviado assim que houver conexão."
+        
+        success_dialog = MDDialog(
+            title="Emergência Acionada!",
+            text=text,
+            buttons=[MDFlatButton(text="OK", on_release=lambda x: success_dialog.dismiss())]
+        )
+        success_dialog.open()
     
     def open_reports(self, *args):
         """Abrir tela de denúncias"""
@@ -881,6 +1158,7 @@ class ReportsScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name = 'reports'
+        self.subscription = None
         self.build_screen()
     
     def build_screen(self):
@@ -938,6 +1216,7 @@ class ReportsScreen(MDScreen):
         content.add_widget(new_report_card)
         
         # Lista de denúncias (se for direção)
+        self.reports_list = None
         if firebase_manager.has_permission('ver_denuncias'):
             reports_list_card = MDCard(
                 orientation='vertical',
@@ -950,16 +1229,17 @@ class ReportsScreen(MDScreen):
             reports_title = MDLabel(text="Denúncias Recebidas", font_style="H6")
             reports_list_card.add_widget(reports_title)
             
-            # Lista seria carregada do Firebase
-            sample_reports = [
-                "Bullying no pátio - 15/09/2025",
-                "Vandalismo na biblioteca - 14/09/2025", 
-                "Comportamento inadequado - 13/09/2025"
-            ]
-            
-            for report in sample_reports:
-                item = OneLineListItem(text=report)
-                reports_list_card.add_widget(item)
+            # Histórico paginado: só os campos da linha, uma página por vez
+            self.reports_list = VirtualList(
+                source=firebase_manager.page_source(
+                    'reports', 'timestamp', descending=True, fields=('type', 'timestamp', 'status')
+                ),
+                row_builder=lambda report: {
+                    'text': f"{report.get('type', 'Denúncia')} - {short_date(report.get('timestamp'))}"
+                },
+                page_size=PAGE_SIZE
+            )
+            reports_list_card.add_widget(self.reports_list)
             
             content.add_widget(reports_list_card)
         
@@ -987,20 +1267,38 @@ class ReportsScreen(MDScreen):
             'status': 'pending'
         }
         
-        try:
-            # Salvar no Firestore
-            if firebase_manager.db:
-                firebase_manager.db.collection('reports').add(report_data)
-            
-            # Limpar campos
-            self.report_type.text = ""
-            self.report_description.text = ""
-            self.anonymous_switch.active = False
-            
-            self.show_dialog("Sucesso", "Denúncia enviada com sucesso!")
-            
-        except Exception as e:
-            self.show_dialog("Erro", f"Não foi possível enviar a denúncia: {str(e)}")
+        # Salvar no Firestore em segundo plano
+        firebase_manager.add_document('reports', report_data, callback=self.on_report_saved)
+    
+    def on_report_saved(self, result, error):
+        """Confirmar gravação (thread da UI)"""
+        if error:
+            self.show_dialog("Erro", f"Não foi possível enviar a denúncia: {str(error)}")
+            return
+        
+        # Limpar campos
+        self.report_type.text = ""
+        self.report_description.text = ""
+        self.anonymous_switch.active = False
+        
+        self.show_dialog("Sucesso", "Denúncia enviada com sucesso!")
+    
+    def on_enter(self, *args):
+        """Acompanhar a denúncia mais recente: quando chega uma nova, a primeira página é relida"""
+        if self.reports_list is not None and self.subscription is None:
+            self.subscription = firebase_manager.subscribe(
+                'reports', self.on_report_changes, order_by='timestamp', descending=True, limit=1
+            )
+    
+    def on_report_changes(self, changes):
+        if any(kind == 'added' for kind, index, item in changes):
+            self.reports_list.reload()
+    
+    def on_leave(self, *args):
+        """Liberar o listener ao sair da tela"""
+        if self.subscription is not None:
+            self.subscription.close()
+            self.subscription = None
     
     def show_dialog(self, title, text):
         dialog = MDDialog(
@@ -1020,6 +1318,7 @@ class NoticesScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name = 'notices'
+        self.subscription = None
         self.build_screen()
     
     def build_screen(self):
@@ -1083,37 +1382,29 @@ class NoticesScreen(MDScreen):
         notices_title = MDLabel(text="Avisos Recentes", font_style="H6")
         notices_card.add_widget(notices_title)
         
-        # Avisos de exemplo
+        # Avisos de exemplo (modo demonstração, sem Firestore)
         sample_notices = [
-            {"text": "URGENTE: Simulado de evacuação amanhã às 10h", "icon": "alert-circle", "color": "red"},
-            {"text": "Reunião de pais - 25/09/2025", "icon": "information-outline", "color": "blue"},
-            {"text": "Obras no refeitório - funcionamento reduzido", "icon": "tools", "color": "orange"},
-            {"text": "Nova campanha contra o bullying", "icon": "school", "color": "green"}
+            {"title": "Simulado de evacuação amanhã às 10h", "urgent": True},
+            {"title": "Reunião de pais - 25/09/2025", "urgent": False},
+            {"title": "Obras no refeitório - funcionamento reduzido", "urgent": False},
+            {"title": "Nova campanha contra o bullying", "urgent": False}
         ]
         
-        for notice in sample_notices:
-            notice_layout = MDBoxLayout(
-                size_hint_y=None,
-                height='60dp',
-                spacing=10,
-                padding=[10, 5, 10, 5]
-            )
-            
-            # Ícone do aviso
-            notice_icon = MDIconButton(
-                icon=notice["icon"],
-                theme_icon_color="Custom",
-                icon_color=notice["color"],
-                size_hint_x=None,
-                width='40dp'
-            )
-            
-            # Texto do aviso
-            notice_label = MDLabel(text=notice["text"])
-            
-            notice_layout.add_widget(notice_icon)
-            notice_layout.add_widget(notice_label)
-            notices_card.add_widget(notice_layout)
+        # Avisos paginados; reabrir a tela reaproveita as páginas em cache
+        self.notices_list = VirtualList(
+            source=firebase_manager.page_source(
+                'notices', 'timestamp', descending=True, fields=('title', 'urgent', 'timestamp')
+            ) if firebase_manager.db else ListSource(sample_notices),
+            row_builder=lambda notice: {
+                'text': f"{'URGENTE: ' if notice.get('urgent') else ''}{notice.get('title', '')}",
+                'icon': "alert-circle" if notice.get('urgent') else "information-outline",
+                'icon_color': "red" if notice.get('urgent') else "blue"
+            },
+            viewclass=IconTextRow,
+            row_height=60,
+            page_size=PAGE_SIZE
+        )
+        notices_card.add_widget(self.notices_list)
         
         content.add_widget(notices_card)
         layout.add_widget(content)
@@ -1139,23 +1430,42 @@ class NoticesScreen(MDScreen):
             'active': True
         }
         
-        try:
-            if firebase_manager.db:
-                firebase_manager.db.collection('notices').add(notice_data)
-            
-            # Se for urgente, enviar push notification
-            if is_urgent:
-                # Aqui seria implementado o envio de push notification
-                pass
-            
-            self.notice_title.text = ""
-            self.notice_content.text = ""
-            self.urgent_switch.active = False
-            
-            self.show_dialog("Sucesso", "Aviso publicado com sucesso!")
-            
-        except Exception as e:
-            self.show_dialog("Erro", f"Erro ao publicar aviso: {str(e)}")
+        # Salvar no Firestore em segundo plano
+        firebase_manager.add_document('notices', notice_data, callback=self.on_notice_saved)
+        
+        # Se for urgente, enviar push notification
+        if is_urgent:
+            # Aqui seria implementado o envio de push notification
+            pass
+    
+    def on_notice_saved(self, result, error):
+        """Confirmar gravação (thread da UI)"""
+        if error:
+            self.show_dialog("Erro", f"Erro ao publicar aviso: {str(error)}")
+            return
+        
+        self.notice_title.text = ""
+        self.notice_content.text = ""
+        self.urgent_switch.active = False
+        
+        self.show_dialog("Sucesso", "Aviso publicado com sucesso!")
+    
+    def on_enter(self, *args):
+        """Acompanhar o aviso mais recente: quando chega um novo, a primeira página é relida"""
+        if firebase_manager.db and self.subscription is None:
+            self.subscription = firebase_manager.subscribe(
+                'notices', self.on_notice_changes, order_by='timestamp', descending=True, limit=1
+            )
+    
+    def on_notice_changes(self, changes):
+        if any(kind == 'added' for kind, index, item in changes):
+            self.notices_list.reload()
+    
+    def on_leave(self, *args):
+        """Liberar o listener ao sair da tela"""
+        if self.subscription is not None:
+            self.subscription.close()
+            self.subscription = None
     
     def show_dialog(self, title, text):
         dialog = MDDialog(
@@ -1175,6 +1485,7 @@ class VisitorsScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name = 'visitors'
+        self.subscription = None
         self.build_screen()
     
     def build_screen(self):
@@ -1227,32 +1538,60 @@ class VisitorsScreen(MDScreen):
             height='200dp'
         )
         
-        active_title = MDLabel(text="Visitantes na Escola", font_style="H6")
-        active_visitors_card.add_widget(active_title)
-        
-        # Lista seria carregada do Firebase
-        sample_visitors = [
-            "João Silva - CPF: 123.456.789-00 - 14:30",
-            "Maria Santos - RG: 12.345.678-9 - 15:15"
-        ]
-        
-        for visitor in sample_visitors:
-            visitor_layout = MDBoxLayout(size_hint_y=None, height='40dp')
-            visitor_layout.add_widget(MDLabel(text=visitor, size_hint_x=0.8))
-            
-            checkout_btn = MDIconButton(
-                icon="logout",
-                theme_icon_color="Custom",
-                icon_color="red",
-                on_release=lambda x, v=visitor: self.checkout_visitor(v)
-            )
-            visitor_layout.add_widget(checkout_btn)
-            active_visitors_card.add_widget(visitor_layout)
+        self.active_title = MDLabel(text="Visitantes na Escola", font_style="H6")
+        active_visitors_card.add_widget(self.active_title)
+        
+        # Busca aproximada por nome ou documento (enquanto digita)
+        self.visitor_search = MDTextField(hint_text="Buscar visitante (nome ou documento)")
+        self.visitor_search.bind(text=lambda instance, text: self.refresh_visitors())
+        active_visitors_card.add_widget(self.visitor_search)
+        
+        self.visitors_list = VirtualList(
+            source=ListSource(firebase_manager.visitors.active_visitors()),
+            row_builder=lambda visitor: {
+                'text': f"{visitor['name']} - {visitor['document']} - {visitor['check_in'][11:16]}",
+                'icon': "logout",
+                'icon_color': "red",
+                'action': lambda visitor_id=visitor['id']: self.checkout_visitor(visitor_id)
+            },
+            viewclass=ActionTextRow,
+            row_height=40
+        )
+        active_visitors_card.add_widget(self.visitors_list)
         
         content.add_widget(active_visitors_card)
         layout.add_widget(content)
         self.add_widget(layout)
     
+    def on_enter(self, *args):
+        """Acompanhar em tempo real os visitantes ativos (entradas e saídas de outros aparelhos)"""
+        if self.subscription is None:
+            self.subscription = firebase_manager.subscribe(
+                'visitors', self.on_visitor_changes,
+                where=[('status', '==', 'active')], order_by='check_in'
+            )
+    
+    def on_leave(self, *args):
+        """Liberar o listener ao sair da tela"""
+        if self.subscription is not None:
+            self.subscription.close()
+            self.subscription = None
+    
+    def on_visitor_changes(self, changes):
+        """Aplicar ao registro só os visitantes alterados e atualizar a lista"""
+        firebase_manager.visitors.apply_changes(changes)
+        self.refresh_visitors()
+    
+    def refresh_visitors(self):
+        """Atualizar lista e ocupação a partir do registro de visitantes"""
+        self.active_title.text = f"Visitantes na Escola ({firebase_manager.visitors.occupancy()})"
+        query = self.visitor_search.text.strip()
+        if query:
+            visitors = [visitor for score, visitor in firebase_manager.visitors.search(query, limit=10)]
+        else:
+            visitors = firebase_manager.visitors.active_visitors()
+        self.visitors_list.reload(ListSource(visitors))
+    
     def register_visitor(self, *args):
         name = self.visitor_name.text.strip()
         document = self.visitor_doc.text.strip()
@@ -1266,6 +1605,7 @@ class VisitorsScreen(MDScreen):
         user = firebase_manager.get_current_user()
         
         visitor_data = {
+            'id': new_id('V'),
             'name': name,
             'document': document,
             'purpose': purpose,
@@ -1276,24 +1616,31 @@ class VisitorsScreen(MDScreen):
             'status': 'active'
         }
         
-        try:
-            if firebase_manager.db:
-                firebase_manager.db.collection('visitors').add(visitor_data)
-            
-            # Limpar campos
-            self.visitor_name.text = ""
-            self.visitor_doc.text = ""
-            self.visitor_purpose.text = ""
-            self.visitor_destination.text = ""
-            
-            self.show_dialog("Sucesso", "Visitante registrado com sucesso!")
-            
-        except Exception as e:
-            self.show_dialog("Erro", f"Erro ao registrar visitante: {str(e)}")
+        # Gravado no outbox local; enviado ao Firestore em segundo plano
+        result = firebase_manager.visitors.check_in(visitor_data)
+        if not result['success']:
+            visitor = result.get('visitor')
+            since = f" desde {visitor['check_in'][11:16]}" if visitor else ""
+            self.show_dialog("Erro", f"{result['error']}{since}")
+            return
+        
+        self.refresh_visitors()
+        
+        # Limpar campos
+        self.visitor_name.text = ""
+        self.visitor_doc.text = ""
+        self.visitor_purpose.text = ""
+        self.visitor_destination.text = ""
+        
+        self.show_dialog("Sucesso", "Visitante registrado com sucesso!")
     
-    def checkout_visitor(self, visitor_info):
-        # Implementar checkout do visitante
-        self.show_dialog("Saída", f"Registrando saída do visitante")
+    def checkout_visitor(self, visitor_id):
+        result = firebase_manager.visitors.check_out(visitor_id=visitor_id)
+        if not result['success']:
+            self.show_dialog("Erro", result['error'])
+            return
+        self.refresh_visitors()
+        self.show_dialog("Saída", f"Saída de {result['visitor']['name']} registrada")
     
     def show_dialog(self, title, text):
         dialog = MDDialog(
@@ -1313,6 +1660,7 @@ class IncidentsScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name = 'incidents'
+        self.subscription = None
         self.build_screen()
     
     def build_screen(self):
@@ -1369,15 +1717,15 @@ class IncidentsScreen(MDScreen):
         incidents_title = MDLabel(text="Ocorrências Recentes", font_style="H6")
         incidents_card.add_widget(incidents_title)
         
-        sample_incidents = [
-            "Equipamento danificado - Lab. Informática - 15/09",
-            "Conflito entre alunos - Pátio - 14/09",
-            "Problema elétrico - Sala 201 - 13/09"
-        ]
-        
-        for incident in sample_incidents:
-            item = OneLineListItem(text=incident)
-            incidents_card.add_widget(item)
+        # Atualizada em tempo real enquanto a tela está aberta
+        self.incidents_list = VirtualList(
+            source=ListSource([]),
+            row_builder=lambda incident: {
+                'text': f"{incident.get('type', 'Ocorrência')} - {incident.get('location', '')} - "
+                        f"{short_date(incident.get('timestamp'), with_year=False)}"
+            }
+        )
+        incidents_card.add_widget(self.incidents_list)
         
         content.add_widget(incidents_card)
         layout.add_widget(content)
@@ -1403,19 +1751,35 @@ class IncidentsScreen(MDScreen):
             'status': 'open'
         }
         
-        try:
-            if firebase_manager.db:
-                firebase_manager.db.collection('incidents').add(incident_data)
-            
-            # Limpar campos
-            self.incident_type.text = ""
-            self.incident_location.text = ""
-            self.incident_description.text = ""
-            
-            self.show_dialog("Sucesso", "Ocorrência registrada com sucesso!")
-            
-        except Exception as e:
-            self.show_dialog("Erro", f"Erro ao registrar ocorrência: {str(e)}")
+        # Salvar no Firestore em segundo plano
+        firebase_manager.add_document('incidents', incident_data, callback=self.on_incident_saved)
+    
+    def on_incident_saved(self, result, error):
+        """Confirmar gravação (thread da UI)"""
+        if error:
+            self.show_dialog("Erro", f"Erro ao registrar ocorrência: {str(error)}")
+            return
+        
+        # Limpar campos
+        self.incident_type.text = ""
+        self.incident_location.text = ""
+        self.incident_description.text = ""
+        
+        self.show_dialog("Sucesso", "Ocorrência registrada com sucesso!")
+    
+    def on_enter(self, *args):
+        """Acompanhar as ocorrências recentes (só os documentos alterados chegam à lista)"""
+        if self.subscription is None:
+            self.subscription = firebase_manager.subscribe(
+                'incidents', self.incidents_list.apply_changes,
+                order_by='timestamp', descending=True, limit=RECENT_LIMIT
+            )
+    
+    def on_leave(self, *args):
+        """Liberar o listener ao sair da tela"""
+        if self.subscription is not None:
+            self.subscription.close()
+            self.subscription = None
     
     def show_dialog(self, title, text):
         dialog = MDDialog(
@@ -1435,6 +1799,7 @@ class CampaignsScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name = 'campaigns'
+        self.subscription = None
         self.build_screen()
     
     def build_screen(self):
@@ -1492,35 +1857,29 @@ class CampaignsScreen(MDScreen):
         campaigns_title = MDLabel(text="Campanhas Ativas", font_style="H6")
         campaigns_card.add_widget(campaigns_title)
         
+        # Campanhas de exemplo (modo demonstração, sem Firestore)
         sample_campaigns = [
-            {"text": "Campanha Anti-Bullying - Setembro 2025", "icon": "shield-account"},
-            {"text": "Diga Não às Drogas - Mês todo", "icon": "close-circle-outline"},
-            {"text": "Respeito e Inclusão - Permanente", "icon": "account-heart"},
-            {"text": "Sustentabilidade na Escola - Outubro", "icon": "leaf"}
+            {"title": "Campanha Anti-Bullying", "duration": "Setembro 2025", "icon": "shield-account"},
+            {"title": "Diga Não às Drogas", "duration": "Mês todo", "icon": "close-circle-outline"},
+            {"title": "Respeito e Inclusão", "duration": "Permanente", "icon": "account-heart"},
+            {"title": "Sustentabilidade na Escola", "duration": "Outubro", "icon": "leaf"}
         ]
         
-        for campaign in sample_campaigns:
-            campaign_layout = MDBoxLayout(
-                size_hint_y=None,
-                height='60dp',
-                spacing=10,
-                padding=[10, 5, 10, 5]
-            )
-            
-            # Ícone da campanha
-            campaign_icon = MDIconButton(
-                icon=campaign["icon"],
-                theme_icon_color="Primary",
-                size_hint_x=None,
-                width='40dp'
-            )
-            
-            # Texto da campanha
-            campaign_label = MDLabel(text=campaign["text"])
-            
-            campaign_layout.add_widget(campaign_icon)
-            campaign_layout.add_widget(campaign_label)
-            campaigns_card.add_widget(campaign_layout)
+        # Campanhas paginadas; reabrir a tela reaproveita as páginas em cache
+        self.campaigns_list = VirtualList(
+            source=firebase_manager.page_source(
+                'campaigns', 'created_at', descending=True, fields=('title', 'duration', 'created_at')
+            ) if firebase_manager.db else ListSource(sample_campaigns),
+            row_builder=lambda campaign: {
+                'text': f"{campaign.get('title', '')} - {campaign.get('duration', '')}",
+                'icon': campaign.get('icon', "bullhorn"),
+                'icon_color': "blue"
+            },
+            viewclass=IconTextRow,
+            row_height=60,
+            page_size=PAGE_SIZE
+        )
+        campaigns_card.add_widget(self.campaigns_list)
         
         content.add_widget(campaigns_card)
         layout.add_widget(content)
@@ -1546,18 +1905,37 @@ class CampaignsScreen(MDScreen):
             'status': 'active'
         }
         
-        try:
-            if firebase_manager.db:
-                firebase_manager.db.collection('campaigns').add(campaign_data)
-            
-            self.campaign_title.text = ""
-            self.campaign_description.text = ""
-            self.campaign_duration.text = ""
-            
-            self.show_dialog("Sucesso", "Campanha criada com sucesso!")
-            
-        except Exception as e:
-            self.show_dialog("Erro", f"Erro ao criar campanha: {str(e)}")
+        # Salvar no Firestore em segundo plano
+        firebase_manager.add_document('campaigns', campaign_data, callback=self.on_campaign_saved)
+    
+    def on_campaign_saved(self, result, error):
+        """Confirmar gravação (thread da UI)"""
+        if error:
+            self.show_dialog("Erro", f"Erro ao criar campanha: {str(error)}")
+            return
+        
+        self.campaign_title.text = ""
+        self.campaign_description.text = ""
+        self.campaign_duration.text = ""
+        
+        self.show_dialog("Sucesso", "Campanha criada com sucesso!")
+    
+    def on_enter(self, *args):
+        """Acompanhar a campanha mais recente: quando chega uma nova, a primeira página é relida"""
+        if firebase_manager.db and self.subscription is None:
+            self.subscription = firebase_manager.subscribe(
+                'campaigns', self.on_campaign_changes, order_by='created_at', descending=True, limit=1
+            )
+    
+    def on_campaign_changes(self, changes):
+        if any(kind == 'added' for kind, index, item in changes):
+            self.campaigns_list.reload()
+    
+    def on_leave(self, *args):
+        """Liberar o listener ao sair da tela"""
+        if self.subscription is not None:
+            self.subscription.close()
+            self.subscription = None
     
     def show_dialog(self, title, text):
         dialog = MDDialog(
@@ -1809,6 +2187,7 @@ class SettingsScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name = 'settings'
+        self.subscription = None
         self.build_screen()
     
     def build_screen(self):
@@ -1823,6 +2202,7 @@ class SettingsScreen(MDScreen):
         content = MDBoxLayout(orientation='vertical', padding=20, spacing=15)
         
         # Se for direção, mostrar sistema de banimento
+        self.users_list = None
         if firebase_manager.has_permission('banir_usuarios'):
             ban_system_card = MDCard(
                 orientation='vertical',
@@ -1834,36 +2214,22 @@ class SettingsScreen(MDScreen):
             
             ban_title = MDLabel(text="Sistema de Banimento", font_style="H6")
             
-            # Lista de usuários para banir/desbanir
-            users_list = [
-                {"name": "João Silva", "email": "joao@escola.com", "active": True},
-                {"name": "Maria Santos", "email": "maria@escola.com", "active": False},
-                {"name": "Pedro Lima", "email": "pedro@escola.com", "active": True}
-            ]
-            
             ban_system_card.add_widget(ban_title)
             
-            for user in users_list:
-                user_layout = MDBoxLayout(size_hint_y=None, height='40dp')
-                
-                status_text = "Ativo" if user["active"] else "BANIDO"
-                status_color = "Primary" if user["active"] else "Error"
-                
-                user_info = f"{user['name']} - {status_text}"
-                user_layout.add_widget(MDLabel(text=user_info, size_hint_x=0.6))
-                
-                action_text = "Banir" if user["active"] else "Reativar"
-                action_color = "red" if user["active"] else "green"
-                
-                action_btn = MDRaisedButton(
-                    text=action_text,
-                    size_hint_x=0.4,
-                    md_bg_color=action_color,
-                    on_release=lambda x, u=user: self.toggle_user_ban(u)
-                )
-                user_layout.add_widget(action_btn)
-                
-                ban_system_card.add_widget(user_layout)
+            # Usuários para banir/reativar, atualizados em tempo real
+            self.users_list = VirtualList(
+                source=ListSource([]),
+                row_builder=lambda user: {
+                    'text': f"{user.get('name', user.get('email', ''))} - "
+                            f"{'Ativo' if user.get('active', True) else 'BANIDO'}",
+                    'icon': "account-cancel" if user.get('active', True) else "account-check",
+                    'icon_color': "red" if user.get('active', True) else "green",
+                    'action': lambda u=user: self.toggle_user_ban(u)
+                },
+                viewclass=ActionTextRow,
+                row_height=40
+            )
+            ban_system_card.add_widget(self.users_list)
             
             content.add_widget(ban_system_card)
         
@@ -1898,7 +2264,8 @@ class SettingsScreen(MDScreen):
         self.add_widget(layout)
     
     def toggle_user_ban(self, user):
-        action = "reativar" if not user["active"] else "banir"
+        active = user.get('active', True)
+        action = "reativar" if not active else "banir"
         
         dialog = MDDialog(
             title="Confirmação",
@@ -1907,32 +2274,41 @@ class SettingsScreen(MDScreen):
                 MDFlatButton(text="CANCELAR", on_release=lambda x: dialog.dismiss()),
                 MDFlatButton(
                     text="CONFIRMAR",
-                    on_release=lambda x: self.confirm_user_ban(dialog, user, not user["active"])
+                    on_release=lambda x: self.confirm_user_ban(dialog, user, not active)
                 )
             ]
         )
         dialog.open()
     
     def confirm_user_ban(self, dialog, user, new_status):
-        try:
-            # Atualizar no Firebase
-            if firebase_manager.db:
-                # Buscar usuário pelo email e atualizar status
-                users_ref = firebase_manager.db.collection('users').where('email', '==', user['email'])
-                docs = users_ref.get()
-                
-                for doc in docs:
-                    doc.reference.update({'active': new_status})
-            
-            user["active"] = new_status
-            dialog.dismiss()
-            
-            action_text = "reativado" if new_status else "banido"
-            self.show_dialog("Sucesso", f"Usuário {action_text} com sucesso!")
-            
-        except Exception as e:
-            dialog.dismiss()
-            self.show_dialog("Erro", f"Erro ao alterar status do usuário: {str(e)}")
+        dialog.dismiss()
+        
+        # Buscar usuário pelo email e atualizar status no Firebase, em segundo plano
+        firebase_manager.update_where(
+            'users', 'email', user['email'], {'active': new_status},
+            callback=lambda result, error: self.on_user_ban_saved(user, new_status, error)
+        )
+    
+    def on_user_ban_saved(self, user, new_status, error):
+        """Confirmar alteração de status (thread da UI)"""
+        if error:
+            self.show_dialog("Erro", f"Erro ao alterar status do usuário: {str(error)}")
+            return
+        
+        # A lista é atualizada pelo listener quando o Firestore confirma
+        action_text = "reativado" if new_status else "banido"
+        self.show_dialog("Sucesso", f"Usuário {action_text} com sucesso!")
+    
+    def on_enter(self, *args):
+        """Acompanhar os usuários enquanto a tela está aberta"""
+        if self.users_list is not None and self.subscription is None:
+            self.subscription = firebase_manager.subscribe('users', self.users_list.apply_changes, order_by='name')
+    
+    def on_leave(self, *args):
+        """Liberar o listener ao sair da tela"""
+        if self.subscription is not None:
+            self.subscription.close()
+            self.subscription = None
     
     def show_dialog(self, title, text):
         dialog = MDDialog(
@@ -2092,21 +2468,23 @@ class DrillsScreen(MDScreen):
             'status': 'scheduled'
         }
         
-        try:
-            if firebase_manager.db:
-                firebase_manager.db.collection('drills').add(drill_data)
-            
-            # Limpar campos
-            self.drill_type.text = ""
-            self.drill_date.text = ""
-            self.drill_time.text = ""
-            self.drill_location.text = ""
-            self.drill_description.text = ""
-            
-            self.show_dialog("Sucesso", "Simulado agendado com sucesso!")
-            
-        except Exception as e:
-            self.show_dialog("Erro", f"Erro ao agendar simulado: {str(e)}")
+        # Salvar no Firestore em segundo plano
+        firebase_manager.add_document('drills', drill_data, callback=self.on_drill_saved)
+    
+    def on_drill_saved(self, result, error):
+        """Confirmar gravação (thread da UI)"""
+        if error:
+            self.show_dialog("Erro", f"Erro ao agendar simulado: {str(error)}")
+            return
+        
+        # Limpar campos
+        self.drill_type.text = ""
+        self.drill_date.text = ""
+        self.drill_time.text = ""
+        self.drill_location.text = ""
+        self.drill_description.text = ""
+        
+        self.show_dialog("Sucesso", "Simulado agendado com sucesso!")
     
     def edit_drill(self, drill_info):
         self.show_dialog("Editar", f"Editando: {drill_info}")
@@ -2131,23 +2509,45 @@ class SchoolSecurityApp(MDApp):
         self.theme_cls.theme_style = "Light"
         self.theme_cls.primary_palette = "Blue"
         
-        # Screen Manager
-        sm = ScreenManager()
-        
-        # Adicionar todas as telas
-        sm.add_widget(LoginScreen())
-        sm.add_widget(RegisterScreen())
-        sm.add_widget(DashboardScreen())
-        sm.add_widget(ReportsScreen())
-        sm.add_widget(NoticesScreen())
-        sm.add_widget(VisitorsScreen())
-        sm.add_widget(IncidentsScreen())
-        sm.add_widget(CampaignsScreen())
-        sm.add_widget(DrillsScreen())
-        sm.add_widget(SecurityScreen())
-        sm.add_widget(SettingsScreen())
+        start = time.perf_counter()
+        
+        # Screen Manager: cada tela só é construída na primeira navegação
+        sm = LazyScreenManager(max_alive=5)
         
+        sm.register('login', LoginScreen, pinned=True)
+        sm.register('register', RegisterScreen)
+        sm.register('dashboard', DashboardScreen)
+        sm.register('reports', ReportsScreen)
+        sm.register('notices', NoticesScreen)
+        sm.register('visitors', VisitorsScreen)
+        sm.register('incidents', IncidentsScreen)
+        sm.register('campaigns', CampaignsScreen)
+        sm.register('drills', DrillsScreen)
+        sm.register('security', SecurityScreen)
+        sm.register('settings', SettingsScreen)
+        
+        sm.current = 'login'
+        
+        print(f"⏱️ Interface inicial pronta em {(time.perf_counter() - start) * 1000:.0f} ms")
         return sm
+    
+    def on_start(self):
+        """Inicializar o Firebase só depois do primeiro quadro desenhado"""
+        # O primeiro tick do Clock antecede o desenho; o segundo já vem depois do primeiro quadro
+        Clock.schedule_once(lambda dt: Clock.schedule_once(lambda dt: firebase_manager.start(self.user_data_dir), 0), 0)
+    
+    def on_pause(self):
+        """App em segundo plano: liberar telas para reduzir uso de memória"""
+        self.root.release_inactive()
+        return True
+    
+    def on_stop(self):
+        """Aguardar gravações pendentes antes de fechar"""
+        firebase_manager.last_login.flush()
+        firebase_manager.live.close()
+        firebase_manager.alerts.shutdown(wait=True)
+        firebase_manager.io.shutdown(wait=True)
+        firebase_manager.sync.stop()
 
 
 if __name__ == '__main__':
@@ -4,8 +4,12 @@ Aplicativo desenvolvido em Python + Kivy para dispositivos móveis Android
 """
 
 import os
-from datetime import datetime
-import json
+import time
+
+from lazy_screens import LazyScreenManager
+from local_data import LocalDataManager
+from record_ids import new_id
+from records import STATUS_LABELS, Priority, Status
 
 # Configurações básicas para Android - imports opcionais para compatibilidade
 try:
@@ -49,157 +53,6 @@ except ImportError:
     
     KIVY_AVAILABLE = False
 
-
-class LocalDataManager:
-    """Gerenciador de dados locais (substituto temporário do Firebase)"""
-    
-    def __init__(self):
-        self.current_user = None
-        self.data_file = "local_data.json"
-        self.load_data()
-    
-    def load_data(self):
-        """Carregar dados do arquivo local"""
-        try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    self.data = json.load(f)
-            else:
-                self.data = {
-                    'users': {
-                        'admin@escola.com': {
-                            'password': 'admin123',
-                            'name': 'Administrador',
-                            'user_type': 'direcao',
-                            'active': True
-                        },
-                        'aluno@escola.com': {
-                            'password': '123456',
-                            'name': 'Aluno Exemplo',
-                            'user_type': 'aluno',
-                            'active': True
-                        },
-                        'funcionario@escola.com': {
-                            'password': 'func123',
-                            'name': 'Funcionário Exemplo',
-                            'user_type': 'funcionario',
-                            'active': True
-                        }
-                    },
-                    'reports': [],
-                    'notices': [
-                        {
-                            'title': 'Simulado de Evacuação',
-                            'content': 'Simulado será realizado na próxima quinta-feira às 10h.',
-                            'date': '2025-09-20',
-                            'priority': 'Alta'
-                        },
-                        {
-                            'title': 'Novos Horários',
-                            'content': 'Portões funcionam de 7h às 18h.',
-                            'date': '2025-09-18',
-                            'priority': 'Média'
-                        }
-                    ],
-                    'visitors': [],
-                    'incidents': []
-                }
-                self.save_data()
-        except Exception as e:
-            print(f"Erro ao carregar dados: {e}")
-    
-    def save_data(self):
-        """Salvar dados no arquivo local"""
-        try:
-            with open(self.data_file, 'w') as f:
-                json.dump(self.data, f, indent=2, default=str)
-        except Exception as e:
-            print(f"Erro ao salvar dados: {e}")
-    
-    def sign_in(self, email, password):
-        """Fazer login"""
-        try:
-            if email in self.data['users']:
-                user = self.data['users'][email]
-                if user['password'] == password and user.get('active', True):
-                    self.current_user = {
-                        'email': email,
-                        'name': user['name'],
-                        'user_type': user['user_type'],
-                        'active': user['active']
-                    }
-                    return {'success': True, 'user_data': self.current_user}
-                else:
-                    return {'success': False, 'error': 'Credenciais inválidas ou usuário inativo'}
-            else:
-                return {'success': False, 'error': 'Usuário não encontrado'}
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
-    
-    def sign_up(self, email, password, user_data):
-        """Cadastrar novo usuário"""
-        try:
-            if email not in self.data['users']:
-                self.data['users'][email] = {
-                    'password': password,
-                    'name': user_data.get('name', ''),
-                    'user_type': user_data.get('user_type', 'aluno'),
-                    'active': True,
-                    'created_at': datetime.now().isoformat()
-                }
-                self.save_data()
-                return {'success': True}
-            else:
-                return {'success': False, 'error': 'Usuário já existe'}
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
-    
-    def get_current_user(self):
-        """Obter usuário atual"""
-        return self.current_user
-    
-    def sign_out(self):
-        """Fazer logout"""
-        self.current_user = None
-    
-    def has_permission(self, permission):
-        """Verificar permissões do usuário"""
-        if not self.current_user:
-            return False
-            
-        user_type = self.current_user.get('user_type', 'aluno')
-        
-        permissions = {
-            'aluno': ['denunciar', 'ver_avisos', 'emergencia'],
-            'funcionario': ['denunciar', 'ver_avisos', 'emergencia', 'registrar_visitantes', 'adicionar_ocorrencias'],
-            'direcao': ['denunciar', 'ver_avisos', 'emergencia', 'registrar_visitantes', 
-                       'adicionar_ocorrencias', 'criar_avisos', 'ver_denuncias', 'gerar_relatorios']
-        }
-        
-        return permission in permissions.get(user_type, [])
-    
-    def add_report(self, report_data):
-        """Adicionar denúncia"""
-        try:
-            report_data['id'] = f"R{datetime.now().strftime('%Y%m%d%H%M%S')}"
-            report_data['date'] = datetime.now().isoformat()
-            report_data['status'] = 'Pendente'
-            self.data['reports'].append(report_data)
-            self.save_data()
-            return True
-        except Exception as e:
-            print(f"Erro ao adicionar denúncia: {e}")
-            return False
-    
-    def get_reports(self):
-        """Obter denúncias"""
-        return self.data.get('reports', [])
-    
-    def get_notices(self):
-        """Obter avisos"""
-        return self.data.get('notices', [])
-
-
 # Instância global do gerenciador de dados
 data_manager = LocalDataManager()
 
@@ -289,6 +142,10 @@ class LoginScreen(MDScreen):
         main_layout.add_widget(login_card)
         self.add_widget(main_layout)
     
+    def on_enter(self, *args):
+        """Ao voltar para o login, descartar telas construídas para o usuário anterior"""
+        Clock.schedule_once(lambda dt: self.manager.release_inactive(), 0)
+    
     def login(self, *args):
         """Realizar login"""
         email = self.email_field.text.strip()
@@ -535,6 +392,8 @@ class DashboardScreen(MDScreen):
     
     def emergency_action(self, *args):
         """Ação de emergência"""
+        # Nada pendente no buffer se o aparelho desligar ou o app for fechado
+        data_manager.flush()
         dialog = MDDialog(
             title="🚨 EMERGÊNCIA ACIONADA",
             text="Emergência foi registrada!\n\nEm situação real:\n• Polícia: 190\n• SAMU: 192\n• Bombeiros: 193",
@@ -690,8 +549,8 @@ class NoticesScreen(MDScreen):
         notices = data_manager.get_notices()
         
         for notice in notices:
-            priority_colors = {"Alta": "red", "Média": "orange", "Baixa": "green"}
-            priority_color = priority_colors.get(notice.get('priority', 'Baixa'), 'gray')
+            priority_colors = {Priority.URGENT: "red", Priority.HIGH: "red", Priority.MEDIUM: "orange", Priority.LOW: "green"}
+            priority_color = priority_colors.get(Priority.parse(notice.get('priority', Priority.LOW)), 'gray')
             
             card = MDCard(
                 MDBoxLayout(
@@ -766,6 +625,14 @@ class VisitorsScreen(MDScreen):
             pos_hint={'center_x': 0.5}
         )
         
+        checkout_btn = MDFlatButton(
+            text='REGISTRAR SAÍDA (pelo RG/CPF)',
+            size_hint_y=None,
+            height='40dp',
+            on_release=self.checkout_visitor,
+            pos_hint={'center_x': 0.5}
+        )
+        
         self.status_label = MDLabel(
             text='',
             halign='center',
@@ -778,6 +645,7 @@ class VisitorsScreen(MDScreen):
         form_layout.add_widget(self.purpose_field)
         form_layout.add_widget(self.contact_field)
         form_layout.add_widget(register_btn)
+        form_layout.add_widget(checkout_btn)
         form_layout.add_widget(self.status_label)
         
         main_layout.add_widget(form_layout)
@@ -790,9 +658,22 @@ class VisitorsScreen(MDScreen):
             self.status_label.theme_text_color = "Error"
             return
         
-        visitor_id = f"V{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        result = data_manager.visitors.check_in({
+            'id': new_id('V'),
+            'name': self.name_field.text.strip(),
+            'document': self.document_field.text.strip(),
+            'purpose': self.purpose_field.text.strip(),
+            'contact': self.contact_field.text.strip(),
+            'registered_by': (data_manager.get_current_user() or {}).get('name', 'Funcionário')
+        })
+        if not result['success']:
+            self.status_label.text = f"{result['error']} (entrada às {result['visitor']['check_in'][11:16]})"
+            self.status_label.theme_text_color = "Error"
+            return
         
-        self.status_label.text = f"Visitante registrado!\nID: {visitor_id}\nEntrada: {datetime.now().strftime('%H:%M')}"
+        visitor = result['visitor']
+        self.status_label.text = (f"Visitante registrado!\nID: {visitor['id']}\nEntrada: {visitor['check_in'][11:16]}"
+                                  f"\nNa escola agora: {data_manager.visitors.occupancy()}")
         self.status_label.theme_text_color = "Primary"
         
         # Limpar campos
@@ -800,6 +681,47 @@ class VisitorsScreen(MDScreen):
         self.document_field.text = ""
         self.purpose_field.text = ""
         self.contact_field.text = ""
+    
+    def checkout_visitor(self, *args):
+        """Registrar saída do visitante pelo documento"""
+        result = data_manager.visitors.check_out(document=self.document_field.text.strip())
+        if not result['success']:
+            # Documento incompleto ou nome digitado: saída automática só se for quase idêntico
+            query = self.document_field.text.strip() or self.name_field.text.strip()
+            matches = data_manager.visitors.search(query, limit=3) if query else []
+            if matches and matches[0][0] >= 0.9:
+                result = data_manager.visitors.check_out(visitor_id=matches[0][1]['id'])
+            elif matches:
+                self.status_label.text = "Confirme o visitante para registrar a saída"
+                self.status_label.theme_text_color = "Error"
+                self.confirm_checkout(matches)
+                return
+        self.show_checkout(result)
+    
+    def confirm_checkout(self, matches):
+        """Mostrar os visitantes parecidos e registrar a saída só do escolhido"""
+        def choose(visitor_id):
+            dialog.dismiss()
+            self.show_checkout(data_manager.visitors.check_out(visitor_id=visitor_id))
+        
+        buttons = [
+            MDFlatButton(text=f"{visitor['name']} ({visitor['document']})",
+                         on_release=lambda x, visitor_id=visitor['id']: choose(visitor_id))
+            for _, visitor in matches
+        ]
+        buttons.append(MDFlatButton(text="CANCELAR", on_release=lambda x: dialog.dismiss()))
+        dialog = MDDialog(title="Você quis dizer?", text="Escolha o visitante que está saindo:", buttons=buttons)
+        dialog.open()
+    
+    def show_checkout(self, result):
+        if not result['success']:
+            self.status_label.text = result['error']
+            self.status_label.theme_text_color = "Error"
+            return
+        self.status_label.text = (f"Saída registrada: {result['visitor']['name']}"
+                                  f"\nNa escola agora: {data_manager.visitors.occupancy()}")
+        self.status_label.theme_text_color = "Primary"
+        self.document_field.text = ""
 
 
 class AdminScreen(MDScreen):
@@ -821,25 +743,36 @@ class AdminScreen(MDScreen):
         # Stats cards
         stats_layout = MDBoxLayout(orientation='vertical', padding=10, spacing=10)
         
-        reports = data_manager.get_reports()
-        total_reports = len(reports)
+        counters = data_manager.get_dashboard_counters()
+        reports = data_manager.get_reports(limit=3, newest_first=True)
         
         stats_card = MDCard(
             MDBoxLayout(
                 MDLabel(text="📊 Estatísticas", font_style="H6", size_hint_y=None, height='30dp'),
-                MDLabel(text=f"Total de denúncias: {total_reports}", size_hint_y=None, height='25dp'),
-                MDLabel(text=f"Avisos ativos: {len(data_manager.get_notices())}", size_hint_y=None, height='25dp'),
+                MDLabel(text=f"Total de denúncias: {counters['total_reports']}", size_hint_y=None, height='25dp'),
+                MDLabel(text=f"Denúncias pendentes: {counters['pending_reports']}", size_hint_y=None, height='25dp'),
+                MDLabel(text=f"Visitantes presentes: {counters['active_visitors']}", size_hint_y=None, height='25dp'),
+                MDLabel(text=f"Ocorrências abertas: {counters['open_incidents']}", size_hint_y=None, height='25dp'),
+                MDLabel(text=f"Avisos ativos: {counters['active_notices']}", size_hint_y=None, height='25dp'),
                 MDLabel(text=f"Status: Sistema operacional", size_hint_y=None, height='25dp'),
                 orientation='vertical',
                 padding=15,
                 spacing=5
             ),
             size_hint_y=None,
-            height='130dp',
+            height='220dp',
             elevation=2
         )
         stats_layout.add_widget(stats_card)
         
+        # Busca em denúncias e ocorrências (enquanto digita)
+        self.search_field = MDTextField(hint_text='Buscar denúncias e ocorrências', size_hint_y=None, height='60dp')
+        self.search_field.bind(text=self.on_search_text)
+        self.search_retry = None
+        self.search_results = MDBoxLayout(orientation='vertical', adaptive_height=True, spacing=5)
+        stats_layout.add_widget(self.search_field)
+        stats_layout.add_widget(self.search_results)
+        
         # Lista de denúncias recentes
         if reports:
             recent_reports_title = MDLabel(
@@ -850,7 +783,7 @@ class AdminScreen(MDScreen):
             )
             stats_layout.add_widget(recent_reports_title)
             
-            for report in reports[-3:]:  # Últimas 3 denúncias
+            for report in reports:  # Últimas 3 denúncias
                 report_card = MDCard(
                     MDBoxLayout(
                         MDLabel(text=f"🆔 {report.get('id', 'N/A')}", font_style="Subtitle1", size_hint_y=None, height='25dp'),
@@ -876,6 +809,25 @@ class AdminScreen(MDScreen):
         main_layout.add_widget(scroll)
         
         self.add_widget(main_layout)
+    
+    def on_search_text(self, instance, text):
+        """Mostrar os registros mais relevantes para o texto digitado"""
+        self.search_results.clear_widgets()
+        if text.strip() and not data_manager.search_ready:
+            # Índice ainda sendo montado em segundo plano: tentar de novo em instantes
+            self.search_results.add_widget(MDLabel(text="🔎 Indexando…", size_hint_y=None, height='25dp'))
+            data_manager.start_indexing()
+            if self.search_retry:
+                self.search_retry.cancel()
+            self.search_retry = Clock.schedule_once(lambda dt: self.on_search_text(instance, self.search_field.text), 0.5)
+            return
+        for result in data_manager.search_records(text, limit=10):
+            kind = 'Denúncia' if result['collection'] == 'reports' else 'Ocorrência'
+            self.search_results.add_widget(MDLabel(
+                text=f"{kind}: {result.get('type', 'N/A')} - {result.get('location', 'N/A')} ({STATUS_LABELS.get(Status.parse(result.get('status')), result.get('status', ''))})",
+                size_hint_y=None,
+                height='25dp'
+            ))
 
 
 class SchoolSecurityApp(MDApp):
@@ -886,19 +838,36 @@ class SchoolSecurityApp(MDApp):
         self.theme_cls.theme_style = "Light"
         self.theme_cls.primary_palette = "Blue"
         
-        # Screen Manager
-        sm = ScreenManager()
+        start = time.perf_counter()
         
-        # Adicionar todas as telas
-        sm.add_widget(LoginScreen())
-        sm.add_widget(RegisterScreen())
-        sm.add_widget(DashboardScreen())
-        sm.add_widget(ReportsScreen())
-        sm.add_widget(NoticesScreen())
-        sm.add_widget(VisitorsScreen())
-        sm.add_widget(AdminScreen())
+        # Screen Manager: cada tela só é construída na primeira navegação
+        sm = LazyScreenManager(max_alive=4)
         
+        sm.register('login', LoginScreen, pinned=True)
+        sm.register('register', RegisterScreen)
+        sm.register('dashboard', DashboardScreen)
+        sm.register('reports', ReportsScreen)
+        sm.register('notices', NoticesScreen)
+        sm.register('visitors', VisitorsScreen)
+        sm.register('admin', AdminScreen)
+        
+        sm.current = 'login'
+        
+        print(f"⏱️ Interface inicial pronta em {(time.perf_counter() - start) * 1000:.0f} ms")
         return sm
+    
+    def on_start(self):
+        """Montar o índice de busca em segundo plano, sem travar a interface"""
+        data_manager.start_indexing()
+    
+    def on_pause(self):
+        """App em segundo plano: gravar pendências e liberar telas para reduzir uso de memória"""
+        data_manager.flush()
+        self.root.release_inactive()
+        return True
+    
+    def on_stop(self):
+        data_manager.flush()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,228 @@
+"""
+Fila de gravações offline (outbox) para o Firestore
+Cada gravação é persistida localmente antes de ir para a rede e enviada
+em lotes por uma thread de sincronização, com backoff exponencial quando
+não há conexão. A chave de idempotência vira o ID do documento, então
+um reenvio sobrescreve o mesmo documento em vez de duplicá-lo.
+"""
+
+import json
+import time
+import random
+import sqlite3
+import threading
+from collections import deque
+
+from record_ids import new_id
+
+
+class OfflineError(Exception):
+    """Sem conexão com o servidor: a gravação continua na fila sem contar tentativa"""
+
+
+class Outbox:
+    """Fila persistente (SQLite) de gravações pendentes
+
+    O arquivo só é aberto no primeiro uso (ou em `open`), então criar o
+    objeto na importação não grava nada em disco.
+    """
+
+    def __init__(self, db_file='outbox.db', max_attempts=20):
+        self.db_file = db_file
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.conn = None
+
+    def open(self, db_file=None):
+        """Abrir o arquivo da fila (uma única vez); `db_file` troca o caminho padrão"""
+        with self.lock:
+            if self.conn is None:
+                self.db_file = db_file or self.db_file
+                conn = sqlite3.connect(self.db_file, check_same_thread=False)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS outbox ('
+                    'seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE NOT NULL, '
+                    'collection TEXT NOT NULL, data TEXT NOT NULL, created_at REAL NOT NULL, '
+                    'attempts INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0)'
+                )
+                conn.commit()
+                self.conn = conn
+            elif db_file and db_file != self.db_file:
+                print(f"⚠️ Outbox já aberto em {self.db_file} - {db_file} ignorado")
+            return self.conn
+
+    def enqueue(self, collection, data, key=None):
+        """Persistir gravação pendente; retorna a chave de idempotência
+
+        Uma nova gravação com a mesma chave (mesmo documento) substitui a
+        pendente, mantendo sua posição na fila.
+        """
+        key = key or new_id()
+        conn = self.open()
+        with self.lock, conn:
+            conn.execute(
+                'INSERT INTO outbox (key, collection, data, created_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET data = excluded.data, attempts = 0, failed = 0',
+                (key, collection, json.dumps(data, ensure_ascii=False, default=str), time.time())
+            )
+        return key
+
+    def peek(self, limit):
+        """Próximas gravações pendentes, na ordem de chegada"""
+        conn = self.open()
+        with self.lock:
+            rows = conn.execute(
+                'SELECT key, collection, data, created_at FROM outbox '
+                'WHERE failed = 0 ORDER BY seq LIMIT ?', (limit,)
+            ).fetchall()
+        return [
+            {'key': key, 'collection': collection, 'data': json.loads(data), 'created_at': created_at}
+            for key, collection, data, created_at in rows
+        ]
+
+    def pending(self, collection):
+        """Documentos ainda não confirmados de uma coleção (ID do documento = chave)"""
+        conn = self.open()
+        with self.lock:
+            rows = conn.execute(
+                'SELECT key, data FROM outbox WHERE collection = ? AND failed = 0 ORDER BY seq', (collection,)
+            ).fetchall()
+        return [dict(json.loads(data), id=key) for key, data in rows]
+
+    def ack(self, keys):
+        """Remover gravações confirmadas pelo servidor"""
+        conn = self.open()
+        with self.lock, conn:
+            conn.executemany('DELETE FROM outbox WHERE key = ?', [(key,) for key in keys])
+
+    def record_failure(self, keys):
+        """Contar tentativa falha; após `max_attempts` a gravação sai da fila ativa"""
+        conn = self.open()
+        with self.lock, conn:
+            conn.executemany('UPDATE outbox SET attempts = attempts + 1 WHERE key = ?',
+                             [(key,) for key in keys])
+            conn.execute('UPDATE outbox SET failed = 1 WHERE attempts >= ?', (self.max_attempts,))
+
+    def depth(self):
+        """Quantidade de gravações pendentes"""
+        conn = self.open()
+        with self.lock:
+            return conn.execute('SELECT COUNT(*) FROM outbox WHERE failed = 0').fetchone()[0]
+
+    def failed_count(self):
+        conn = self.open()
+        with self.lock:
+            return conn.execute('SELECT COUNT(*) FROM outbox WHERE failed = 1').fetchone()[0]
+
+    def oldest_age(self):
+        """Idade (s) da gravação pendente mais antiga"""
+        conn = self.open()
+        with self.lock:
+            row = conn.execute('SELECT MIN(created_at) FROM outbox WHERE failed = 0').fetchone()
+        return time.time() - row[0] if row[0] else 0.0
+
+
+class OutboxSyncer:
+    """Thread que esvazia o outbox em lotes, com backoff exponencial"""
+
+    def __init__(self, outbox, commit_batch, batch_size=100, base_delay=1.0, max_delay=300.0,
+                 interval=30.0):
+        self.outbox = outbox
+        self.commit_batch = commit_batch
+        self.batch_size = batch_size
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.interval = interval
+        self.failures = 0
+        self.flushed = 0
+        self.last_error = None
+        self.flush_times = deque(maxlen=50)
+        self.wakeup = threading.Event()
+        self.flush_lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='outbox-sync', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+
+    def notify(self):
+        """Acordar a sincronização (nova gravação ou conexão restabelecida)"""
+        self.wakeup.set()
+
+    def backoff_delay(self):
+        """Espera até a próxima tentativa: exponencial com jitter, limitada"""
+        if not self.failures:
+            return self.interval
+        delay = min(self.base_delay * (2 ** (self.failures - 1)), self.max_delay)
+        return delay * random.uniform(0.5, 1.0)
+
+    def run(self):
+        while self.running:
+            self.flush()
+            self.wakeup.wait(self.backoff_delay())
+            self.wakeup.clear()
+
+    def flush(self):
+        """Enviar lotes pendentes até esvaziar a fila ou falhar"""
+        with self.flush_lock:
+            while True:
+                entries = self.outbox.peek(self.batch_size)
+                if not entries:
+                    return True
+                start = time.perf_counter()
+                try:
+                    errors = self._commit(entries)
+                except OfflineError as e:
+                    self.failures += 1
+                    self.last_error = str(e)
+                    return False
+                self.flush_times.append((time.perf_counter() - start) * 1000)
+                if errors:
+                    self.failures += 1
+                    self.last_error = errors[-1]
+                    return False
+                self.failures = 0
+                self.last_error = None
+
+    def _commit(self, entries):
+        """Enviar um lote; se o servidor recusar, dividir ao meio até isolar as gravações com erro
+
+        Só as gravações que falham sozinhas contam tentativa; as demais são
+        confirmadas. Retorna as mensagens de erro (lista vazia se tudo foi aceito).
+        """
+        try:
+            self.commit_batch(entries)
+        except OfflineError:
+            raise
+        except Exception as e:
+            if len(entries) == 1:
+                self.outbox.record_failure([entries[0]['key']])
+                return [str(e)]
+            middle = len(entries) // 2
+            return self._commit(entries[:middle]) + self._commit(entries[middle:])
+        self.outbox.ack([entry['key'] for entry in entries])
+        self.flushed += len(entries)
+        return []
+
+    def stats(self):
+        """Métricas para monitoramento da fila"""
+        times = list(self.flush_times)
+        return {
+            'depth': self.outbox.depth(),
+            'failed': self.outbox.failed_count(),
+            'oldest_age_s': self.outbox.oldest_age(),
+            'flushed': self.flushed,
+            'consecutive_failures': self.failures,
+            'last_error': self.last_error,
+            'last_flush_ms': times[-1] if times else None,
+            'avg_flush_ms': sum(times) / len(times) if times else None
+        }
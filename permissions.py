@@ -0,0 +1,71 @@
+"""
+Permissões por tipo de usuário (compartilhado por todas as versões do app)
+Os papéis herdam as permissões do papel pai (direcao ⊃ funcionario ⊃ aluno)
+e são compilados uma única vez em máscaras de bits.
+"""
+
+from functools import lru_cache
+
+# Papel pai de cada tipo de usuário
+ROLE_PARENTS = {
+    'aluno': None,
+    'funcionario': 'aluno',
+    'direcao': 'funcionario'
+}
+
+# Permissões concedidas diretamente a cada papel (além das herdadas)
+ROLE_GRANTS = {
+    'aluno': ('denunciar', 'ver_avisos', 'emergencia', 'ver_campanhas'),
+    'funcionario': ('registrar_visitantes', 'adicionar_ocorrencias'),
+    'direcao': ('criar_avisos', 'ver_denuncias', 'cadastrar_campanhas', 'banir_usuarios', 'gerar_relatorios')
+}
+
+
+def compile_roles(parents, grants):
+    """Compilar papéis em (bit por permissão, máscara por papel)"""
+    bits = {}
+    for role_grants in grants.values():
+        for permission in role_grants:
+            bits.setdefault(permission, 1 << len(bits))
+
+    masks = {}
+
+    def resolve(role, seen=()):
+        if role in masks:
+            return masks[role]
+        if role in seen:
+            raise ValueError(f"Herança de papéis circular: {role}")
+        mask = 0
+        for permission in grants.get(role, ()):
+            mask |= bits[permission]
+        parent = parents.get(role)
+        if parent:
+            mask |= resolve(parent, seen + (role,))
+        masks[role] = mask
+        return mask
+
+    for role in parents:
+        resolve(role)
+    return bits, masks
+
+
+PERMISSION_BITS, ROLE_MASKS = compile_roles(ROLE_PARENTS, ROLE_GRANTS)
+
+
+@lru_cache(maxsize=None)
+def role_allows(user_type, permission):
+    """Decisão (em cache) para um tipo de usuário e uma permissão"""
+    return bool(ROLE_MASKS.get(user_type, 0) & PERMISSION_BITS.get(permission, 0))
+
+
+def role_permissions(user_type):
+    """Conjunto de permissões efetivas de um tipo de usuário"""
+    mask = ROLE_MASKS.get(user_type, 0)
+    return frozenset(permission for permission, bit in PERMISSION_BITS.items() if mask & bit)
+
+
+def user_has_permission(user, permission):
+    """Verificar permissão do usuário logado (False se não houver usuário)"""
+    if not user:
+        return False
+    return role_allows(user.get('user_type', 'aluno'), permission)
@@ -0,0 +1,116 @@
+"""
+Cache de perfis de usuário para o login
+Guarda o documento `users/{uid}` por algum tempo (TTL), evitando a leitura
+no Firestore em logins repetidos no mesmo aparelho. A gravação de
+`last_login` é adiada e agrupada em segundo plano.
+"""
+
+import time
+import threading
+
+
+class ProfileCache:
+    """Perfis por uid com expiração (TTL em segundos)"""
+
+    def __init__(self, ttl=600, max_entries=200):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, uid):
+        """Perfil em cache ainda válido, ou None"""
+        with self.lock:
+            entry = self.entries.get(uid)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                self.hits += 1
+                return dict(entry[1])
+            self.entries.pop(uid, None)
+            self.misses += 1
+            return None
+
+    def put(self, uid, profile):
+        with self.lock:
+            if len(self.entries) >= self.max_entries and uid not in self.entries:
+                # Descartar o perfil mais antigo
+                oldest = min(self.entries, key=lambda key: self.entries[key][0])
+                del self.entries[oldest]
+            self.entries[uid] = (time.monotonic(), dict(profile))
+
+    def invalidate(self, uid):
+        with self.lock:
+            self.entries.pop(uid, None)
+
+    def invalidate_emails(self, emails):
+        """Descartar os perfis desses emails (ex.: banimento pelo administrador)"""
+        emails = set(emails)
+        with self.lock:
+            for uid in [uid for uid, (_, profile) in self.entries.items() if profile.get('email') in emails]:
+                del self.entries[uid]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+
+class LastLoginWriter:
+    """Grava `last_login` em segundo plano, agrupando logins próximos num só envio"""
+
+    def __init__(self, commit, submit=None, delay=5.0):
+        self.commit = commit
+        self.submit = submit
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.timer = None
+        self.written = 0
+        self.last_error = None
+
+    def touch(self, uid, when=None):
+        """Registrar login; o último horário de cada uid prevalece"""
+        with self.lock:
+            self.pending[uid] = when or time.time()
+            self._arm()
+
+    def _arm(self):
+        # Chamado com o lock: um único envio agendado por vez
+        if self.timer is None:
+            self.timer = threading.Timer(self.delay, self._schedule_flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _schedule_flush(self):
+        if self.submit:
+            self.submit(self.flush)
+        else:
+            self.flush()
+
+    def flush(self):
+        """Enviar os horários pendentes (um único lote); se falhar, voltam para a fila"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            if self.timer:
+                self.timer.cancel()
+            self.timer = None
+        if not pending:
+            return 0
+        try:
+            self.commit(pending)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"⚠️ Erro ao gravar último login: {e} - nova tentativa em {self.delay:.0f} s")
+            with self.lock:
+                # Logins registrados durante o envio são mais recentes e prevalecem
+                for uid, when in pending.items():
+                    if uid not in self.pending or self.pending[uid] < when:
+                        self.pending[uid] = when
+                self._arm()
+            return 0
+        self.written += len(pending)
+        return len(pending)
@@ -0,0 +1,109 @@
+"""
+Cache de resultados de consultas ao Firestore
+Guarda o resultado de cada consulta (coleção + filtros + ordenação +
+página) em memória, com descarte LRU dentro de um limite de bytes. Reabrir
+uma tela que já leu os mesmos documentos não gera nova leitura no
+Firestore. As entradas de uma coleção são descartadas quando o próprio app
+grava nela ou quando um listener em tempo real entrega alterações; as
+demais expiram após `ttl` segundos (gravações feitas em outros aparelhos).
+"""
+
+import json
+import time
+import threading
+from collections import OrderedDict
+
+from records import encode_value
+
+# Memória máxima ocupada pelos resultados em cache (estimada pelo JSON)
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+
+# Validade de um resultado (s): limita por quanto tempo edições de outros aparelhos ficam invisíveis
+DEFAULT_TTL = 300
+
+
+def query_key(collection, where=(), order_by=None, descending=False, limit=None, fields=None, cursor=None):
+    """Chave da consulta; o cursor (último documento da página anterior) entra pelo ID"""
+    return (collection, tuple(tuple(clause) for clause in where), order_by, descending, limit,
+            tuple(sorted(fields)) if fields else None, getattr(cursor, 'id', cursor))
+
+
+def estimate_size(items):
+    """Tamanho aproximado do resultado em bytes"""
+    try:
+        return len(json.dumps(items, default=encode_value))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class QueryCache:
+    """Resultados por consulta, LRU com limite de memória e invalidação por coleção"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.bytes = 0
+        # Versão de cada coleção: leituras iniciadas antes de uma invalidação não entram no cache
+        self.versions = {}
+        self.generation = 0
+        self.metrics = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get_or_load(self, key, load, size=None):
+        """Resultado em cache ou `load()` (fora do lock); `size(resultado)` estima o tamanho"""
+        collection = key[0]
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and (self.ttl is None or time.monotonic() - entry[0] < self.ttl):
+                self.entries.move_to_end(key)
+                self.metrics['hits'] += 1
+                return entry[1]
+            if entry is not None:
+                self._drop(key)
+            self.metrics['misses'] += 1
+            version = (self.generation, self.versions.get(collection, 0))
+        result = load()
+        nbytes = size(result) if size else estimate_size(result)
+        with self.lock:
+            if (self.generation, self.versions.get(collection, 0)) == version and nbytes <= self.max_bytes:
+                if key in self.entries:
+                    self._drop(key)
+                self.entries[key] = (time.monotonic(), result, nbytes)
+                self.bytes += nbytes
+                while self.bytes > self.max_bytes:
+                    self._drop(next(iter(self.entries)))
+                    self.metrics['evictions'] += 1
+        return result
+
+    def _drop(self, key):
+        self.bytes -= self.entries.pop(key)[2]
+
+    def invalidate(self, collection):
+        """Descartar os resultados de uma coleção (gravação ou alteração recebida)"""
+        with self.lock:
+            self.versions[collection] = self.versions.get(collection, 0) + 1
+            keys = [key for key in self.entries if key[0] == collection]
+            for key in keys:
+                self._drop(key)
+            if keys:
+                self.metrics['invalidations'] += 1
+
+    def clear(self):
+        """Descartar tudo (ex.: reconexão, quando o que mudou no servidor é desconhecido)"""
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Acertos, faltas e ocupação do cache"""
+        with self.lock:
+            lookups = self.metrics['hits'] + self.metrics['misses']
+            return dict(
+                self.metrics,
+                hit_ratio=round(self.metrics['hits'] / lookups, 3) if lookups else 0.0,
+                entries=len(self.entries),
+                bytes=self.bytes,
+                max_bytes=self.max_bytes
+            )
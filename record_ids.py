@@ -0,0 +1,135 @@
+"""
+Geração de IDs de registros (denúncias, visitantes, protocolos)
+IDs ordenáveis pelo tempo, no estilo Snowflake/ULID:
+  48 bits de milissegundos | 17 bits do nó (aparelho) | 15 bits de sequência
+codificados em base32 Crockford (16 caracteres). Não repetem dentro do
+mesmo aparelho, mesmo com milhares de registros no mesmo milissegundo, e
+aparelhos diferentes usam nós diferentes.
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+
+CROCKFORD = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+NODE_BITS = 17
+SEQ_BITS = 15
+ID_LENGTH = 16
+# A sequência ocupa exatamente os 3 últimos caracteres
+SEQ_CHARS = 3
+
+
+def default_node_id():
+    """Nó do aparelho: RECORD_NODE_ID ou derivado do endereço MAC e do processo"""
+    configured = os.environ.get('RECORD_NODE_ID')
+    if configured:
+        return int(configured) & ((1 << NODE_BITS) - 1)
+    digest = hashlib.sha1(f"{uuid.getnode()}:{os.getpid()}".encode()).digest()
+    return int.from_bytes(digest[:3], 'big') & ((1 << NODE_BITS) - 1)
+
+
+# Tabela de pares de caracteres (10 bits por consulta) para codificar rápido
+_PAIRS = [a + b for a in CROCKFORD for b in CROCKFORD]
+
+
+def encode_base32(value, length=ID_LENGTH):
+    pairs = []
+    for _ in range(length // 2):
+        pairs.append(_PAIRS[value & 1023])
+        value >>= 10
+    if length % 2:
+        pairs.append(CROCKFORD[value & 31])
+    return ''.join(reversed(pairs))
+
+
+def decode_base32(text):
+    value = 0
+    for char in text.upper():
+        value = (value << 5) | CROCKFORD.index(char)
+    return value
+
+
+class IdGenerator:
+    """Gerador monotônico de IDs (seguro entre threads)"""
+
+    def __init__(self, node_id=None):
+        self.node_id = default_node_id() if node_id is None else node_id & ((1 << NODE_BITS) - 1)
+        self.lock = threading.Lock()
+        self.last_ms = 0
+        self.seq = 0
+
+    def _reserve(self, count):
+        """Reservar `count` sequências; retorna [(ms, primeira seq, quantidade)]"""
+        blocks = []
+        with self.lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self.last_ms:
+                self.last_ms = now_ms
+                self.seq = 0
+            else:
+                # Mesmo milissegundo ou relógio atrasado: continua a sequência
+                self.seq += 1
+            while count:
+                if self.seq >> SEQ_BITS:
+                    # Sequência esgotada: avança um milissegundo lógico
+                    self.last_ms += 1
+                    self.seq = 0
+                taken = min(count, (1 << SEQ_BITS) - self.seq)
+                blocks.append((self.last_ms, self.seq, taken))
+                count -= taken
+                self.seq += taken
+            self.seq -= 1
+        return blocks
+
+    def next_value(self):
+        last_ms, seq, _ = self._reserve(1)[0]
+        return (last_ms << (NODE_BITS + SEQ_BITS)) | (self.node_id << SEQ_BITS) | seq
+
+    def new(self, prefix=''):
+        """Novo ID, opcionalmente com prefixo (ex.: 'R', 'V')"""
+        return prefix + encode_base32(self.next_value())
+
+    def new_batch(self, count, prefix=''):
+        """Vários IDs de uma vez (importações em lote): uma reserva, sem lock por ID"""
+        if count <= 0:
+            return []
+        ids = []
+        for last_ms, first_seq, taken in self._reserve(count):
+            head = prefix + encode_base32((last_ms << NODE_BITS) | self.node_id, ID_LENGTH - SEQ_CHARS)
+            ids.extend(head + CROCKFORD[seq >> 10] + _PAIRS[seq & 1023]
+                       for seq in range(first_seq, first_seq + taken))
+        return ids
+
+
+def id_timestamp(record_id):
+    """Data/hora (epoch em segundos) embutida em um ID"""
+    value = decode_base32(record_id[-ID_LENGTH:])
+    return (value >> (NODE_BITS + SEQ_BITS)) / 1000
+
+
+_generator = IdGenerator()
+
+
+def new_id(prefix=''):
+    """Novo ID com o gerador compartilhado do processo"""
+    return _generator.new(prefix)
+
+
+def new_ids(count, prefix=''):
+    """Vários IDs de uma vez com o gerador compartilhado (importações em lote)"""
+    return _generator.new_batch(count, prefix)
+
+
+def content_id(record, prefix=''):
+    """ID determinístico a partir do conteúdo do registro (campo 'id' ignorado)
+
+    Usado na importação de linhas sem ID: reimportar o mesmo arquivo gera os
+    mesmos IDs, e as linhas já gravadas são reconhecidas como duplicadas.
+    """
+    fields = {key: value for key, value in record.items() if key != 'id'}
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.sha1(payload.encode('utf-8')).digest()
+    return prefix + encode_base32(int.from_bytes(digest[:10], 'big'))
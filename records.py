@@ -0,0 +1,261 @@
+"""
+Modelo de registros do Sistema de Segurança Escolar
+Classes com __slots__ para denúncias, avisos, visitantes, ocorrências,
+campanhas, simulados e alertas: sem um dicionário por registro e com
+status/prioridade como membros de enum compartilhados. Os registros também
+se comportam como mapeamento (get, [], keys, update), então o código que
+trata registros como dicionários continua funcionando.
+"""
+
+import sys
+from datetime import datetime
+from enum import Enum
+
+
+class CodedEnum(str, Enum):
+    """Enum de texto: grava o valor canônico e aceita grafias antigas"""
+
+    def __str__(self):
+        return self.value
+
+    @classmethod
+    def parse(cls, value):
+        """Membro correspondente; valores desconhecidos são mantidos como texto"""
+        if value is None or isinstance(value, cls):
+            return value
+        return cls._aliases().get(str(value).strip().lower(), value)
+
+    @classmethod
+    def _aliases(cls):
+        aliases = cls.__dict__.get('_alias_table')
+        if aliases is None:
+            aliases = {member.value: member for member in cls}
+            for alias, member in cls.ALIASES.items():
+                aliases[alias] = cls(member)
+            setattr(cls, '_alias_table', aliases)
+        return aliases
+
+
+class Status(CodedEnum):
+    PENDING = 'pending'
+    IN_REVIEW = 'in_review'
+    RESOLVED = 'resolved'
+    ACTIVE = 'active'
+    CHECKED_OUT = 'checked_out'
+    OPEN = 'open'
+    CLOSED = 'closed'
+    SCHEDULED = 'scheduled'
+    DONE = 'done'
+    ARCHIVED = 'archived'
+
+
+Status.ALIASES = {
+    'pendente': 'pending', 'em análise': 'in_review', 'em analise': 'in_review',
+    'resolvido': 'resolved', 'ativo': 'active', 'ativa': 'active', 'saiu': 'checked_out',
+    'aberta': 'open', 'aberto': 'open', 'em andamento': 'open', 'fechada': 'closed',
+    'agendado': 'scheduled', 'realizado': 'done', 'arquivado': 'archived'
+}
+
+
+class Priority(CodedEnum):
+    LOW = 'low'
+    MEDIUM = 'medium'
+    HIGH = 'high'
+    URGENT = 'urgent'
+
+
+Priority.ALIASES = {'baixa': 'low', 'média': 'medium', 'media': 'medium', 'alta': 'high', 'urgente': 'urgent'}
+
+STATUS_LABELS = {
+    Status.PENDING: 'Pendente', Status.IN_REVIEW: 'Em análise', Status.RESOLVED: 'Resolvido',
+    Status.ACTIVE: 'Ativo', Status.CHECKED_OUT: 'Saiu', Status.OPEN: 'Aberta', Status.CLOSED: 'Fechada',
+    Status.SCHEDULED: 'Agendado', Status.DONE: 'Realizado', Status.ARCHIVED: 'Arquivado'
+}
+PRIORITY_LABELS = {Priority.LOW: 'Baixa', Priority.MEDIUM: 'Média', Priority.HIGH: 'Alta', Priority.URGENT: 'Urgente'}
+
+# Campos com poucos valores distintos: o texto é compartilhado entre registros
+INTERNED_FIELDS = frozenset(('type', 'location', 'reporter', 'registered_by', 'reported_by', 'destination',
+                             'purpose', 'author', 'created_by', 'user'))
+
+# Campos de data gravados como Timestamp no Firestore
+TIMESTAMP_FIELDS = frozenset(('timestamp', 'date', 'check_in', 'check_out', 'created_at'))
+
+_MISSING = object()
+
+
+class Record:
+    """Base dos registros: campos fixos em __slots__ e extras raros em `extra`"""
+
+    __slots__ = ('id', 'extra')
+    COLLECTION = None
+    FIELDS = ()
+    ENUM_FIELDS = {'status': Status}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.ALL_FIELDS = ('id',) + cls.FIELDS
+        cls.FIELD_SET = frozenset(cls.ALL_FIELDS)
+
+    def __init__(self, **values):
+        for name in self.ALL_FIELDS:
+            setattr(self, name, None)
+        self.extra = None
+        self.update(values)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Criar registro a partir de um dicionário (JSON, journal, SQLite)"""
+        record = cls.__new__(cls)
+        enums = cls.ENUM_FIELDS
+        for name in cls.ALL_FIELDS:
+            value = data.get(name)
+            if value is not None:
+                if name in enums:
+                    value = enums[name].parse(value)
+                elif name in INTERNED_FIELDS and type(value) is str:
+                    value = sys.intern(value)
+            setattr(record, name, value)
+        extra = {key: value for key, value in data.items() if key not in cls.FIELD_SET}
+        record.extra = extra or None
+        return record
+
+    def to_dict(self):
+        """Dicionário com os campos preenchidos (enums viram texto)"""
+        data = {}
+        for name in self.ALL_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value.value if isinstance(value, Enum) else value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @classmethod
+    def from_firestore(cls, doc):
+        """Criar registro a partir de um DocumentSnapshot (ou dicionário) do Firestore"""
+        if hasattr(doc, 'to_dict'):
+            data = dict(doc.to_dict() or {}, id=doc.id)
+        else:
+            data = dict(doc)
+        for name in TIMESTAMP_FIELDS.intersection(data):
+            if isinstance(data[name], datetime):
+                data[name] = data[name].isoformat()
+        return cls.from_dict(data)
+
+    def to_firestore(self):
+        """Dados para o Firestore: datas ISO viram datetime (Timestamp); o ID fica no documento"""
+        data = self.to_dict()
+        data.pop('id', None)
+        for name in TIMESTAMP_FIELDS.intersection(data):
+            if isinstance(data[name], str):
+                try:
+                    data[name] = datetime.fromisoformat(data[name])
+                except ValueError:
+                    pass
+        return data
+
+    # Interface de mapeamento (compatível com o código que usa dicionários)
+
+    def get(self, key, default=None):
+        if key in self.FIELD_SET:
+            value = getattr(self, key)
+            return default if value is None else value
+        if self.extra:
+            return self.extra.get(key, default)
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.update({key: value})
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def update(self, fields=(), **kwargs):
+        fields = dict(fields, **kwargs)
+        for key, value in fields.items():
+            if key in self.FIELD_SET:
+                if value is not None and key in self.ENUM_FIELDS:
+                    value = self.ENUM_FIELDS[key].parse(value)
+                setattr(self, key, value)
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.to_dict()!r})'
+
+
+class Report(Record):
+    __slots__ = FIELDS = ('type', 'location', 'description', 'anonymous', 'reporter', 'reporter_email',
+                          'date', 'timestamp', 'status')
+    COLLECTION = 'reports'
+
+
+class Notice(Record):
+    __slots__ = FIELDS = ('title', 'content', 'priority', 'urgent', 'author', 'date', 'timestamp', 'active')
+    COLLECTION = 'notices'
+    ENUM_FIELDS = {'priority': Priority}
+
+
+class Visitor(Record):
+    __slots__ = FIELDS = ('name', 'document', 'purpose', 'destination', 'contact', 'check_in', 'check_out',
+                          'registered_by', 'status')
+    COLLECTION = 'visitors'
+
+
+class Incident(Record):
+    __slots__ = FIELDS = ('type', 'location', 'description', 'reported_by', 'date', 'timestamp', 'status')
+    COLLECTION = 'incidents'
+
+
+class Campaign(Record):
+    __slots__ = FIELDS = ('title', 'description', 'duration', 'created_by', 'created_at', 'status')
+    COLLECTION = 'campaigns'
+
+
+class Drill(Record):
+    __slots__ = FIELDS = ('type', 'date', 'time', 'location', 'description', 'created_by', 'created_at', 'status')
+    COLLECTION = 'drills'
+
+
+class EmergencyAlert(Record):
+    __slots__ = FIELDS = ('type', 'timestamp', 'user', 'status')
+    COLLECTION = 'emergency_alerts'
+
+
+RECORD_TYPES = {cls.COLLECTION: cls for cls in (Report, Notice, Visitor, Incident, Campaign, Drill, EmergencyAlert)}
+
+
+def to_record(collection, data):
+    """Converter um dicionário no registro da coleção (outras coleções ficam como estão)"""
+    cls = RECORD_TYPES.get(collection)
+    if cls is None or isinstance(data, Record):
+        return data
+    return cls.from_dict(data)
+
+
+def encode_value(value):
+    """`default` para json.dump: registros viram dicionários"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    return str(value)
@@ -0,0 +1,316 @@
+"""
+Busca textual em denúncias e ocorrências
+Índice invertido incremental sobre `type`, `location` e `description`:
+tokenização sem acentos, remoção de palavras vazias e redução leve de
+sufixos do português (plural, gênero, diminutivo). Resultados ordenados por
+TF-IDF com peso por campo; o último termo da consulta também vale como
+prefixo (busca enquanto digita). Persistido como snapshot + journal, no
+mesmo esquema do armazenamento local.
+"""
+
+import os
+import re
+import json
+import math
+import heapq
+import bisect
+import unicodedata
+from collections import Counter
+from operator import itemgetter
+
+from local_storage import JournalWriter, atomic_write, read_journal
+
+# Peso de cada campo no cálculo da relevância
+FIELD_WEIGHTS = {'type': 2.0, 'location': 1.5, 'description': 1.0}
+
+# Campos guardados no índice para exibir os resultados sem ler o registro
+SUMMARY_FIELDS = ('type', 'location', 'status', 'date', 'timestamp')
+
+STOPWORDS = frozenset(
+    'a ao aos as com da das de do dos e em na nas no nos o os ou para pela pelo por que se sem um uma'.split()
+)
+
+# (sufixo, substituição), do mais longo para o mais curto
+PLURAL_SUFFIXES = (('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'), ('eis', 'el'), ('ois', 'ol'),
+                   ('ns', 'm'), ('res', 'r'), ('zes', 'z'), ('ses', 's'), ('s', ''))
+DEGREE_SUFFIXES = ('zinho', 'zinha', 'inho', 'inha', 'issimo', 'issima', 'mente')
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+MIN_PREFIX = 2
+MAX_PREFIX_TERMS = 50
+# Documentos avaliados no máximo por busca (termos muito frequentes não varrem o índice todo)
+MAX_CANDIDATES = 2000
+
+
+def strip_accents(text):
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text):
+    """Palavras sem acentos e sem palavras vazias"""
+    return [token for token in TOKEN_RE.findall(strip_accents(text)) if token not in STOPWORDS]
+
+
+def stem(token):
+    """Redução leve de sufixos (plural, grau, vogal final)"""
+    if len(token) <= 3 or token.isdigit():
+        return token
+    for suffix, replacement in PLURAL_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)] + replacement
+            break
+    for suffix in DEGREE_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            break
+    if token[-1] in 'aoe' and len(token) > 3:
+        token = token[:-1]
+    return token
+
+
+def record_terms(record):
+    """Frequência ponderada de cada radical e palavras originais de um registro"""
+    terms = Counter()
+    words = set()
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(str(record.get(field) or '')):
+            terms[stem(token)] += weight
+            words.add(token)
+    return dict(terms), sorted(words)
+
+
+class SearchIndex:
+    """Índice invertido persistente (snapshot JSON + journal)"""
+
+    def __init__(self, index_file, compact_every=1000, flush_interval=None):
+        self.index_file = index_file
+        self.journal_file = os.path.splitext(index_file)[0] + '.journal'
+        # Reindexações do mesmo documento num lote são gravadas uma vez só
+        self.writer = JournalWriter(self.journal_file, flush_interval, coalesce=itemgetter('key'))
+        self.compact_every = compact_every
+        self.journal_records = 0
+        self.docs = {}
+        self.postings = {}
+        self.impacts = {}
+        self.vocabulary = []
+        self.word_stems = {}
+        self.loaded = False
+
+    def load(self):
+        """Carregar snapshot e journal; retorna a quantidade de documentos"""
+        self.writer.flush()
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    self.docs = json.load(f).get('docs', {})
+            except ValueError:
+                print("⚠️ Índice de busca inválido - será reconstruído")
+                self.docs = {}
+        self.journal_records = 0
+        if os.path.exists(self.journal_file):
+            # Linha incompleta no fim é cortada: as próximas gravações não ficam depois dela
+            for entry in read_journal(self.journal_file, repair=True):
+                if entry.get('remove'):
+                    self.docs.pop(entry['key'], None)
+                else:
+                    self.docs[entry['key']] = entry['doc']
+                self.journal_records += 1
+        self._rebuild_postings()
+        self.loaded = True
+        if self.journal_records >= self.compact_every:
+            self.compact()
+        return len(self.docs)
+
+    def _rebuild_postings(self):
+        self.postings = {}
+        self.impacts = {}
+        self.word_stems = {}
+        self.vocabulary = None
+        for key, doc in self.docs.items():
+            self._post(key, doc)
+        self.vocabulary = sorted(self.word_stems)
+
+    def _post(self, key, doc):
+        for term, weight in doc['terms'].items():
+            self.postings.setdefault(term, {})[key] = weight
+            self.impacts.setdefault(term, {}).setdefault(weight, set()).add(key)
+        for word in doc['words']:
+            if word not in self.word_stems:
+                self.word_stems[word] = stem(word)
+                if self.vocabulary is not None:
+                    bisect.insort(self.vocabulary, word)
+
+    def _unpost(self, key):
+        doc = self.docs.get(key)
+        if not doc:
+            return
+        for term, weight in doc['terms'].items():
+            posting = self.postings.get(term)
+            if posting:
+                posting.pop(key, None)
+                self.impacts[term][weight].discard(key)
+                if not self.impacts[term][weight]:
+                    del self.impacts[term][weight]
+                if not posting:
+                    del self.postings[term]
+                    del self.impacts[term]
+
+    def _log(self, entry):
+        self.writer.write(entry)
+        self.journal_records += 1
+        if self.loaded and self.journal_records >= self.compact_every:
+            self.compact()
+
+    @staticmethod
+    def doc_key(collection, record_id):
+        return f'{collection}:{record_id}'
+
+    def add(self, collection, record):
+        """Indexar (ou reindexar) um registro com `id`
+
+        Antes do primeiro `load()` só grava no journal: o índice em memória
+        é montado na primeira busca.
+        """
+        key = self.doc_key(collection, record['id'])
+        terms, words = record_terms(record)
+        doc = {'terms': terms, 'words': words,
+               'summary': {field: record[field] for field in SUMMARY_FIELDS if record.get(field)}}
+        if self.loaded:
+            self._unpost(key)
+            self.docs[key] = doc
+            self._post(key, doc)
+        self._log({'key': key, 'doc': doc})
+
+    def remove(self, collection, record_id):
+        key = self.doc_key(collection, record_id)
+        if self.loaded:
+            self._unpost(key)
+            self.docs.pop(key, None)
+        self._log({'key': key, 'remove': True})
+
+    def count(self, collection):
+        prefix = collection + ':'
+        return sum(1 for key in self.docs if key.startswith(prefix))
+
+    def rebuild(self, records_by_collection):
+        """Reconstruir tudo a partir dos registros ({coleção: [registros]})"""
+        self.docs = {}
+        for collection, records in records_by_collection.items():
+            for record in records:
+                if record.get('id'):
+                    terms, words = record_terms(record)
+                    self.docs[self.doc_key(collection, record['id'])] = {
+                        'terms': terms, 'words': words,
+                        'summary': {field: record[field] for field in SUMMARY_FIELDS if record.get(field)}
+                    }
+        self._rebuild_postings()
+        self.loaded = True
+        self.compact()
+
+    def compact(self):
+        """Gravar snapshot completo e descartar o journal"""
+        with self.writer.lock:
+            self.writer.discard()
+            atomic_write(self.index_file, json.dumps({'docs': self.docs}, ensure_ascii=False, separators=(',', ':')))
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+        self.journal_records = 0
+
+    def flush(self):
+        """Gravar no disco as alterações do índice ainda no buffer"""
+        return self.writer.flush()
+
+    def _prefix_terms(self, prefix):
+        """Radicais das palavras que começam com `prefix`"""
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        terms = set()
+        for word in self.vocabulary[start:start + MAX_PREFIX_TERMS]:
+            if not word.startswith(prefix):
+                break
+            terms.add(self.word_stems[word])
+        return terms
+
+    def _stream(self, term, idf):
+        """Documentos de um termo em ordem decrescente de pontuação"""
+        for weight in sorted(self.impacts[term], reverse=True):
+            score = weight * idf
+            for key in self.impacts[term][weight]:
+                yield score, key
+
+    def search(self, query, collections=None, limit=20, prefix=True, max_candidates=MAX_CANDIDATES):
+        """Buscar: [{'collection', 'id', 'score', ...resumo}] por relevância
+
+        Documentos com todos os termos vêm primeiro. As listas de cada termo
+        são lidas da maior para a menor pontuação, o termo mais raro primeiro,
+        e a leitura para assim que nenhum documento ainda não visto pode entrar
+        entre os `limit` melhores, ou após `max_candidates` documentos (com
+        termos muito frequentes o resultado passa a ser aproximado).
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        total = len(self.docs) or 1
+
+        # Para cada termo da consulta: [(postings, idf)] das alternativas (prefixo)
+        groups = []
+        for position, token in enumerate(tokens):
+            alternatives = {stem(token)}
+            if prefix and position == len(tokens) - 1 and len(token) >= MIN_PREFIX:
+                alternatives |= self._prefix_terms(token)
+            groups.append([(term, math.log(1 + total / len(self.postings[term])))
+                           for term in alternatives if term in self.postings])
+        # Termo mais raro primeiro: seus documentos são os candidatos a conter todos os termos
+        groups.sort(key=lambda group: sum(len(self.postings[term]) for term, _ in group) or math.inf)
+
+        streams = [
+            self._stream(*group[0]) if len(group) == 1 else
+            heapq.merge(*(self._stream(term, idf) for term, idf in group), key=itemgetter(0), reverse=True)
+            for group in groups
+        ]
+        scorers = [[(self.postings[term], idf) for term, idf in group] for group in groups]
+        frontier = [math.inf if group else 0.0 for group in groups]
+        allowed = tuple(collection + ':' for collection in collections) if collections else None
+        seen = set()
+        top = []
+        while any(frontier):
+            for i, stream in enumerate(streams):
+                if not frontier[i]:
+                    continue
+                item = next(stream, None)
+                if item is None:
+                    frontier[i] = 0.0
+                    continue
+                frontier[i], key = item
+                if key in seen:
+                    continue
+                seen.add(key)
+                if len(seen) > max_candidates:
+                    frontier = [0.0] * len(frontier)
+                    break
+                if allowed and not key.startswith(allowed):
+                    continue
+                matched, score = 0, 0.0
+                for alternatives in scorers:
+                    # Cada termo pontua pela melhor alternativa presente no documento
+                    if len(alternatives) == 1:
+                        best = alternatives[0][0].get(key, 0) * alternatives[0][1]
+                    else:
+                        best = max(posting.get(key, 0) * idf for posting, idf in alternatives)
+                    if best:
+                        matched += 1
+                        score += best
+                entry = (matched, score, key)
+                if len(top) < limit:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+            # Melhor pontuação possível para um documento ainda não visto
+            if len(top) >= limit and top[0][:2] >= (sum(1 for value in frontier if value), sum(frontier)):
+                break
+
+        results = []
+        for matched, score, key in sorted(top, reverse=True):
+            collection, record_id = key.split(':', 1)
+            results.append(dict(self.docs[key]['summary'], collection=collection, id=record_id, score=score))
+        return results
@@ -0,0 +1,167 @@
+"""
+Agregação de estatísticas para os relatórios
+Percorre denúncias, ocorrências, visitantes e alertas numa única passada,
+contando por tipo, status, local e hora do dia (agrupado por mês). Os
+contadores ficam salvos junto com o cursor já lido de cada coleção
+(`store.scan`), então um novo relatório só lê os registros novos; um
+registro alterado no lugar troca a versão antiga pela nova (`record_update`).
+"""
+
+import os
+import json
+from collections import Counter
+from datetime import datetime
+
+from local_storage import atomic_write, record_date
+
+STATS_COLLECTIONS = ('reports', 'incidents', 'visitors', 'emergency_alerts')
+DIMENSIONS = ('type', 'status', 'location', 'hour')
+
+# Registros lidos por página ao processar os novos
+SCAN_PAGE = 1000
+
+# Campos usados para cada dimensão, em ordem de preferência
+DIMENSION_FIELDS = {
+    'type': ('type', 'purpose'),
+    'status': ('status',),
+    'location': ('location', 'destination')
+}
+
+
+def record_dimensions(record):
+    """Valores de (tipo, status, local, hora) de um registro"""
+    values = {}
+    for dimension, fields in DIMENSION_FIELDS.items():
+        value = next((record.get(field) for field in fields if record.get(field)), None)
+        values[dimension] = str(value) if value is not None else 'N/I'
+    date = record_date(record)
+    try:
+        values['hour'] = f"{datetime.fromisoformat(date).hour:02d}h"
+    except (TypeError, ValueError):
+        values['hour'] = 'N/I'
+    return values
+
+
+def record_month(record):
+    date = record_date(record)
+    return date[:7] if date and len(date) >= 7 else 'N/I'
+
+
+class StatsAggregator:
+    """Contadores incrementais por mês e coleção"""
+
+    def __init__(self, state_file=None, collections=STATS_COLLECTIONS):
+        self.state_file = state_file
+        self.collections = collections
+        # Registros já contados e cursor do último lido, por coleção
+        self.offsets = {}
+        self.cursors = {}
+        self.months = {}
+        self.load()
+
+    def load(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except ValueError:
+            print("⚠️ Cache de estatísticas inválido - será recalculado")
+            return
+        if 'cursors' not in state:
+            # Formato antigo (só posições): recalcular
+            return
+        self.offsets = state.get('offsets', {})
+        self.cursors = state['cursors']
+        self.months = {
+            month: {
+                collection: {'total': counters['total'],
+                             **{dimension: Counter(counters[dimension]) for dimension in DIMENSIONS}}
+                for collection, counters in collections.items()
+            }
+            for month, collections in state.get('months', {}).items()
+        }
+
+    def save(self):
+        if not self.state_file:
+            return
+        state = {'offsets': self.offsets, 'cursors': self.cursors, 'months': self.months}
+        atomic_write(self.state_file, json.dumps(state, ensure_ascii=False))
+
+    def _counters(self, month, collection):
+        collections = self.months.setdefault(month, {})
+        if collection not in collections:
+            collections[collection] = {'total': 0, **{dimension: Counter() for dimension in DIMENSIONS}}
+        return collections[collection]
+
+    def add(self, collection, record, weight=1):
+        """Contar um registro (weight=-1 desconta, ex.: antes de uma alteração)"""
+        counters = self._counters(record_month(record), collection)
+        counters['total'] += weight
+        for dimension, value in record_dimensions(record).items():
+            counters[dimension][value] += weight
+
+    def retract(self, collection, record):
+        self.add(collection, record, weight=-1)
+
+    def replace(self, collection, old_record, new_record):
+        """Ajustar contadores quando um registro já contado é alterado"""
+        self.retract(collection, old_record)
+        self.add(collection, new_record)
+
+    def reset(self):
+        self.offsets = {}
+        self.cursors = {}
+        self.months = {}
+
+    def _catch_up(self, store, collection):
+        """Contar os registros gravados após o cursor; retorna seus IDs"""
+        ids = []
+        cursor = self.cursors.get(collection)
+        while True:
+            page = store.scan(collection, after=cursor, limit=SCAN_PAGE)
+            for cursor, record in page:
+                self.add(collection, record)
+                ids.append(record.get('id'))
+            if len(page) < SCAN_PAGE:
+                break
+        self.cursors[collection] = cursor
+        self.offsets[collection] = self.offsets.get(collection, 0) + len(ids)
+        return ids
+
+    def update_from(self, store):
+        """Processar apenas os registros novos de cada coleção; retorna quantos"""
+        processed = 0
+        for collection in self.collections:
+            if store.count(collection) < self.offsets.get(collection, 0):
+                # Histórico reescrito (dados apagados ou restaurados): recalcular tudo
+                self.reset()
+                return self.update_from(store)
+            processed += len(self._catch_up(store, collection))
+        if processed:
+            self.save()
+        return processed
+
+    def record_update(self, store, collection, old_record, new_record):
+        """Registro alterado no lugar (chamar após gravar): trocar a versão já contada pela nova
+
+        Se o registro ainda não tinha sido contado, a leitura dos novos já
+        conta a versão gravada.
+        """
+        if old_record.get('id') not in self._catch_up(store, collection):
+            self.replace(collection, old_record, new_record)
+        self.save()
+
+    def month_summary(self, month=None):
+        """Contadores de um mês ('AAAA-MM'; padrão: mês atual)"""
+        month = month or datetime.now().strftime('%Y-%m')
+        return self.months.get(month, {})
+
+    def top(self, month, collection, dimension, limit=5):
+        """Valores mais frequentes: [(valor, contagem, porcentagem)]"""
+        counters = self.month_summary(month).get(collection)
+        if not counters or counters['total'] <= 0:
+            return []
+        total = counters['total']
+        return [(value, count, count * 100 / total)
+                for value, count in counters[dimension].most_common(limit) if count > 0]
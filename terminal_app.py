@@ -4,10 +4,33 @@ Aplicativo simplificado para funcionar no ambiente Replit
 """
 
 import os
+import sys
 import json
+import argparse
 from datetime import datetime
 # Firebase removido temporariamente devido a problemas de compatibilidade
 
+from permissions import user_has_permission
+from local_storage import create_store
+from stats_engine import StatsAggregator
+from record_ids import new_id, content_id
+from batch_io import read_rows, chunked, csv_fields, RowWriter, Progress, CHUNK_SIZE
+from exporter import export_store, store_records
+from visitor_registry import VisitorRegistry, StoreVisitorBackend
+
+EMERGENCY_TYPES = ['Incêndio', 'Acidente/Ferimento', 'Ameaça/Violência', 'Emergência Médica', 'Desastre Natural']
+REPORT_TYPES = ['Bullying/Agressão', 'Uso de substâncias', 'Cyberbullying', 'Porte de armas',
+                'Vandalismo', 'Comportamento suspeito', 'Outro']
+
+# Coleções aceitas pelos comandos em lote e o prefixo dos IDs gerados
+BATCH_COLLECTIONS = {'visitors': 'V', 'reports': 'R', 'incidents': 'I', 'notices': 'N', 'emergency_alerts': 'E'}
+# Campos obrigatórios de cada linha importada
+REQUIRED_FIELDS = {'visitors': ('name', 'document'), 'reports': ('type',), 'incidents': ('type',),
+                   'notices': ('title',), 'emergency_alerts': ('type',)}
+# Valores padrão dos registros importados (livro de visitas antigo: visitantes que já saíram)
+IMPORT_DEFAULTS = {'visitors': {'status': 'checked_out'}, 'reports': {'status': 'Pendente'},
+                   'incidents': {'status': 'Pendente'}}
+
 class FirebaseManager:
     """Gerenciador do Firebase para autenticação e banco de dados"""
     
@@ -27,10 +50,12 @@ class FirebaseManager:
         self.db = None
         self.current_user = None
         
-        self.initialize_firebase()
+        # Inicializado no primeiro login, não na importação do módulo
+        self.initialized = False
     
     def initialize_firebase(self):
         """Inicializa o Firebase"""
+        self.initialized = True
         try:
             # Para demonstração, usar dados locais
             print("🔧 Inicializando Firebase...")
@@ -43,6 +68,8 @@ class FirebaseManager:
     
     def sign_in(self, email, password):
         """Fazer login (modo demonstração)"""
+        if not self.initialized:
+            self.initialize_firebase()
         try:
             # Login fake para demonstração
             if email == "admin@escola.com" and password == "admin123":
@@ -73,21 +100,7 @@ class FirebaseManager:
     
     def has_permission(self, permission):
         """Verificar permissões do usuário"""
-        if not self.current_user:
-            return False
-            
-        user_type = self.current_user.get('user_type', 'aluno')
-        
-        permissions = {
-            'aluno': ['denunciar', 'ver_avisos', 'emergencia', 'ver_campanhas'],
-            'funcionario': ['denunciar', 'ver_avisos', 'emergencia', 'ver_campanhas', 
-                          'registrar_visitantes', 'adicionar_ocorrencias'],
-            'direcao': ['denunciar', 'ver_avisos', 'emergencia', 'ver_campanhas',
-                       'registrar_visitantes', 'adicionar_ocorrencias', 'criar_avisos',
-                       'ver_denuncias', 'cadastrar_campanhas', 'banir_usuarios', 'gerar_relatorios']
-        }
-        
-        return permission in permissions.get(user_type, [])
+        return user_has_permission(self.current_user, permission)
 
 # Instância global do Firebase
 firebase_manager = FirebaseManager()
@@ -98,6 +111,17 @@ class SchoolSecurityTerminalApp:
     def __init__(self):
         self.running = True
         
+        # Registros do terminal e contadores dos relatórios
+        self.store = create_store('terminal_data.json')
+        if self.store.load() is None:
+            self.store.save({'reports': [], 'visitors': [], 'incidents': [], 'emergency_alerts': []})
+        self.stats = StatsAggregator('terminal_stats.json')
+        # Saída de visitante altera o registro no lugar: estatísticas trocam a versão contada
+        self.visitors = VisitorRegistry(StoreVisitorBackend(
+            self.store, on_update=lambda collection, old, new: self.stats.record_update(self.store, collection, old, new)
+        ))
+        self.visitors.load()
+        
     def clear_screen(self):
         """Limpar tela"""
         os.system('clear' if os.name == 'posix' else 'cls')
@@ -165,6 +189,7 @@ class SchoolSecurityTerminalApp:
             
             if firebase_manager.has_permission('registrar_visitantes'):
                 options.append(("👥 Registrar Visitante", self.register_visitor))
+                options.append(("🔎 Buscar Visitante / Saída", self.checkout_visitor))
             
             if firebase_manager.has_permission('ver_denuncias'):
                 options.append(("📊 Ver Denúncias", self.view_reports))
@@ -220,7 +245,14 @@ class SchoolSecurityTerminalApp:
         try:
             choice = int(input("Tipo de emergência: "))
             if 1 <= choice <= 5:
-                print(f"\n🚨 Emergência registrada: Tipo {choice}")
+                user = firebase_manager.get_current_user()
+                self.store.append('emergency_alerts', {
+                    'type': EMERGENCY_TYPES[choice - 1],
+                    'timestamp': datetime.now().isoformat(),
+                    'user': user.get('name', 'Anônimo') if user else 'Anônimo',
+                    'status': 'active'
+                })
+                print(f"\n🚨 Emergência registrada: {EMERGENCY_TYPES[choice - 1]}")
                 print("✅ Notificações enviadas para:")
                 print("   - Direção da escola")
                 print("   - Equipe de segurança")
@@ -258,11 +290,24 @@ class SchoolSecurityTerminalApp:
             description = input("📄 Descrição: ").strip()
             anonymous = input("🕵️  Denúncia anônima? (s/N): ").strip().lower() == 's'
             
+            user = firebase_manager.get_current_user()
+            report_id = new_id('R')
+            self.store.append('reports', {
+                'id': report_id,
+                'type': REPORT_TYPES[incident_type - 1] if 1 <= incident_type <= len(REPORT_TYPES) else 'Outro',
+                'location': location,
+                'description': description,
+                'anonymous': anonymous,
+                'reporter': None if anonymous else user.get('name'),
+                'date': datetime.now().isoformat(),
+                'status': 'Pendente'
+            })
+            
             print(f"\n✅ Denúncia registrada!")
             print(f"   📅 Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
             print(f"   📍 Local: {location}")
             print(f"   🕵️  Anônima: {'Sim' if anonymous else 'Não'}")
-            print(f"   🆔 Protocolo: #{datetime.now().strftime('%Y%m%d%H%M%S')}")
+            print(f"   🆔 Protocolo: #{report_id}")
             
         except ValueError:
             print("❌ Entrada inválida!")
@@ -316,14 +361,29 @@ class SchoolSecurityTerminalApp:
         print("-" * 25)
         
         name = input("👤 Nome: ").strip()
+        
+        # Visitantes parecidos que já estão na escola (possível entrada duplicada)
+        for score, visitor in self.visitors.search(name, limit=3):
+            print(f"   ⚠️  Já na escola: {visitor['name']} ({visitor['document']}) - {score:.0%} parecido")
+        
         document = input("🆔 RG/CPF: ").strip()
         purpose = input("🎯 Motivo da visita: ").strip()
         contact = input("📞 Contato: ").strip()
         
         if name and document and purpose:
-            visitor_id = f"V{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            result = self.visitors.check_in({
+                'id': new_id('V'),
+                'name': name,
+                'document': document,
+                'purpose': purpose,
+                'contact': contact
+            })
+            if not result['success']:
+                print(f"\n❌ {result['error']} (entrada às {result['visitor']['check_in'][11:16]})")
+                input("\nPressione Enter para voltar ao menu...")
+                return
             print(f"\n✅ Visitante registrado!")
-            print(f"   🆔 ID: {visitor_id}")
+            print(f"   🆔 ID: {result['visitor']['id']}")
             print(f"   👤 Nome: {name}")
             print(f"   📅 Entrada: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
             print(f"   🎯 Motivo: {purpose}")
@@ -332,6 +392,41 @@ class SchoolSecurityTerminalApp:
         
         input("\nPressione Enter para voltar ao menu...")
     
+    def checkout_visitor(self):
+        """Buscar visitante (nome ou documento, mesmo incompletos) e registrar saída"""
+        self.clear_screen()
+        self.print_header()
+        
+        print("\n🔎 BUSCAR VISITANTE / REGISTRAR SAÍDA")
+        print("-" * 38)
+        print(f"👥 Na escola agora: {self.visitors.occupancy()}")
+        
+        query = input("\n🔎 Nome ou RG/CPF: ").strip()
+        matches = self.visitors.search(query, limit=5, active_only=False) if query else []
+        if not matches:
+            print("\n❌ Nenhum visitante encontrado")
+            input("\nPressione Enter para voltar ao menu...")
+            return
+        
+        for i, (score, visitor) in enumerate(matches, 1):
+            present = visitor['id'] in self.visitors.active
+            status = "🟢 na escola" if present else f"⚪ saiu {str(visitor.get('check_out') or '')[:16]}"
+            print(f"{i}. {visitor['name']} ({visitor['document']}) - {status}")
+        
+        try:
+            choice = input("\nNúmero para registrar a saída (Enter para voltar): ").strip()
+            if choice:
+                visitor = matches[int(choice) - 1][1]
+                result = self.visitors.check_out(visitor_id=visitor['id'])
+                if result['success']:
+                    print(f"\n✅ Saída registrada: {visitor['name']}")
+                else:
+                    print(f"\n❌ {result['error']}")
+        except (ValueError, IndexError):
+            print("❌ Opção inválida!")
+        
+        input("\nPressione Enter para voltar ao menu...")
+    
     def view_reports(self):
         """Ver denúncias (apenas direção)"""
         self.clear_screen()
@@ -378,21 +473,93 @@ class SchoolSecurityTerminalApp:
         print("\n📈 RELATÓRIOS")
         print("-" * 15)
         
-        print("\n📊 Estatísticas do mês:")
-        print("   📝 Total de denúncias: 15")
-        print("   🚨 Emergências: 2")
-        print("   👥 Visitantes registrados: 47")
-        print("   🔄 Casos em análise: 3")
-        print("   ✅ Casos resolvidos: 12")
-        
-        print("\n📋 Tipos de incidentes mais comuns:")
-        print("   1. 🤜 Bullying/Agressão (40%)")
-        print("   2. 👤 Comportamento suspeito (25%)")
-        print("   3. 🚫 Vandalismo (20%)")
-        print("   4. 📱 Cyberbullying (15%)")
+        # Processa só os registros novos desde o último relatório
+        self.stats.update_from(self.store)
+        summary = self.stats.month_summary()
+        total = lambda collection: summary.get(collection, {}).get('total', 0)
+        report_status = summary.get('reports', {}).get('status', {})
+        
+        print(f"\n📊 Estatísticas do mês ({datetime.now().strftime('%m/%Y')}):")
+        print(f"   📝 Total de denúncias: {total('reports')}")
+        print(f"   🚨 Emergências: {total('emergency_alerts')}")
+        print(f"   👥 Visitantes registrados: {total('visitors')}")
+        print(f"   ⚠️  Ocorrências: {total('incidents')}")
+        print(f"   ⏳ Casos pendentes: {report_status.get('Pendente', 0)}")
+        print(f"   🔄 Casos em análise: {report_status.get('Em análise', 0)}")
+        print(f"   ✅ Casos resolvidos: {report_status.get('Resolvido', 0)}")
+        
+        sections = [
+            ("📋 Tipos de denúncias mais comuns:", 'reports', 'type'),
+            ("📍 Locais com mais denúncias:", 'reports', 'location'),
+            ("🕐 Horários com mais denúncias:", 'reports', 'hour'),
+            ("🚨 Tipos de emergência:", 'emergency_alerts', 'type')
+        ]
+        for title, collection, dimension in sections:
+            ranking = self.stats.top(None, collection, dimension, limit=4)
+            if not ranking:
+                continue
+            print(f"\n{title}")
+            for i, (value, count, percent) in enumerate(ranking, 1):
+                print(f"   {i}. {value}: {count} ({percent:.0f}%)")
         
         input("\nPressione Enter para voltar ao menu...")
     
+    def import_file(self, collection, path, fmt=None, chunk_size=CHUNK_SIZE):
+        """Importar CSV/JSONL em blocos
+        
+        São rejeitadas as linhas sem os campos obrigatórios, com JSON inválido
+        ou com um ID que já existe (no armazenamento ou antes no arquivo).
+        Linhas sem ID recebem um ID derivado do conteúdo, então reimportar o
+        mesmo arquivo não duplica registros.
+        """
+        prefix = BATCH_COLLECTIONS[collection]
+        required = REQUIRED_FIELDS.get(collection, ())
+        defaults = IMPORT_DEFAULTS.get(collection, {})
+        # IDs já gravados: reimportar o mesmo arquivo não duplica registros
+        known_ids = {str(record.get('id')) for _, record in store_records(self.store, collection, chunk_size=chunk_size)}
+        invalid = []
+        progress = Progress(f"Importando {collection}")
+        imported = rejected = duplicates = 0
+        for chunk in chunked(read_rows(path, fmt, on_invalid=invalid.append), chunk_size):
+            records = []
+            for row in chunk:
+                if not all(row.get(field) for field in required):
+                    rejected += 1
+                    continue
+                record = {'id': None, **defaults, **row}
+                if not record['id']:
+                    # Sem ID no arquivo: ID derivado do conteúdo, estável entre importações
+                    record['id'] = content_id(record, prefix)
+                if str(record['id']) in known_ids:
+                    duplicates += 1
+                else:
+                    known_ids.add(str(record['id']))
+                    records.append(record)
+            if records:
+                self.store.append_many(collection, records)
+            imported += len(records)
+            progress.add(len(chunk))
+        self.store.flush()
+        rejected += len(invalid) + duplicates
+        return dict(progress.stats(), imported=imported, rejected=rejected, duplicates=duplicates)
+    
+    def export_file(self, collection, path, fmt=None, since=None, until=None, status=None,
+                    compress=None, resume=True, chunk_size=CHUNK_SIZE):
+        """Exportar uma coleção em CSV/JSONL (gzip opcional), lendo do armazenamento um bloco por vez
+        
+        Em arquivo, a exportação interrompida continua do último checkpoint na próxima execução.
+        """
+        if path != '-':
+            return export_store(self.store, collection, path, status=status, since=since, until=until,
+                                fmt=fmt, compress=compress, resume=resume, checkpoint_every=chunk_size)
+        progress = Progress(f"Exportando {collection}")
+        with RowWriter(path, fmt, fields=csv_fields(collection)) as writer:
+            for _, record in store_records(self.store, collection, status=status, since=since, until=until,
+                                           chunk_size=chunk_size):
+                writer.write(record)
+                progress.add(1)
+        return progress.stats()
+    
     def run(self):
         """Executar aplicativo"""
         print("🚀 Iniciando Sistema de Segurança Escolar...")
@@ -406,6 +573,79 @@ class SchoolSecurityTerminalApp:
             self.main_menu()
             firebase_manager.current_user = None
 
-if __name__ == '__main__':
+
+def month_range(month):
+    """'AAAA-MM' -> (início, fim) para os filtros de data"""
+    datetime.strptime(month, '%Y-%m')
+    return f'{month}-01', f'{month}-31T23:59:59'
+
+
+def end_of_day(until):
+    """Data final sem horário ('AAAA-MM-DD') inclui o dia inteiro"""
+    if until and len(until) == 10:
+        datetime.strptime(until, '%Y-%m-%d')
+        return f'{until}T23:59:59'
+    return until
+
+
+def main(argv=None):
+    """Sem argumentos: modo interativo. Com subcomando: importação/exportação em lote"""
+    parser = argparse.ArgumentParser(description='Sistema de Segurança Escolar - versão terminal')
+    commands = parser.add_subparsers(dest='command')
+    
+    import_parser = commands.add_parser('import', help='importar registros de um arquivo CSV/JSONL')
+    import_parser.add_argument('collection', choices=sorted(BATCH_COLLECTIONS))
+    import_parser.add_argument('file', help="arquivo de entrada ('-' para a entrada padrão)")
+    
+    export_parser = commands.add_parser('export', help='exportar registros para CSV/JSONL')
+    export_parser.add_argument('collection', choices=sorted(BATCH_COLLECTIONS) + ['all'])
+    export_parser.add_argument('file', help="arquivo de saída ('-' para a saída padrão; pasta com 'all')")
+    export_parser.add_argument('--since', help='data inicial (AAAA-MM-DD)')
+    export_parser.add_argument('--until', help='data final (AAAA-MM-DD)')
+    export_parser.add_argument('--month', help='mês completo (AAAA-MM)')
+    export_parser.add_argument('--status', help='apenas registros com este status')
+    export_parser.add_argument('--gzip', action='store_true', help='compactar (padrão: pela extensão .gz)')
+    export_parser.add_argument('--restart', action='store_true', help='ignorar exportação interrompida')
+    
+    for command in (import_parser, export_parser):
+        command.add_argument('--format', choices=('csv', 'jsonl'), help='padrão: pela extensão do arquivo')
+        command.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    
+    args = parser.parse_args(argv)
     app = SchoolSecurityTerminalApp()
-    app.run()
\ No newline at end of file
+    if args.command is None:
+        app.run()
+        return 0
+    
+    try:
+        if args.command == 'import':
+            result = app.import_file(args.collection, args.file, args.format, args.chunk_size)
+            print(f"✅ {result['imported']} registros importados em {result['seconds']:.1f} s "
+                  f"({result['rows_per_sec']:.0f} linhas/s), {result['rejected']} rejeitados "
+                  f"({result['duplicates']} com ID já existente)", file=sys.stderr)
+        else:
+            since, until = month_range(args.month) if args.month else (args.since, end_of_day(args.until))
+            if args.collection == 'all':
+                # Um arquivo por coleção dentro da pasta
+                os.makedirs(args.file, exist_ok=True)
+                extension = f".{args.format or 'jsonl'}{'.gz' if args.gzip else ''}"
+                targets = [(collection, os.path.join(args.file, collection + extension))
+                           for collection in sorted(BATCH_COLLECTIONS)]
+            else:
+                targets = [(args.collection, args.file)]
+            for collection, path in targets:
+                result = app.export_file(collection, path, args.format, since, until, args.status,
+                                         compress=args.gzip or None, resume=not args.restart,
+                                         chunk_size=args.chunk_size)
+                print(f"✅ {collection}: {result.get('total_rows', result['rows'])} registros exportados em {result['seconds']:.1f} s "
+                      f"({result['rows_per_sec']:.0f} linhas/s)", file=sys.stderr)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    finally:
+        app.store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,35 @@
+import os
+import sys
+import subprocess
+
+import lazy_imports
+from lazy_imports import check_budget
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_module(directory, name, body='VALUE = 1\n'):
+    (directory / f'{name}.py').write_text(body, encoding='utf-8')
+
+
+def test_budget_ok_and_exceeded(tmp_path):
+    write_module(tmp_path, 'tiny_module')
+    assert check_budget(['tiny_module'], budget_ms=10_000, cwd=str(tmp_path))
+    assert not check_budget(['tiny_module'], budget_ms=0, cwd=str(tmp_path))
+
+
+def test_require_missing_module_fails_without_measuring(tmp_path, monkeypatch):
+    measured = []
+    monkeypatch.setattr(lazy_imports, 'measure_imports', lambda module, cwd=None: measured.append(module) or [])
+    assert not check_budget(['tiny_module'], require=['modulo_que_nao_existe'], cwd=str(tmp_path))
+    assert measured == []
+
+
+def test_cli_exit_code_with_require(tmp_path):
+    # O script mede os módulos da pasta do projeto
+    command = [sys.executable, os.path.join(ROOT, 'lazy_imports.py'), 'records', '--budget-ms', '10000']
+    ok = subprocess.run(command + ['--require', 'json'], cwd=str(tmp_path), capture_output=True, text=True)
+    missing = subprocess.run(command + ['--require', 'modulo_que_nao_existe'],
+                             cwd=str(tmp_path), capture_output=True, text=True)
+    assert ok.returncode == 0
+    assert missing.returncode == 1
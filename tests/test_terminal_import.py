@@ -0,0 +1,27 @@
+from exporter import store_records
+from terminal_app import SchoolSecurityTerminalApp
+
+
+def count_records(app, collection):
+    return sum(1 for _ in store_records(app.store, collection))
+
+
+def test_reimport_without_ids_does_not_duplicate(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / 'visitantes.csv'
+    source.write_text('name,document,check_in\n'
+                      'Ana,123,2024-03-01T08:00:00\n'
+                      'Bruno,456,2024-03-01T09:30:00\n'
+                      'Ana,123,2024-03-02T08:00:00\n', encoding='utf-8')
+    app = SchoolSecurityTerminalApp()
+
+    first = app.import_file('visitors', str(source))
+    assert first['imported'] == 3
+    assert count_records(app, 'visitors') == 3
+
+    # Nova execução do comando: o armazenamento é relido do disco
+    app = SchoolSecurityTerminalApp()
+    second = app.import_file('visitors', str(source))
+    assert second['imported'] == 0
+    assert second['duplicates'] == 3
+    assert count_records(app, 'visitors') == 3
@@ -0,0 +1,204 @@
+"""
+Lista virtualizada para telas com muitos registros
+Usa RecycleView: apenas as linhas visíveis existem como widgets e são
+recicladas na rolagem; os dados vêm de uma fonte paginada, buscando a
+próxima página quando a rolagem chega ao fim. Fontes com `fetch_page_async`
+(Firestore) são lidas em segundo plano.
+"""
+
+from lazy_imports import lazy_class
+
+try:
+    from kivy.metrics import dp
+    from kivy.properties import StringProperty, ObjectProperty
+    from kivy.uix.recycleview import RecycleView
+    from kivy.uix.recycleboxlayout import RecycleBoxLayout
+    from kivymd.uix.boxlayout import MDBoxLayout
+except ImportError:
+    dp = lambda value: value
+    StringProperty = ObjectProperty = lambda *args, **kwargs: None
+    RecycleView = RecycleBoxLayout = MDBoxLayout = object
+
+# Widgets das linhas: importados quando a primeira linha é criada
+MDIconButton = lazy_class('kivymd.uix.button', 'MDIconButton')
+MDLabel = lazy_class('kivymd.uix.label', 'MDLabel')
+
+
+class ListSource:
+    """Fonte paginada sobre uma lista em memória (cursor = posição)"""
+
+    def __init__(self, items):
+        self.items = items
+
+    def fetch_page(self, cursor, limit):
+        """Retornar (linhas, próximo cursor); cursor None indica o fim"""
+        start = cursor or 0
+        rows = self.items[start:start + limit]
+        end = start + len(rows)
+        return rows, (end if end < len(self.items) else None)
+
+
+class IconTextRow(MDBoxLayout):
+    """Linha reciclável: ícone + texto"""
+
+    text = StringProperty('')
+    icon = StringProperty('circle')
+    icon_color = ObjectProperty('gray')
+
+    def __init__(self, **kwargs):
+        super().__init__(size_hint_y=None, height=dp(60), spacing=10, padding=[10, 5, 10, 5], **kwargs)
+        self.icon_button = MDIconButton(
+            icon=self.icon,
+            theme_icon_color="Custom",
+            icon_color=self.icon_color,
+            size_hint_x=None,
+            width=dp(40)
+        )
+        self.label = MDLabel(text=self.text)
+        self.add_widget(self.icon_button)
+        self.add_widget(self.label)
+
+    def on_text(self, instance, value):
+        self.label.text = value
+
+    def on_icon(self, instance, value):
+        self.icon_button.icon = value
+
+    def on_icon_color(self, instance, value):
+        self.icon_button.icon_color = value
+
+
+class ActionTextRow(MDBoxLayout):
+    """Linha reciclável: texto + botão de ação à direita"""
+
+    text = StringProperty('')
+    icon = StringProperty('chevron-right')
+    icon_color = ObjectProperty('gray')
+    action = ObjectProperty(None, allownone=True)
+
+    def __init__(self, **kwargs):
+        super().__init__(size_hint_y=None, height=dp(40), **kwargs)
+        self.label = MDLabel(text=self.text, size_hint_x=0.8)
+        self.action_button = MDIconButton(
+            icon=self.icon,
+            theme_icon_color="Custom",
+            icon_color=self.icon_color,
+            on_release=self.run_action
+        )
+        self.add_widget(self.label)
+        self.add_widget(self.action_button)
+
+    def on_text(self, instance, value):
+        self.label.text = value
+
+    def on_icon(self, instance, value):
+        self.action_button.icon = value
+
+    def on_icon_color(self, instance, value):
+        self.action_button.icon_color = value
+
+    def run_action(self, *args):
+        if self.action:
+            self.action()
+
+
+class VirtualList(RecycleView):
+    """Lista virtualizada com carregamento paginado sob demanda"""
+
+    def __init__(self, source, row_builder, viewclass='OneLineListItem', row_height=48,
+                 page_size=30, **kwargs):
+        super().__init__(**kwargs)
+        self.source = source
+        self.row_builder = row_builder
+        self.page_size = page_size
+        self.cursor = None
+        self.exhausted = False
+        self.loading = False
+        self.generation = 0
+        self.viewclass = viewclass
+
+        layout = RecycleBoxLayout(
+            orientation='vertical',
+            size_hint_y=None,
+            default_size=(None, dp(row_height)),
+            default_size_hint=(1, None)
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+
+        self.bind(scroll_y=self.on_scroll)
+        self.load_more()
+
+    def load_more(self):
+        """Buscar a próxima página da fonte e anexá-la à lista"""
+        if self.exhausted or self.loading:
+            return
+        if hasattr(self.source, 'fetch_page_async'):
+            self.loading = True
+            generation = self.generation
+            self.source.fetch_page_async(
+                self.cursor, self.page_size,
+                lambda page, error: self._on_page(generation, page, error)
+            )
+            return
+        rows, self.cursor = self.source.fetch_page(self.cursor, self.page_size)
+        self.exhausted = self.cursor is None
+        self.data.extend(self.row_builder(row) for row in rows)
+
+    def _on_page(self, generation, page, error):
+        """Página assíncrona recebida (thread da UI)"""
+        if generation != self.generation:
+            # Lista recarregada enquanto a página era lida
+            return
+        self.loading = False
+        if error:
+            print(f"⚠️ Erro ao carregar página: {error}")
+            return
+        rows, self.cursor = page
+        self.exhausted = self.cursor is None
+        self.data.extend(self.row_builder(row) for row in rows)
+
+    def reload(self, source=None):
+        """Recarregar desde a primeira página (opcionalmente com outra fonte)"""
+        if source is not None:
+            self.source = source
+        self.cursor = None
+        self.exhausted = False
+        self.loading = False
+        self.generation += 1
+        self.data = []
+        self.scroll_y = 1
+        self.load_more()
+
+    def apply_changes(self, changes):
+        """Aplicar alterações pontuais (visões em tempo real) sem recarregar a lista
+
+        `changes`: [(tipo, posição, item)] de live_views; só as linhas já
+        carregadas são refeitas, o restante entra nas próximas páginas.
+        """
+        for kind, index, item in changes:
+            if kind == 'reset':
+                self.reload(ListSource(list(item)))
+                continue
+            items = self.source.items
+            loaded = len(self.data)
+            if kind == 'removed':
+                del items[index]
+                if index < loaded:
+                    self.data.pop(index)
+            elif kind == 'added':
+                items.insert(index, item)
+                if index < loaded or self.exhausted:
+                    self.data.insert(index, self.row_builder(item))
+            elif kind == 'modified':
+                items[index] = item
+                if index < loaded:
+                    self.data[index] = self.row_builder(item)
+            if not self.exhausted:
+                # ListSource: o cursor é a posição da próxima linha a carregar
+                self.cursor = len(self.data)
+
+    def on_scroll(self, instance, value):
+        # scroll_y: 1 = topo, 0 = fim da lista
+        if value <= 0.1:
+            self.load_more()
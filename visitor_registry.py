@@ -0,0 +1,328 @@
+"""
+Registro de visitantes presentes na escola
+Mantém em memória os visitantes ativos, indexados por ID e por documento
+(CPF/RG normalizado): entrada, saída, detecção de entrada duplicada e
+ocupação em O(1). O histórico continua no armazenamento (dados locais ou
+Firestore), acessado por um backend. Nome e documento também ficam num
+índice de trigramas para busca aproximada enquanto se digita.
+"""
+
+import re
+import heapq
+import threading
+import unicodedata
+from collections import Counter
+from datetime import datetime
+
+from offline_queue import OfflineError
+
+# Visitas anteriores carregadas para a busca aproximada
+HISTORY_LIMIT = 5000
+# Semelhança mínima para um resultado da busca aproximada
+MIN_SIMILARITY = 0.3
+
+
+def normalize_document(document):
+    """CPF/RG sem pontuação e em maiúsculas (123.456.789-00 -> 12345678900)"""
+    return re.sub(r'[^0-9A-Za-z]', '', document or '').upper()
+
+
+def normalize_name(name):
+    """Nome sem acentos, em minúsculas e com espaços simples"""
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    plain = ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+    return ' '.join(re.findall(r'[a-z0-9]+', plain))
+
+
+def trigrams(text):
+    """Trigramas de cada palavra, com bordas (' jo', 'joa', 'oao', 'ao ')"""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """Índice de trigramas: ID -> texto, para busca aproximada"""
+
+    def __init__(self):
+        self.postings = {}
+        self.sizes = {}
+
+    def add(self, key, text):
+        self.remove(key)
+        grams = trigrams(text)
+        if not grams:
+            return
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(key)
+        self.sizes[key] = (len(grams), grams)
+
+    def remove(self, key):
+        entry = self.sizes.pop(key, None)
+        if not entry:
+            return
+        for gram in entry[1]:
+            keys = self.postings.get(gram)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[gram]
+
+    def scores(self, text, containment=False):
+        """{ID: semelhança}; Dice entre nomes ou fração da consulta contida (documentos)"""
+        if containment:
+            # Trecho de documento: só os trigramas internos (pode estar no meio)
+            grams = {text[i:i + 3] for i in range(len(text) - 2)} or trigrams(text)
+        else:
+            grams = trigrams(text)
+        if not grams:
+            return {}
+        hits = Counter()
+        for gram in grams:
+            keys = self.postings.get(gram)
+            if keys:
+                hits.update(keys)
+        if containment:
+            return {key: count / len(grams) for key, count in hits.items()}
+        return {key: 2 * count / (len(grams) + self.sizes[key][0]) for key, count in hits.items()}
+
+
+class StoreVisitorBackend:
+    """Visitantes gravados diretamente num armazenamento local (versão terminal)
+
+    `on_update(coleção, antigo, novo)` é chamado após alterar um registro já gravado.
+    """
+
+    def __init__(self, store, on_update=None):
+        self.store = store
+        self.on_update = on_update
+
+    def load_active(self):
+        return self.store.query('visitors', status='active')
+
+    def pending(self):
+        # Gravado direto no armazenamento: nada aguardando confirmação
+        return []
+
+    def load_history(self, limit=HISTORY_LIMIT):
+        return self.store.query('visitors', status='checked_out', limit=limit, newest_first=True)
+
+    def add(self, visitor):
+        self.store.append('visitors', visitor)
+
+    def check_out(self, visitor, fields):
+        # Cópia antes de gravar: o armazenamento pode alterar o mesmo dicionário
+        old = dict(visitor)
+        self.store.update('visitors', {'id': visitor['id']}, fields)
+        if self.on_update:
+            self.on_update('visitors', old, dict(old, **fields))
+
+
+class LocalVisitorBackend(StoreVisitorBackend):
+    """Visitantes gravados pelo LocalDataManager (versões Android)"""
+
+    def __init__(self, data_manager):
+        super().__init__(data_manager.store)
+        self.data_manager = data_manager
+
+    def add(self, visitor):
+        self.data_manager.add_record('visitors', visitor)
+
+    def check_out(self, visitor, fields):
+        self.data_manager.update_record('visitors', visitor['id'], fields, old_record=visitor)
+
+
+class FirestoreVisitorBackend:
+    """Visitantes no Firestore; gravações passam pelo outbox (ID do visitante = ID do documento)"""
+
+    def __init__(self, firebase_manager):
+        self.firebase_manager = firebase_manager
+
+    def load_active(self):
+        db = self.firebase_manager.db
+        if not db:
+            raise OfflineError('Firestore indisponível')
+        docs = db.collection('visitors').where('status', '==', 'active').get()
+        return [dict(doc.to_dict(), id=doc.id) for doc in docs]
+
+    def load_history(self, limit=HISTORY_LIMIT):
+        db = self.firebase_manager.db
+        if not db:
+            return []
+        # Visitas mais recentes primeiro (índice composto status + check_in)
+        docs = (db.collection('visitors').where('status', '==', 'checked_out')
+                .order_by('check_in', direction='DESCENDING').limit(limit).get())
+        return [dict(doc.to_dict(), id=doc.id) for doc in docs]
+
+    def pending(self):
+        """Entradas e saídas registradas aqui e ainda no outbox"""
+        return self.firebase_manager.outbox.pending('visitors')
+
+    def add(self, visitor):
+        self.firebase_manager.enqueue_document('visitors', visitor, key=visitor['id'])
+
+    def check_out(self, visitor, fields):
+        # Documento completo com a mesma chave: substitui a entrada ainda não enviada
+        self.firebase_manager.enqueue_document('visitors', dict(visitor, **fields), key=visitor['id'])
+
+
+class VisitorRegistry:
+    """Índice dos visitantes ativos (por ID e por documento)"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.active = {}
+        self.by_document = {}
+        self.loaded = False
+        # Busca aproximada: visitantes ativos e visitas anteriores
+        self.known = {}
+        self.names = TrigramIndex()
+        self.documents = TrigramIndex()
+        self.history_loaded = False
+
+    def load(self):
+        """Montar os índices a partir dos visitantes ativos no armazenamento
+
+        Sem conexão só entram as gravações locais pendentes e o registro
+        continua marcado como não carregado.
+        """
+        try:
+            visitors = self.backend.load_active()
+        except OfflineError:
+            visitors = None
+        pending = self.backend.pending()
+        with self.lock:
+            self.active = {}
+            self.by_document = {}
+            for visitor in visitors or ():
+                self._index(visitor)
+            self._apply_pending(pending)
+            self.loaded = visitors is not None
+        return len(self.active)
+
+    def apply_changes(self, changes):
+        """Atualizar os índices com alterações de uma visão em tempo real (live_views)"""
+        pending = self.backend.pending() if any(kind == 'reset' for kind, _, _ in changes) else ()
+        with self.lock:
+            for kind, _, visitor in changes:
+                if kind == 'reset':
+                    self.active = {}
+                    self.by_document = {}
+                    for item in visitor:
+                        self._index(item)
+                    self._apply_pending(pending)
+                elif visitor is None:
+                    continue
+                elif kind == 'removed' or visitor.get('status') != 'active':
+                    # Saiu da consulta de ativos: continua na busca como visita anterior
+                    self._unindex(visitor)
+                    self._index_text(visitor)
+                else:
+                    self._index(visitor)
+            self.loaded = True
+
+    def _apply_pending(self, pending):
+        # Entradas e saídas ainda não confirmadas pelo servidor valem sobre a leitura
+        for visitor in pending:
+            if visitor.get('status') == 'active':
+                self._index(visitor)
+            else:
+                self._unindex(visitor)
+                self._index_text(visitor)
+
+    def _index(self, visitor):
+        self.active[visitor['id']] = visitor
+        document = normalize_document(visitor.get('document'))
+        if document:
+            self.by_document[document] = visitor['id']
+        self._index_text(visitor)
+
+    def _index_text(self, visitor):
+        self.known[visitor['id']] = visitor
+        self.names.add(visitor['id'], normalize_name(visitor.get('name')))
+        self.documents.add(visitor['id'], normalize_document(visitor.get('document')).lower())
+
+    def _unindex(self, visitor):
+        self.active.pop(visitor['id'], None)
+        document = normalize_document(visitor.get('document'))
+        if self.by_document.get(document) == visitor['id']:
+            del self.by_document[document]
+
+    def check_in(self, visitor):
+        """Registrar entrada; recusa documento que já está na escola"""
+        document = normalize_document(visitor.get('document'))
+        with self.lock:
+            existing_id = self.by_document.get(document) if document else None
+            if existing_id:
+                return {'success': False, 'error': 'Visitante já está na escola',
+                        'visitor': self.active[existing_id]}
+            visitor = dict(visitor, status='active', check_out=None)
+            visitor.setdefault('check_in', datetime.now().isoformat())
+            self.backend.add(visitor)
+            self._index(visitor)
+        return {'success': True, 'visitor': visitor}
+
+    def check_out(self, visitor_id=None, document=None):
+        """Registrar saída pelo ID ou pelo documento"""
+        with self.lock:
+            if visitor_id is None and document:
+                visitor_id = self.by_document.get(normalize_document(document))
+            visitor = self.active.get(visitor_id)
+            if not visitor:
+                return {'success': False, 'error': 'Visitante não está na escola'}
+            fields = {'status': 'checked_out', 'check_out': datetime.now().isoformat()}
+            self.backend.check_out(visitor, fields)
+            self._unindex(visitor)
+            # Continua na busca aproximada como visita anterior
+            self.known[visitor['id']] = dict(visitor, **fields)
+        return {'success': True, 'visitor': dict(visitor, **fields)}
+
+    def load_history(self):
+        """Incluir visitas anteriores na busca aproximada (uma única vez)"""
+        visitors = self.backend.load_history()
+        with self.lock:
+            for visitor in visitors:
+                if visitor['id'] not in self.known:
+                    self._index_text(visitor)
+            self.history_loaded = True
+        return len(visitors)
+
+    def search(self, text, limit=5, active_only=True):
+        """Busca aproximada por nome ou documento (parcial ou com erros de digitação)
+
+        Retorna [(semelhança, visitante)] do mais parecido para o menos.
+        """
+        if not active_only and not self.history_loaded:
+            self.load_history()
+        query_document = normalize_document(text).lower()
+        with self.lock:
+            scores = self.names.scores(normalize_name(text))
+            if any(char.isdigit() for char in query_document):
+                for key, score in self.documents.scores(query_document, containment=True).items():
+                    scores[key] = max(score, scores.get(key, 0))
+            candidates = (
+                (score, key) for key, score in scores.items()
+                if score >= MIN_SIMILARITY and (not active_only or key in self.active)
+            )
+            best = heapq.nlargest(limit, candidates)
+            return [(score, self.known[key]) for score, key in best]
+
+    def is_present(self, document):
+        return normalize_document(document) in self.by_document
+
+    def find_by_document(self, document):
+        visitor_id = self.by_document.get(normalize_document(document))
+        return self.active.get(visitor_id)
+
+    def occupancy(self):
+        """Quantidade de visitantes na escola agora"""
+        return len(self.active)
+
+    def active_visitors(self):
+        """Visitantes presentes, por ordem de entrada"""
+        with self.lock:
+            visitors = list(self.active.values())
+        return sorted(visitors, key=lambda visitor: visitor.get('check_in') or '')